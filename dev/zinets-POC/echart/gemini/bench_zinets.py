@@ -0,0 +1,521 @@
+"""
+    Microbenchmarks for the ZiNets visualization pipeline.
+
+Usages:
+    $ python bench_zinets.py render
+    $ python bench_zinets.py render --sizes 1,100,10000 --repeat 20
+    $ python bench_zinets.py offline [--echarts-js vendor/echarts.min.js]
+    $ python bench_zinets.py site
+    $ python bench_zinets.py lazy --sizes 100,1000,10000
+    $ python bench_zinets.py large --nodes 20000 --write in_large20k.md
+    $ python bench_zinets.py parse --lines 1000000
+    $ python bench_zinets.py tree --nodes 1000000
+    $ python bench_zinets.py merge --networks 500
+    $ python bench_zinets.py stats --rows 1000000
+
+"""
+
+import glob
+import gzip
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+import click
+
+from zinets_render import (DEFAULT_COLLAPSE_DEPTH, DEFAULT_TEMPLATE, VENDOR_ECHARTS_JS,
+                           large_graph_options, load_template, page_values,
+                           write_character_bundle, write_character_shards, write_html, render_html)
+from zinets_merge import tree_to_markdown
+
+
+CJK_START = 0x4E00
+
+
+def make_synthetic_tree(n_nodes, fanout=4):
+    """
+    Build a balanced tree of `n_nodes` nodes named by consecutive CJK code points.
+    """
+    nodes = [{'name': chr(CJK_START + i), 'children': []} for i in range(n_nodes)]
+    for i in range(1, n_nodes):
+        parent = nodes[(i - 1) // fanout]
+        parent['children'].append(nodes[i])
+        nodes[i]['decomposition'] = f"{parent['name']} + {chr(CJK_START + n_nodes + i % 100)}"
+    return nodes[0]
+
+
+def make_synthetic_character_data(tree_data):
+    character_data = {}
+    stack = [tree_data]
+    while stack:
+        node = stack.pop()
+        char = node['name']
+        character_data[char] = {
+            'pinyin': 'zì',
+            'meaning': f'meaning of {char}; second sense; third sense',
+            'composition': f"{node.get('decomposition', char)}",
+            'phrases': '<br>'.join(f'{char}{k} (zì {k}) - phrase {k}' for k in range(5)),
+        }
+        stack.extend(node['children'])
+    return character_data
+
+
+def time_it(func, repeat):
+    """
+    Return the best wall time in milliseconds over `repeat` runs.
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        ts_start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - ts_start)
+    return best * 1000
+
+
+def legacy_render(tree_data, character_data, title="ZiNets Visualization"):
+    """
+    Reproduce the previous rendering path: str.format over the whole template
+    with indented JSON, built fully in memory.
+    """
+    with open(DEFAULT_TEMPLATE, encoding='utf-8') as f:
+        text = f.read()
+    template = text.replace('{', '{{').replace('}', '}}')
+    template = template.replace('{{{{', '{').replace('}}}}', '}')
+    values = page_values(tree_data, character_data, title=title)
+    return template.format(
+        character_data_json=json.dumps(character_data, ensure_ascii=False, indent=4),
+        tree_data_json=json.dumps(tree_data, ensure_ascii=False, indent=4),
+        **values
+    )
+
+
+@click.group()
+def cli():
+    """ZiNets microbenchmarks."""
+
+
+@cli.command()
+@click.option('--sizes', default='1,100,10000', help='Comma-separated tree sizes (nodes)')
+@click.option('--repeat', default=10, type=int, help='Runs per measurement (best is reported)')
+def render(sizes, repeat):
+    """Render HTML pages for synthetic trees of several sizes."""
+    load_template()  # compile once, outside the timed region
+
+    click.echo(f"{'nodes':>8} {'legacy ms':>10} {'string ms':>10} {'file ms':>10} {'legacy KB':>10} {'compact KB':>10}")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        out_path = os.path.join(tmp_dir, 'vis_bench.html')
+        for n_nodes in [int(s) for s in sizes.split(',')]:
+            tree_data = make_synthetic_tree(n_nodes)
+            character_data = make_synthetic_character_data(tree_data)
+
+            def to_file():
+                with open(out_path, 'w', encoding='utf-8') as f:
+                    write_html(f, tree_data, character_data)
+
+            legacy_ms = time_it(lambda: legacy_render(tree_data, character_data), repeat)
+            string_ms = time_it(lambda: render_html(tree_data, character_data), repeat)
+            file_ms = time_it(to_file, repeat)
+
+            legacy_kb = len(legacy_render(tree_data, character_data).encode('utf-8')) / 1024
+            compact_kb = os.path.getsize(out_path) / 1024
+            click.echo(f"{n_nodes:>8} {legacy_ms:>10.2f} {string_ms:>10.2f} {file_ms:>10.2f} {legacy_kb:>10.1f} {compact_kb:>10.1f}")
+
+
+def read_network_trees(pattern='in_*.md'):
+    """
+    Parse the example networks next to this script into (name, tree) pairs.
+    """
+    from zinets_parse import parse_markdown_to_tree_data
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    trees = []
+    for path in sorted(glob.glob(os.path.join(here, pattern))):
+        with open(path, 'r', encoding='utf-8') as f:
+            trees.append((os.path.basename(path), parse_markdown_to_tree_data(f.read())))
+    return trees
+
+
+@cli.command()
+@click.option('--echarts-js', default=VENDOR_ECHARTS_JS, type=click.Path(),
+              help='Vendored ECharts build to inline')
+def offline(echarts_js):
+    """Compare CDN and offline page sizes (raw and gzip) for the example networks."""
+    from zinets_vis import extract_all_characters, generate_placeholder_data
+
+    if not os.path.exists(echarts_js):
+        click.echo(f"{echarts_js} not found; fetch it first (see vendor/README.md).")
+        return
+
+    click.echo(f"{'network':<18} {'cdn KB':>8} {'cdn gz':>8} {'offline KB':>11} {'offline gz':>11}")
+    for name, tree_data in read_network_trees():
+        character_data = {c: generate_placeholder_data(c) for c in extract_all_characters(tree_data)}
+        cdn = render_html(tree_data, character_data).encode('utf-8')
+        inline = render_html(tree_data, character_data, offline=True, echarts_js=echarts_js).encode('utf-8')
+        click.echo(f"{name:<18} {len(cdn)/1024:>8.1f} {len(gzip.compress(cdn, 9))/1024:>8.1f} "
+                   f"{len(inline)/1024:>11.1f} {len(gzip.compress(inline, 9))/1024:>11.1f}")
+
+    minified = len(load_template(DEFAULT_TEMPLATE, True).render(
+        {f: '' for f in load_template(DEFAULT_TEMPLATE, True).fields}))
+    full = len(load_template(DEFAULT_TEMPLATE, False).render(
+        {f: '' for f in load_template(DEFAULT_TEMPLATE, False).fields}))
+    click.echo(f"\ntemplate alone: {full/1024:.1f} KB, minified {minified/1024:.1f} KB")
+    click.echo("First render time is logged by each page in the browser console "
+               "('ZiNets first render: N ms').")
+
+
+def cached_character_data(characters):
+    """
+    Character data from the cache database next to this script, falling back
+    to placeholder data, so size measurements reflect real LLM output.
+    """
+    import zinets_vis
+
+    zinets_vis.CACHE_DB = os.path.join(os.path.dirname(os.path.abspath(__file__)), zinets_vis.CACHE_DB)
+    return {c: zinets_vis.get_cached_character(c) or zinets_vis.generate_placeholder_data(c)
+            for c in characters}
+
+
+@cli.command()
+def site():
+    """Total size of per-page bundled data versus a shared character bundle."""
+    from zinets_vis import extract_all_characters
+
+    networks = read_network_trees()
+    all_characters = sorted(set().union(*(extract_all_characters(t) for _, t in networks)))
+    character_data = cached_character_data(all_characters)
+
+    bundled_total = 0
+    site_total = 0
+    with tempfile.TemporaryDirectory() as site_dir:
+        bundle = write_character_bundle(character_data, site_dir)
+        site_total += os.path.getsize(os.path.join(site_dir, bundle))
+
+        click.echo(f"{'network':<18} {'chars':>6} {'bundled KB':>11} {'site KB':>9}")
+        for name, tree_data in networks:
+            page_data = {c: character_data[c] for c in extract_all_characters(tree_data)}
+            bundled = len(render_html(tree_data, page_data).encode('utf-8'))
+            shared = len(render_html(tree_data, page_data, character_data_url=bundle).encode('utf-8'))
+            bundled_total += bundled
+            site_total += shared
+            click.echo(f"{name:<18} {len(page_data):>6} {bundled/1024:>11.1f} {shared/1024:>9.1f}")
+
+    click.echo(f"\nshared bundle {bundle}: {len(all_characters)} characters")
+    click.echo(f"total bundled: {bundled_total/1024:.1f} KB, site: {site_total/1024:.1f} KB "
+               f"({(1 - site_total/bundled_total)*100:.1f}% smaller)")
+
+
+@cli.command()
+@click.option('--sizes', default='100,1000,10000', help='Comma-separated tree sizes (nodes)')
+def lazy(sizes):
+    """Page payload parsed before first paint: embedded versus lazily loaded character data."""
+    click.echo(f"{'nodes':>8} {'embed KB':>9} {'lazy KB':>8} {'shards':>7} {'max shard KB':>13}")
+    with tempfile.TemporaryDirectory() as site_dir:
+        for n_nodes in [int(s) for s in sizes.split(',')]:
+            tree_data = make_synthetic_tree(n_nodes)
+            character_data = make_synthetic_character_data(tree_data)
+            shards = write_character_shards(character_data, site_dir)
+
+            embed = len(render_html(tree_data, character_data).encode('utf-8'))
+            lazy_page = len(render_html(tree_data, character_data, character_shards=shards).encode('utf-8'))
+            max_shard = max(os.path.getsize(os.path.join(site_dir, p)) for p in shards.values())
+            click.echo(f"{n_nodes:>8} {embed/1024:>9.1f} {lazy_page/1024:>8.1f} {len(shards):>7} {max_shard/1024:>13.1f}")
+    click.echo("A clicked node costs one shard fetch (cached by the page LRU); "
+               "the remaining lazy page growth is the tree itself.")
+
+
+def visible_node_count(node, depth):
+    """
+    Nodes the large-graph page puts into the chart initially (mirrors visibleTree in the template).
+    """
+    count = 1
+    stack = [(node, depth)]
+    while stack:
+        node, depth = stack.pop()
+        if depth > 0:
+            count += len(node['children'])
+            stack.extend((child, depth - 1) for child in node['children'])
+    return count
+
+
+@cli.command()
+@click.option('--nodes', 'n_nodes', default=20000, type=int, help='Network size')
+@click.option('--fanout', default=4, type=int, help='Children per node')
+@click.option('--write', 'write_path', type=click.Path(dir_okay=False),
+              help='Also write the generated network as markdown (an in_*.md test input)')
+def large(n_nodes, fanout, write_path):
+    """Generate a large network and render it in full and large-graph mode."""
+    from zinets_parse import parse_markdown_to_tree_data
+
+    markdown_text = tree_to_markdown(make_synthetic_tree(n_nodes, fanout))
+    if write_path:
+        with open(write_path, 'w', encoding='utf-8') as f:
+            f.write(markdown_text)
+        click.echo(f"Wrote {n_nodes}-node network to {write_path}")
+
+    parse_ms = time_it(lambda: parse_markdown_to_tree_data(markdown_text), 3)
+    tree_data = parse_markdown_to_tree_data(markdown_text)
+    character_data = make_synthetic_character_data(tree_data)
+    options = large_graph_options(tree_data)
+
+    with tempfile.TemporaryDirectory() as site_dir:
+        shards = write_character_shards(character_data, site_dir)
+        full_ms = time_it(lambda: render_html(tree_data, character_data, large_graph=False), 3)
+        large_ms = time_it(lambda: render_html(tree_data, {}, character_shards=shards), 3)
+        full_kb = len(render_html(tree_data, character_data, large_graph=False).encode('utf-8')) / 1024
+        large_kb = len(render_html(tree_data, {}, character_shards=shards).encode('utf-8')) / 1024
+
+    click.echo(f"network: {n_nodes} nodes, fanout {fanout}; parse {parse_ms:.1f} ms")
+    click.echo(f"large-graph mode chosen automatically: {options is not None}")
+    click.echo(f"full page:        {full_kb:8.1f} KB, render {full_ms:6.1f} ms, {n_nodes} nodes in the chart")
+    click.echo(f"large-graph page: {large_kb:8.1f} KB, render {large_ms:6.1f} ms, "
+               f"{visible_node_count(tree_data, DEFAULT_COLLAPSE_DEPTH)} nodes in the chart initially, "
+               f"+{fanout} per expand")
+    click.echo("In the browser the page logs 'ZiNets render: N visible nodes in M ms' for every "
+               "expand / label change; that is the per-update frame time.")
+
+
+def synthetic_markdown_lines(n_lines, max_depth=8, indent='    '):
+    """
+    Yield a network of `n_lines` dash lines with a varied, always valid nesting
+    (each line at most one level deeper than the previous one).
+    """
+    yield chr(CJK_START) + '\n'
+    level = 0
+    for i in range(1, n_lines):
+        level = level + 1 if level < max_depth and i % 3 else 1 + i % level
+        name = chr(CJK_START + i % 20000)
+        decomposition = f"({chr(CJK_START + i % 97)} + {chr(CJK_START + i % 89)})" if i % 2 else ''
+        comment = '  # note' if i % 10 == 0 else ''
+        yield f"{indent * level}- {name}{decomposition}{comment}\n"
+
+
+def peak_memory_mb(func):
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1] / 2**20
+    finally:
+        tracemalloc.stop()
+
+
+@cli.command()
+@click.option('--lines', 'n_lines', default=1000000, type=int, help='Network size (lines)')
+@click.option('--repeat', default=3, type=int, help='Runs per measurement (best is reported)')
+def parse(n_lines, repeat):
+    """Compare the two-pass and single-pass markdown parsers on a synthetic network file."""
+    from test_parse_md_text import parse_markdown_to_tree_data_two_pass
+    from zinets_parse import parse_markdown_lines
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'in_bench.md')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.writelines(synthetic_markdown_lines(n_lines))
+
+        def two_pass():
+            with open(path, encoding='utf-8') as f:
+                return parse_markdown_to_tree_data_two_pass(f.read())
+
+        def single_pass():
+            with open(path, encoding='utf-8') as f:
+                return parse_markdown_lines(f)
+
+        assert two_pass() == single_pass()
+        click.echo(f"network: {n_lines} lines, {os.path.getsize(path) / 2**20:.1f} MB")
+        click.echo(f"{'parser':>12} {'best ms':>10} {'peak MB':>10}")
+        for name, func in (('two-pass', two_pass), ('single-pass', single_pass)):
+            click.echo(f"{name:>12} {time_it(func, repeat):>10.1f} {peak_memory_mb(func):>10.1f}")
+        click.echo("(peak MB includes the parsed tree itself)")
+
+
+def retained_memory_mb(func):
+    """
+    Run `func` under tracemalloc and return (result, MB still allocated afterwards).
+    """
+    tracemalloc.start()
+    try:
+        result = func()
+        return result, tracemalloc.get_traced_memory()[0] / 2**20
+    finally:
+        tracemalloc.stop()
+
+
+@cli.command()
+@click.option('--nodes', 'n_nodes', default=1000000, type=int, help='Network size (nodes)')
+@click.option('--repeat', default=3, type=int, help='Runs per measurement (best is reported)')
+def tree(n_nodes, repeat):
+    """Compare the nested-dict tree with the array-backed ZiTree."""
+    from zinets_tree import ZiTree
+    from zinets_parse import parse_markdown_lines
+    from zinets_vis import extract_all_characters
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'in_bench.md')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.writelines(synthetic_markdown_lines(n_nodes))
+
+        def parse_dict():
+            with open(path, encoding='utf-8') as f:
+                return parse_markdown_lines(f)
+
+        def parse_array():
+            with open(path, encoding='utf-8') as f:
+                return ZiTree.from_lines(f)
+
+        tree_data, dict_mb = retained_memory_mb(parse_dict)
+        zi_tree, array_mb = retained_memory_mb(parse_array)
+        assert zi_tree.to_dict() == tree_data
+
+        def walk_dict():
+            count, stack = 0, [tree_data]
+            while stack:
+                node = stack.pop()
+                count += 1
+                stack.extend(node['children'])
+            return count
+
+        def walk_array():
+            return sum(1 for _ in zi_tree.walk())
+
+        rows = [
+            ('dict', dict_mb, time_it(parse_dict, repeat), time_it(walk_dict, repeat),
+             time_it(lambda: extract_all_characters(tree_data), repeat)),
+            ('ZiTree', array_mb, time_it(parse_array, repeat), time_it(walk_array, repeat),
+             time_it(zi_tree.characters, repeat)),
+        ]
+        click.echo(f"network: {len(zi_tree)} nodes, {len(zi_tree.names)} distinct names, "
+                   f"{len(zi_tree.decompositions)} distinct decompositions")
+        click.echo(f"{'tree':>8} {'MB':>8} {'B/node':>8} {'parse ms':>10} {'walk ms':>10} {'chars ms':>10}")
+        for name, mb, parse_ms, walk_ms, chars_ms in rows:
+            click.echo(f"{name:>8} {mb:>8.1f} {mb * 2**20 / n_nodes:>8.1f} {parse_ms:>10.1f} {walk_ms:>10.1f} {chars_ms:>10.1f}")
+        click.echo(f"ZiTree.to_dict: {time_it(zi_tree.to_dict, 1):.1f} ms; "
+                   f"node arrays alone: {zi_tree.nbytes() / n_nodes:.0f} B/node")
+
+
+@cli.command()
+@click.option('--networks', 'n_networks', default=500, type=int, help='Number of networks')
+@click.option('--nodes', 'n_nodes', default=60, type=int, help='Nodes per network')
+@click.option('--pool', default=3000, type=int, help='Distinct characters shared by the networks')
+def merge(n_networks, n_nodes, pool):
+    """Merge many overlapping networks and diff two versions of one."""
+    import random
+    from zinets_merge import changed_subtrees, diff_networks, merge_networks, read_network
+
+    rng = random.Random(0)
+
+    def make_network():
+        names = [chr(CJK_START + rng.randrange(pool)) for _ in range(n_nodes)]
+        nodes = [{'name': name, 'children': []} for name in names]
+        for i in range(1, n_nodes):
+            nodes[rng.randrange(i)]['children'].append(nodes[i])
+            nodes[i]['decomposition'] = f"{names[i]} + {chr(CJK_START + rng.randrange(pool))}"
+        return nodes[0]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        paths = []
+        for i in range(n_networks):
+            paths.append(os.path.join(tmp_dir, f'in_{i}.md'))
+            with open(paths[-1], 'w', encoding='utf-8') as f:
+                f.write(tree_to_markdown(make_network()))
+
+        parse_ms = time_it(lambda: [read_network(path) for path in paths], 3)
+        networks = [(os.path.basename(path), read_network(path)) for path in paths]
+        merge_ms = time_it(lambda: merge_networks(networks), 3)
+        dag = merge_networks(networks)
+
+        old_tree = networks[0][1]
+        new_tree = json.loads(json.dumps(old_tree))
+        new_tree['children'][0]['decomposition'] = 'changed'
+        new_tree['children'].append(make_network())
+        diff_ms = time_it(lambda: diff_networks(old_tree, new_tree), 10)
+
+    n_edges = sum(len(names) for names in dag['children'].values())
+    click.echo(f"{n_networks} networks x {n_nodes} nodes -> {len(dag['nodes'])} nodes, {n_edges} edges")
+    click.echo(f"parse {parse_ms:.1f} ms + merge {merge_ms:.1f} ms = {parse_ms + merge_ms:.1f} ms")
+    click.echo(f"diff of two {n_nodes}-node versions: {diff_ms:.3f} ms, "
+               f"{len(changed_subtrees(old_tree, new_tree))} changed subtrees")
+
+
+def aggregate_cache_stats(conn):
+    """
+    The statistics as computed before the materialized table: one scan per figure.
+    """
+    total = conn.execute("SELECT COUNT(*) FROM character_cache").fetchone()[0]
+    active = conn.execute("SELECT COUNT(*) FROM character_cache WHERE is_active = 'Y'").fetchone()[0]
+    providers = dict(conn.execute(
+        "SELECT llm_provider, COUNT(*) FROM character_cache WHERE is_active = 'Y' GROUP BY llm_provider"))
+    models = dict(conn.execute(
+        "SELECT llm_model_name, COUNT(*) FROM character_cache WHERE is_active = 'Y' GROUP BY llm_model_name"))
+    last_updated = conn.execute(
+        "SELECT timestamp FROM character_cache WHERE is_active = 'Y' ORDER BY timestamp DESC LIMIT 1").fetchone()
+    return total, active, providers, models, last_updated
+
+
+@cli.command()
+@click.option('--rows', 'n_rows', default=1000000, type=int, help='Cache size (rows)')
+def stats(n_rows):
+    """Cache statistics: aggregate scans vs the trigger-maintained table."""
+    import random
+    import sqlite3
+    from zinets_cache_stats import check_cache_stats, read_cache_stats, setup_cache_stats
+
+    rng = random.Random(0)
+    providers = [('Google', 'gemini-2.0-flash'), ('Google', 'gemini-2.5-flash'), ('OpenAI', 'gpt-4o-mini'),
+                 ('Local', 'qwen2.5:7b')]
+
+    def make_rows():
+        for i in range(n_rows):
+            provider, model = providers[i % len(providers)]
+            yield (f'字{i // len(providers)}', 'zì', 'meaning', 'a + b', 'phrases', provider, model,
+                   f'2025-01-01T00:00:{rng.randrange(60):02d}', 'Y' if rng.random() < 0.9 else 'N',
+                   'Y' if i % len(providers) == 0 else 'N')
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        conn = sqlite3.connect(os.path.join(tmp_dir, 'cache.sqlite'))
+        conn.execute('''
+        CREATE TABLE character_cache (character TEXT, pinyin TEXT, meaning TEXT, composition TEXT, phrases TEXT,
+            llm_provider TEXT, llm_model_name TEXT, timestamp TEXT, is_active TEXT DEFAULT 'Y',
+            is_best TEXT DEFAULT 'Y', PRIMARY KEY (character, llm_provider, llm_model_name))
+        ''')
+        ts_start = time.perf_counter()
+        with conn:
+            conn.executemany('INSERT INTO character_cache VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', make_rows())
+        load_s = time.perf_counter() - ts_start
+
+        ts_start = time.perf_counter()
+        setup_cache_stats(conn)
+        setup_ms = (time.perf_counter() - ts_start) * 1000
+
+        scan_ms = time_it(lambda: aggregate_cache_stats(conn), 3)
+        table_ms = time_it(lambda: read_cache_stats(conn), 20)
+        check_ms = time_it(lambda: check_cache_stats(conn), 1)
+
+        # write cost of the triggers: the same upserts and deletes without and with them
+        batch = [(f'x{i}', 'zì', 'm', 'c', 'p', 'Google', 'gemini-2.0-flash', '2025-01-02T00:00:00', 'Y', 'Y')
+                 for i in range(10000)]
+
+        def write_batch():
+            with conn:
+                conn.executemany('''
+                INSERT INTO character_cache VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (character, llm_provider, llm_model_name) DO UPDATE SET timestamp = excluded.timestamp
+                ''', batch)
+            with conn:
+                conn.execute("DELETE FROM character_cache WHERE character LIKE 'x%'")
+
+        with_ms = time_it(write_batch, 3)
+        with conn:
+            for name in ('insert', 'delete', 'update'):
+                conn.execute(f'DROP TRIGGER character_cache_stats_{name}')
+        without_ms = time_it(write_batch, 3)
+        conn.close()
+
+    click.echo(f"{n_rows} rows loaded in {load_s:.1f} s, statistics table built in {setup_ms:.0f} ms")
+    click.echo(f"stats by aggregate scans: {scan_ms:.1f} ms, from the table: {table_ms:.3f} ms "
+               f"({scan_ms / table_ms:.0f}x); full check: {check_ms:.0f} ms")
+    click.echo(f"10000 inserts + deletes: {without_ms:.0f} ms without triggers, {with_ms:.0f} ms with them")
+
+
+if __name__ == "__main__":
+    cli()
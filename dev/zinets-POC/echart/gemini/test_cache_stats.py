@@ -0,0 +1,66 @@
+import sqlite3
+import unittest
+
+from zinets_cache_stats import check_cache_stats, read_cache_stats, rebuild_cache_stats, setup_cache_stats
+
+
+SCHEMA = '''
+CREATE TABLE character_cache (character TEXT, pinyin TEXT, meaning TEXT, composition TEXT, phrases TEXT,
+    llm_provider TEXT, llm_model_name TEXT, timestamp TEXT, is_active TEXT DEFAULT 'Y', is_best TEXT DEFAULT 'Y',
+    PRIMARY KEY (character, llm_provider, llm_model_name))
+'''
+
+
+class TestCacheStats(unittest.TestCase):
+
+    def setUp(self):
+        self.conn = sqlite3.connect(':memory:')
+        self.conn.execute(SCHEMA)
+
+    def insert(self, character, provider='Google', model='gemini-2.0-flash', timestamp='2025-01-01', is_best='Y'):
+        self.conn.execute("INSERT INTO character_cache VALUES (?, 'shuǐ', 'water', '', '', ?, ?, ?, 'Y', ?)",
+                          (character, provider, model, timestamp, is_best))
+
+    def test_existing_rows_are_counted_at_setup(self):
+        self.insert('水')
+        self.insert('水', provider='OpenAI', model='gpt-4o-mini', is_best='N')
+        setup_cache_stats(self.conn)
+        stats = read_cache_stats(self.conn)
+        self.assertEqual((stats['total'], stats['active'], stats['best']), (2, 2, 1))
+        self.assertEqual(stats['providers'], {'Google': 1, 'OpenAI': 1})
+
+    def test_triggers_follow_writes(self):
+        setup_cache_stats(self.conn)
+        self.insert('水')
+        self.insert('火', timestamp='2025-02-01')
+        self.insert('木', provider='OpenAI', model='gpt-4o-mini')
+        self.conn.execute("UPDATE character_cache SET is_active = 'N' WHERE character = '火'")
+        self.conn.execute("DELETE FROM character_cache WHERE character = '木'")
+        self.conn.execute('''
+        INSERT INTO character_cache VALUES ('水', 'shuǐ', 'water', '', '', 'Google', 'gemini-2.0-flash',
+            '2025-03-01', 'Y', 'N')
+        ON CONFLICT (character, llm_provider, llm_model_name) DO UPDATE SET
+            timestamp = excluded.timestamp, is_best = excluded.is_best
+        ''')
+
+        stats = read_cache_stats(self.conn)
+        self.assertEqual((stats['total'], stats['active'], stats['best']), (2, 1, 0))
+        self.assertEqual(stats['providers'], {'Google': 1})
+        self.assertEqual(stats['last_updated'], '2025-03-01')
+        self.assertEqual(check_cache_stats(self.conn), [])
+
+    def test_check_reports_drift_and_rebuild_repairs_it(self):
+        setup_cache_stats(self.conn)
+        self.insert('水')
+        # REPLACE deletes the old row without firing the delete trigger
+        self.conn.execute("INSERT OR REPLACE INTO character_cache VALUES ('水', 'shuǐ', 'water', '', '', "
+                          "'Google', 'gemini-2.0-flash', '2025-01-02', 'Y', 'Y')")
+        self.assertEqual(len(check_cache_stats(self.conn)), 1)
+
+        rebuild_cache_stats(self.conn)
+        self.assertEqual(check_cache_stats(self.conn), [])
+        self.assertEqual(read_cache_stats(self.conn)['total'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
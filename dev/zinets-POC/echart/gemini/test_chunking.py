@@ -0,0 +1,54 @@
+import os
+import random
+import tempfile
+import unittest
+
+from zinets_chunking import MAX_CHUNK_SIZE, ChunkSizer
+
+
+def simulate(sizer, tokens_per_char, requests=40, max_output_tokens=8192, seed=1):
+    """
+    Drive `sizer` with a model whose output is cut at `max_output_tokens`.
+    """
+    rng = random.Random(seed)
+    sizes = []
+    for _ in range(requests):
+        size = sizer.next_chunk_size()
+        sizes.append(size)
+        tokens = sum(rng.gauss(tokens_per_char, 20) for _ in range(size))
+        truncated = tokens > max_output_tokens
+        recovered = int(size * max_output_tokens / tokens) if truncated else size
+        sizer.record(size, recovered, 1.5 + 0.4 * size, min(tokens, max_output_tokens), truncated)
+    return sizes
+
+
+class TestChunkSizer(unittest.TestCase):
+
+    def test_converges_below_the_token_limit(self):
+        for tokens_per_char in (150, 400):
+            sizes = simulate(ChunkSizer('model'), tokens_per_char)
+            limit = 8192 // tokens_per_char
+            self.assertTrue(all(size <= limit for size in sizes[-10:]), (tokens_per_char, sizes))
+            self.assertGreaterEqual(sizes[-1], limit * 0.75)
+
+    def test_cheap_output_uses_the_largest_chunks(self):
+        self.assertEqual(simulate(ChunkSizer('model'), 60)[-1], MAX_CHUNK_SIZE)
+
+    def test_capped_at_remaining(self):
+        sizer = ChunkSizer('model')
+        self.assertEqual(sizer.next_chunk_size(remaining=3), 3)
+
+    def test_persisted_between_runs(self):
+        db_path = os.path.join(tempfile.mkdtemp(), 'cache.sqlite')
+        sizer = ChunkSizer('model', 'Spanish', db_path=db_path)
+        simulate(sizer, 300)
+        sizer.save()
+
+        loaded = ChunkSizer.load('model', 'Spanish', db_path)
+        self.assertEqual(loaded.next_chunk_size(), sizer.next_chunk_size())
+        self.assertAlmostEqual(loaded.tokens_per_char, sizer.tokens_per_char)
+        self.assertEqual(ChunkSizer.load('model', 'English', db_path).samples, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
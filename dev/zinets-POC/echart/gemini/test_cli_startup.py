@@ -0,0 +1,57 @@
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import unittest
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SCRIPT = os.path.join(HERE, 'zinets_vis.py')
+
+# Startup time is dominated by the heavy modules (the LLM SDK alone takes
+# hundreds of ms), so the tests check which modules are imported rather than
+# timing the imports, which varies too much between machines.
+IMPORT_LINE = re.compile(r'^import time:\s+(\d+) \|\s+\d+ \|(\s*)(\S+)$')
+
+
+def imported_modules(*args):
+    """
+    Run zinets_vis.py with `args` under -X importtime in an empty directory
+    and return the names of the modules it imported.
+    """
+    with tempfile.TemporaryDirectory() as cwd:
+        proc = subprocess.run([sys.executable, '-X', 'importtime', SCRIPT, *args], cwd=cwd,
+                              capture_output=True, text=True, timeout=120)
+    if proc.returncode != 0:
+        raise AssertionError(f"zinets_vis.py {' '.join(args)} failed:\n{proc.stdout}\n{proc.stderr[-2000:]}")
+    modules = set()
+    for line in proc.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match:
+            modules.add(match.group(3))
+    return modules
+
+
+class TestCliStartup(unittest.TestCase):
+
+    def assert_fast(self, args, forbidden):
+        modules = imported_modules(*args)
+        self.assertTrue(modules, "no -X importtime output")
+        self.assertFalse(modules & set(forbidden), f"imported {sorted(modules & set(forbidden))}")
+
+    def test_help(self):
+        self.assert_fast(['--help'], ['google.generativeai', 'tqdm', 'sqlite3', 'urllib.request'])
+
+    def test_cache_stats(self):
+        self.assert_fast(['--cache-stats'], ['google.generativeai', 'tqdm'])
+
+    def test_render_without_llm(self):
+        with tempfile.TemporaryDirectory() as out_dir:
+            self.assert_fast(['-i', os.path.join(HERE, 'in_water.md'), '--no-gemini', '--no-cache', '--no-debug',
+                              '-o', os.path.join(out_dir, 'vis_water.html')],
+                             ['google.generativeai', 'sqlite3', 'urllib.request'])
+
+
+if __name__ == "__main__":
+    unittest.main()
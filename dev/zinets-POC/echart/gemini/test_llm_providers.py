@@ -0,0 +1,104 @@
+import threading
+import time
+import unittest
+
+from zinets_llm_providers import FakeProvider, HedgedProvider, ProviderError, fake_entry, make_provider
+from zinets_vis import fetch_character_chunk
+
+
+class TestProviders(unittest.TestCase):
+
+    def test_fake_provider_in_both_formats(self):
+        provider = FakeProvider()
+        for json_mode in (True, False):
+            data = fetch_character_chunk(provider, ['水', '冰'], use_cache=False, debug=False, json_mode=json_mode)
+            self.assertEqual(data, {'水': fake_entry('水'), '冰': fake_entry('冰')})
+
+    def test_text_format_only_when_json_mode_is_unsupported(self):
+        provider = FakeProvider(no_json=True)
+        for _ in range(2):
+            data = fetch_character_chunk(provider, ['水'], use_cache=False, debug=False, json_mode=True)
+            self.assertEqual(data, {'水': fake_entry('水')})
+        self.assertEqual(provider.calls, 3)         # JSON mode is not asked again once rejected
+
+        failing = FakeProvider(fail=True)
+        with self.assertRaises(ProviderError):
+            fetch_character_chunk(failing, ['水'], use_cache=False, debug=False, json_mode=True)
+        self.assertEqual(failing.calls, 1)
+
+    def test_concurrency_limit(self):
+        provider = FakeProvider(latency=0.05, max_concurrency=2)
+        in_flight, peak, lock = [0], [0], threading.Lock()
+        generate = provider._generate
+
+        def counting(prompt, json_mode):
+            with lock:
+                in_flight[0] += 1
+                peak[0] = max(peak[0], in_flight[0])
+            try:
+                return generate(prompt, json_mode)
+            finally:
+                with lock:
+                    in_flight[0] -= 1
+
+        provider._generate = counting
+        threads = [threading.Thread(target=provider.generate, args=("'水'",)) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(peak[0], 2)
+
+    def test_make_provider(self):
+        self.assertEqual(repr(make_provider('fake:test')), 'fake:test')
+        local = make_provider('local:qwen2.5:7b@http://gpu-box:8080/v1')
+        self.assertEqual((local.model_name, local.base_url), ('qwen2.5:7b', 'http://gpu-box:8080/v1'))
+        with self.assertRaises(ProviderError):
+            make_provider('nope')
+
+
+class TestHedging(unittest.TestCase):
+
+    def test_fast_primary_is_not_hedged(self):
+        backup = FakeProvider('backup')
+        hedged = HedgedProvider(FakeProvider('primary'), backup, hedge_after=1.0)
+        self.assertEqual(hedged.generate("'水'")['llm_model_name'], 'primary')
+        self.assertEqual((hedged.hedged, backup.calls), (0, 0))
+
+    def test_slow_primary_is_hedged(self):
+        hedged = HedgedProvider(FakeProvider('primary', latency=2.0), FakeProvider('backup'), hedge_after=0.05)
+        started = time.monotonic()
+        self.assertEqual(hedged.generate("'水'")['llm_model_name'], 'backup')
+        self.assertLess(time.monotonic() - started, 1.0)
+        self.assertEqual((hedged.hedged, hedged.backup_wins), (1, 1))
+
+    def test_failed_primary_is_hedged_at_once(self):
+        hedged = HedgedProvider(FakeProvider('primary', fail=True), FakeProvider('backup'), hedge_after=5.0)
+        started = time.monotonic()
+        self.assertEqual(hedged.generate("'水'")['llm_model_name'], 'backup')
+        self.assertLess(time.monotonic() - started, 1.0)
+
+    def test_unusable_answer_waits_for_the_other(self):
+        primary = FakeProvider('primary', drop='水冰')
+        hedged = HedgedProvider(primary, FakeProvider('backup', latency=0.05), hedge_after=0.01)
+        data = fetch_character_chunk(hedged, ['水', '冰'], use_cache=False, debug=False)
+        self.assertEqual(set(data), {'水', '冰'})
+
+    def test_primary_without_json_mode_gets_text(self):
+        primary = FakeProvider('primary', no_json=True)
+        hedged = HedgedProvider(primary, FakeProvider('backup'), hedge_after=5.0)
+        for _ in range(3):
+            data = fetch_character_chunk(hedged, ['水'], use_cache=False, debug=False, json_mode=True)
+            self.assertEqual(data, {'水': fake_entry('水')})
+        # one JSON attempt, then the text format
+        self.assertEqual((primary.calls, primary.json_calls), (3, 1))
+        self.assertTrue(hedged.json_mode_supported)
+
+    def test_both_failing_raises(self):
+        hedged = HedgedProvider(FakeProvider('a', fail=True), FakeProvider('b', fail=True), hedge_after=0.01)
+        with self.assertRaises(ProviderError):
+            hedged.generate("'水'")
+
+
+if __name__ == "__main__":
+    unittest.main()
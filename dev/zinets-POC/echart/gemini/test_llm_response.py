@@ -0,0 +1,119 @@
+import json
+import os
+import re
+import unittest
+
+from zinets_llm_response import ParseStats, parse_character_response, parse_json_response, parse_text_response
+
+
+ENTRY_WATER = {
+    'pinyin': 'shuǐ',
+    'meaning': 'water',
+    'composition': 'Pictograph of flowing water.',
+    'phrases': '水果 (shuǐ guǒ) - fruit<br>喝水 (hē shuǐ) - drink water',
+}
+ENTRY_ICE = {
+    'pinyin': 'bīng',
+    'meaning': 'ice',
+    'composition': '冫 (ice) + 水 (water)',
+    'phrases': '冰块 (bīng kuài) - ice cube<br>冰箱 (bīng xiāng) - fridge',
+}
+
+
+def text_entry(char, entry, header="Character: {char}"):
+    lines = [header.format(char=char)] if header else []
+    lines += [f"{field}: {entry[field]}" for field in ('pinyin', 'meaning', 'composition', 'phrases')]
+    return '\n'.join(lines)
+
+
+class TestTextResponse(unittest.TestCase):
+
+    def test_current_format(self):
+        text = text_entry('水', ENTRY_WATER) + '\n\n' + text_entry('冰', ENTRY_ICE)
+        data, missing = parse_character_response(text, ['水', '冰'])
+        self.assertEqual(data, {'水': ENTRY_WATER, '冰': ENTRY_ICE})
+        self.assertEqual(missing, [])
+
+    def test_recorded_gemini_responses(self):
+        path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'gemini_response_batch.txt')
+        with open(path, encoding='utf-8') as f:
+            text = f.read()
+        characters = list(dict.fromkeys(re.findall(r'^Character:\s*(\S)', text, re.MULTILINE)))
+        data, missing = parse_character_response(text, characters)
+        self.assertEqual(missing, [])
+        self.assertEqual(data['品']['pinyin'], 'pǐn')
+
+    def test_markdown_decoration_and_aliases(self):
+        text = ("### **Character 1: 水**\n- **Pronunciation**: shuǐ\n- **Meanings**: water\n"
+                "- **Structure**：Pictograph of flowing water.\n"
+                "- **Common phrases**: 水果 (shuǐ guǒ) - fruit<br>喝水 (hē shuǐ) - drink water\n")
+        data, _ = parse_character_response(text, ['水'])
+        self.assertEqual(data['水'], ENTRY_WATER)
+
+    def test_reordered_fields_and_continuation_lines(self):
+        text = ("Character: 冰\nphrases: 冰块 (bīng kuài) - ice cube<br>冰箱 (bīng xiāng) - fridge\n"
+                "composition: 冫 (ice) +\n水 (water)\nNote: common character\nmeaning: ice\npinyin: bīng")
+        data, _ = parse_character_response(text, ['冰'])
+        self.assertEqual(data['冰'], ENTRY_ICE)
+
+    def test_partial_recovery(self):
+        truncated = text_entry('冰', ENTRY_ICE).rsplit('\n', 1)[0]   # no phrases line
+        text = text_entry('水', ENTRY_WATER) + '\n' + truncated
+        data, missing = parse_character_response(text, ['水', '冰', '海'])
+        self.assertEqual(list(data), ['水'])
+        self.assertEqual(missing, ['冰', '海'])
+
+    def test_merged_entries_without_character_lines(self):
+        text = text_entry('水', ENTRY_WATER, header=None) + '\n' + text_entry('冰', ENTRY_ICE, header=None)
+        data, missing = parse_character_response(text, ['水', '冰'])
+        self.assertEqual(data, {'水': ENTRY_WATER, '冰': ENTRY_ICE})
+
+    def test_single_character_without_header(self):
+        data, missing = parse_character_response(text_entry('水', ENTRY_WATER, header=None), ['水'])
+        self.assertEqual(data, {'水': ENTRY_WATER})
+
+    def test_ambiguous_unnamed_entry_is_not_guessed(self):
+        text = (text_entry('水', ENTRY_WATER) + '\n' + text_entry('冰', ENTRY_ICE, header=None) + '\n'
+                + text_entry('冰', ENTRY_ICE, header=None))
+        self.assertEqual(list(parse_text_response(text, ['水', '冰', '海'])), ['水'])
+
+
+class TestJsonResponse(unittest.TestCase):
+
+    def test_schema_array(self):
+        text = json.dumps([dict(ENTRY_ICE, character='冰', phrases=ENTRY_ICE['phrases'].split('<br>')),
+                           dict(ENTRY_WATER, character='水')], ensure_ascii=False)
+        stats = ParseStats()
+        data, missing = parse_character_response(text, ['水', '冰'], stats)
+        self.assertEqual(data, {'水': ENTRY_WATER, '冰': ENTRY_ICE})
+        self.assertEqual((stats.json_parsed, stats.text_parsed), (1, 0))
+
+    def test_code_fence_and_dict_keyed_by_character(self):
+        text = "```json\n" + json.dumps({'水': ENTRY_WATER}, ensure_ascii=False) + "\n```"
+        self.assertEqual(parse_json_response(text, ['水']), {'水': ENTRY_WATER})
+
+    def test_truncated_output_keeps_complete_objects(self):
+        text = json.dumps([dict(ENTRY_WATER, character='水'), dict(ENTRY_ICE, character='冰')], ensure_ascii=False)
+        data, missing = parse_character_response(text[:-40], ['水', '冰'])
+        self.assertEqual(data, {'水': ENTRY_WATER})
+        self.assertEqual(missing, ['冰'])
+
+    def test_no_json_falls_back_to_text(self):
+        self.assertIsNone(parse_json_response(text_entry('水', ENTRY_WATER), ['水']))
+
+
+class TestParseStats(unittest.TestCase):
+
+    def test_fallback_rates(self):
+        stats = ParseStats()
+        parse_character_response(json.dumps([dict(ENTRY_WATER, character='水')], ensure_ascii=False), ['水'], stats)
+        parse_character_response(text_entry('冰', ENTRY_ICE), ['冰', '海'], stats)
+        parse_character_response("Sorry, I can't help with that.", ['山'], stats)
+        self.assertEqual((stats.responses, stats.json_parsed, stats.text_parsed, stats.unparsed), (3, 1, 1, 1))
+        self.assertAlmostEqual(stats.text_fallback_rate, 1 / 3)
+        self.assertAlmostEqual(stats.missing_rate, 2 / 4)
+        self.assertIn('2/4 characters recovered', stats.summary())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+import unittest
+
+from zinets_merge import (changed_subtrees, dag_to_tree, delta_network, diff_networks, merge_networks,
+                          subtree_characters, tree_to_markdown)
+from zinets_parse import parse_markdown_to_tree_data
+
+
+WATER = "水\n    - 冰\n        - 凉(冫 + 京)\n    - 海(氵 + 每)\n"
+ICE = "冰\n    - 凉\n    - 冻(冫 + 东)\n"
+
+
+class TestMerge(unittest.TestCase):
+
+    def test_shared_characters_are_one_node(self):
+        dag = merge_networks([('water', parse_markdown_to_tree_data(WATER)),
+                              ('ice', parse_markdown_to_tree_data(ICE))])
+        self.assertEqual(dag['roots'], ['水'])      # 冰 is a child of 水
+        self.assertEqual(dag['nodes']['冰']['networks'], ['water', 'ice'])
+        self.assertEqual(dag['nodes']['凉']['decomposition'], '冫 + 京')
+        self.assertEqual(dag['children']['冰'], ['凉', '冻'])
+        self.assertEqual(dag['conflicts'], {})
+
+    def test_merge_then_diff_round_trip(self):
+        water = parse_markdown_to_tree_data(WATER)
+        dag = merge_networks([('water', water), ('ice', parse_markdown_to_tree_data(ICE))])
+        merged = dag_to_tree(dag)
+        self.assertEqual(parse_markdown_to_tree_data(tree_to_markdown(merged)), merged)
+
+        # what the merge added to water is ice's extra child, and nothing else
+        diff = diff_networks(water, merged)
+        self.assertEqual(diff, {'added': [['水', '冰', '冻']], 'removed': [], 'changed': []})
+        self.assertEqual(diff_networks(merged, merged), {'added': [], 'removed': [], 'changed': []})
+
+    def test_delta_has_only_changed_subtrees(self):
+        old = parse_markdown_to_tree_data(WATER + "    - 河\n        - 可\n")
+        new = parse_markdown_to_tree_data(WATER.replace("(氵 + 每)", "(氵 + 毎)") + "    - 河\n        - 可\n"
+                                          "        - 何\n")
+        subtrees = changed_subtrees(old, new)
+        self.assertEqual([subtree['name'] for _, subtree in subtrees], ['海', '何'])
+        self.assertEqual(subtree_characters(subtrees), {'海', '何'})
+
+        # the unchanged 冰 branch and 河's unchanged child are left out
+        self.assertEqual(tree_to_markdown(delta_network(subtrees)),
+                         "水\n    - 海(氵 + 毎)\n    - 河\n        - 何\n")
+        self.assertIsNone(delta_network(changed_subtrees(old, old)))
+
+
+if __name__ == "__main__":
+    unittest.main()
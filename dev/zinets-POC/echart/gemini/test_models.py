@@ -0,0 +1,77 @@
+import os
+import tempfile
+import time
+import unittest
+
+import zinets_vis
+from zinets_models import RETRY_UNHEALTHY_AFTER, ModelRegistry
+
+
+MODELS = ['gemini-2.0-flash', 'gemini-2.5-flash', 'gemini-1.5-flash', 'gemini-2.5-pro']
+
+
+class TestModelRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.db_path = os.path.join(tempfile.mkdtemp(), 'cache.sqlite')
+
+    def test_preferred_model_leads_while_healthy(self):
+        registry = ModelRegistry('Google', self.db_path)
+        registry.record('gemini-2.5-flash', latency=30.0, ok=True)
+        registry.record('gemini-1.5-flash', latency=2.0, ok=True)
+        registry.record('gemini-2.5-pro', latency=10.0, ok=True)
+        registry.record('gemini-2.0-flash', latency=4.0, ok=True)
+        self.assertEqual(registry.rank_models('gemini-2.5-flash', MODELS),
+                         ['gemini-2.5-flash', 'gemini-1.5-flash', 'gemini-2.0-flash', 'gemini-2.5-pro'])
+
+    def test_unhealthy_model_is_skipped_until_retry(self):
+        registry = ModelRegistry('Google', self.db_path)
+        for _ in range(5):
+            registry.record('gemini-2.0-flash', latency=1.0, ok=False, error='503')
+        self.assertEqual(registry.rank_models('gemini-2.0-flash', MODELS)[-1], 'gemini-2.0-flash')
+
+        registry.health['gemini-2.0-flash']['updated'] -= RETRY_UNHEALTHY_AFTER + 1
+        self.assertEqual(registry.rank_models('gemini-2.0-flash', MODELS)[0], 'gemini-2.0-flash')
+
+    def test_probe_is_cached_with_ttl(self):
+        calls = []
+
+        def list_models():
+            calls.append(1)
+            return ['gemini-2.5-flash', 'gemini-2.5-pro']
+
+        registry = ModelRegistry('Google', self.db_path)
+        self.assertTrue(registry.is_stale())
+        registry.refresh(list_models)
+
+        loaded = ModelRegistry.load('Google', self.db_path)
+        self.assertFalse(loaded.is_stale())
+        loaded.refresh_in_background(list_models)
+        self.assertEqual(len(calls), 1)
+        # models the probe didn't list are dropped
+        self.assertEqual(loaded.rank_models('gemini-2.0-flash', MODELS), ['gemini-2.5-flash', 'gemini-2.5-pro'])
+
+        loaded.probed_at = time.time() - 2 * 24 * 3600
+        loaded.refresh_in_background(list_models)
+        loaded._refresh_thread.join()
+        self.assertEqual(len(calls), 2)
+
+    def test_health_persisted(self):
+        registry = ModelRegistry('Google', self.db_path)
+        registry.record('gemini-2.0-flash', latency=4.0, ok=True)
+        registry.save()
+        health = ModelRegistry.load('Google', self.db_path).health['gemini-2.0-flash']
+        self.assertEqual((health['requests'], health['latency']), (1, 4.0))
+        self.assertEqual(ModelRegistry.load('OpenAI', self.db_path).health, {})
+
+    def test_init_gemini_model_does_not_mutate_model_list(self):
+        registry = ModelRegistry('Google', self.db_path)
+        registry.probed_at = time.time()      # fresh: no probe in the background
+        before = list(zinets_vis.GEMINI_MODELS)
+        _, name = zinets_vis.init_gemini_model('gemini-2.5-pro', registry)
+        self.assertEqual(name, 'gemini-2.5-pro')
+        self.assertEqual(zinets_vis.GEMINI_MODELS, before)
+
+
+if __name__ == "__main__":
+    unittest.main()
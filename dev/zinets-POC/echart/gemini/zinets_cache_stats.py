@@ -0,0 +1,93 @@
+"""
+    Materialized statistics of the character cache.
+
+    Counting the cache (total, active, best, per provider and model, last
+    update) used to take several aggregate scans per call. The
+    `character_cache_stats` table holds one row per (llm_provider,
+    llm_model_name, is_active, is_best) group with its row count and newest
+    timestamp, kept current by triggers on `character_cache`, so every
+    writer (zinets_vis.py, the API backends, manual SQL) maintains it and a
+    stats read touches a handful of rows.
+
+    The cache has no language column, so there are no per-language counts.
+    `last_updated` is the newest timestamp written to a group; it does not
+    move back when rows leave the group. `INSERT OR REPLACE` removes the old
+    row without firing the delete trigger (unless `recursive_triggers` is
+    on), so writers upsert with `ON CONFLICT ... DO UPDATE` instead; `--check`
+    recomputes everything from the cache and reports any drift, `--repair`
+    rebuilds the table.
+
+Usages:
+    from zinets_cache_stats import read_cache_stats, setup_cache_stats
+
+    setup_cache_stats(conn)         # once per database; builds the table from existing rows
+    stats = read_cache_stats(conn)  # {'total', 'active', 'best', 'providers', 'models', 'last_updated'}
+
+    $ python zinets_cache_stats.py                 # show the statistics
+    $ python zinets_cache_stats.py --check         # compare with a full recount
+    $ python zinets_cache_stats.py --check --repair --db ../../vuejs/zinets_vis/backend/zinets_cache.sqlite
+"""
+
+import os
+import sys
+from pathlib import Path
+
+import click
+
+# the table, triggers and queries live in <repo>/src/zinets_db, shared with the backends
+sys.path.insert(0, str(Path(__file__).resolve().parents[4] / 'src'))
+from zinets_db import get_pool, table_exists
+from zinets_db.stats import check_cache_stats, read_cache_stats, rebuild_cache_stats, setup_cache_stats
+
+
+@click.command()
+@click.option('--db', 'db_path', type=click.Path(exists=True, dir_okay=False),
+              help='Cache database (default: zinets_cache.sqlite)')
+@click.option('--check', is_flag=True, help='Recount the cache and report differences')
+@click.option('--repair', is_flag=True, help='With --check: rebuild the statistics if they differ')
+def main(db_path, check, repair):
+    """
+    Show the materialized cache statistics, or check them against a recount.
+    """
+    from zinets_config import CACHE_DB
+
+    db_path = db_path or CACHE_DB
+    if not os.path.exists(db_path):
+        click.echo("No cache database found.")
+        return
+    # read-only unless repairing: a cache without the statistics table is recounted
+    conn = get_pool(db_path).get()
+    try:
+        if check and not table_exists(conn, 'character_cache_stats'):
+            if not repair:
+                raise click.ClickException("No statistics table; rerun with --repair to create it.")
+            setup_cache_stats(conn)
+            click.echo("Created the statistics from the cached rows.")
+            return
+        if check:
+            differences = check_cache_stats(conn)
+            for group, stored, actual in differences:
+                click.echo(f"{'/'.join(group)}: stored {stored[0]} rows (last {stored[1]}), "
+                           f"actual {actual[0]} rows (last {actual[1]})")
+            if not differences:
+                click.echo("Statistics match the cache.")
+            elif repair:
+                rebuild_cache_stats(conn)
+                click.echo(f"Rebuilt the statistics ({len(differences)} groups differed).")
+            else:
+                raise click.ClickException(f"{len(differences)} groups differ; rerun with --repair to rebuild.")
+            return
+        stats = read_cache_stats(conn)
+    finally:
+        conn.close()
+
+    click.echo(f"{stats['total']} rows, {stats['active']} active, {stats['best']} best; "
+               f"last updated {stats['last_updated']}")
+    for provider, count in sorted(stats['providers'].items()):
+        click.echo(f"  provider {provider}: {count}")
+    for model, count in sorted(stats['models'].items()):
+        click.echo(f"  model {model}: {count}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+"""
+    Adaptive chunk sizing for batched LLM enrichment.
+
+    A `ChunkSizer` learns, per model and language, what a chunk of N
+    characters costs:
+
+    - latency:   overhead + N * seconds per character (decayed least squares)
+    - tokens:    output tokens per character, which gives the largest chunk
+                 that fits in `max_output_tokens`
+    - failures:  the share of characters missing from responses at each
+                 chunk size (truncation, parse failures)
+
+    Missing characters are retried one by one, each paying the overhead
+    again, so the expected time per character of a chunk of N is
+
+        (overhead + N * per_char + missing(N) * N * (overhead + per_char)) / N
+
+    `next_chunk_size()` picks the N that minimizes it. Sizes not tried yet
+    are estimated from the token budget (0 missing if they fit, the overflow
+    share if not), so the sizer probes upwards until truncation shows up and
+    then settles. The learned parameters are kept in the `chunk_tuning` and
+    `chunk_size_stats` tables of the cache database between runs.
+
+Usages:
+    from zinets_chunking import ChunkSizer
+
+    sizer = ChunkSizer.load("gemini-2.0-flash", "English")
+    chunk = characters[:sizer.next_chunk_size()]
+    ... request the chunk, time it ...
+    sizer.record(len(chunk), len(recovered), latency, output_tokens, truncated)
+    sizer.save()
+
+    $ python zinets_chunking.py                 # show what was learned
+"""
+
+import os
+import threading
+from datetime import datetime
+
+import click
+
+
+MIN_CHUNK_SIZE = 1
+MAX_CHUNK_SIZE = 60
+DEFAULT_MAX_OUTPUT_TOKENS = 8192
+TOKEN_BUDGET_SHARE = 0.85     # leave headroom: output length varies per character
+
+# priors, used until there are measurements
+PRIOR_OVERHEAD = 2.0          # seconds per request
+PRIOR_PER_CHAR = 0.6          # seconds per character
+PRIOR_TOKENS_PER_CHAR = 160.0
+PRIOR_CHUNK_SIZE = 10
+
+DECAY = 0.9                   # weight of the past in the running estimates
+MIN_SIZE_SAMPLES = 2          # requests at a size before its own missing rate is trusted
+
+
+class ChunkSizer:
+    """
+    Throughput model of batched requests for one model and language.
+    `record` may be called from worker threads; `save` persists.
+    """
+
+    def __init__(self, model_name, language='English', max_output_tokens=DEFAULT_MAX_OUTPUT_TOKENS, db_path=None):
+        self.model_name = model_name
+        self.db_path = db_path
+        self.language = language
+        self.max_output_tokens = max_output_tokens
+        self.tokens_per_char = None
+        self.base_missing_rate = 0.0
+        # decayed sums for the latency fit t = overhead + n * per_char
+        self.sum_w = self.sum_n = self.sum_t = self.sum_nn = self.sum_nt = 0.0
+        self.samples = 0
+        self.size_stats = {}      # chunk_size -> {'requests', 'missing_rate', 'truncations'}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, model_name, language='English', db_path=None, max_output_tokens=DEFAULT_MAX_OUTPUT_TOKENS):
+        """
+        The sizer learned in earlier runs, or a fresh one.
+        """
+        from zinets_config import CACHE_DB
+        from zinets_db import get_pool, table_exists
+
+        sizer = cls(model_name, language, max_output_tokens, db_path or CACHE_DB)
+        if not os.path.exists(sizer.db_path):
+            return sizer
+        with get_pool(sizer.db_path).connection() as conn:
+            if not table_exists(conn, 'chunk_tuning'):
+                return sizer
+            row = conn.execute('''
+            SELECT tokens_per_char, base_missing_rate, sum_w, sum_n, sum_t, sum_nn, sum_nt, samples
+            FROM chunk_tuning WHERE llm_model_name = ? AND language = ?
+            ''', (model_name, language)).fetchone()
+            if row:
+                (sizer.tokens_per_char, sizer.base_missing_rate, sizer.sum_w, sizer.sum_n, sizer.sum_t,
+                 sizer.sum_nn, sizer.sum_nt, sizer.samples) = row
+            for chunk_size, requests, missing_rate, truncations in conn.execute('''
+            SELECT chunk_size, requests, missing_rate, truncations FROM chunk_size_stats
+            WHERE llm_model_name = ? AND language = ?
+            ''', (model_name, language)):
+                sizer.size_stats[chunk_size] = {'requests': requests, 'missing_rate': missing_rate,
+                                                'truncations': truncations}
+        return sizer
+
+    def save(self):
+        from zinets_config import CACHE_DB
+        from zinets_db import get_cache_pool
+
+        self.db_path = self.db_path or CACHE_DB
+        with self._lock:
+            tuning = (self.model_name, self.language, self.tokens_per_char, self.base_missing_rate,
+                      self.sum_w, self.sum_n, self.sum_t, self.sum_nn, self.sum_nt, self.samples,
+                      datetime.now().isoformat())
+            size_rows = [(self.model_name, self.language, chunk_size, stats['requests'], stats['missing_rate'],
+                          stats['truncations']) for chunk_size, stats in self.size_stats.items()]
+        with get_cache_pool(self.db_path).connection() as conn, conn:
+            conn.execute('INSERT OR REPLACE INTO chunk_tuning VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', tuning)
+            conn.executemany('INSERT OR REPLACE INTO chunk_size_stats VALUES (?, ?, ?, ?, ?, ?)', size_rows)
+
+    def record(self, chunk_size, recovered, latency, output_tokens=None, truncated=False):
+        """
+        Add the measurements of one request for `chunk_size` characters of
+        which `recovered` came back complete.
+        """
+        if chunk_size <= 0:
+            return
+        missing_rate = (chunk_size - recovered) / chunk_size
+        with self._lock:
+            self.samples += 1
+            self.sum_w = self.sum_w * DECAY + 1
+            self.sum_n = self.sum_n * DECAY + chunk_size
+            self.sum_t = self.sum_t * DECAY + latency
+            self.sum_nn = self.sum_nn * DECAY + chunk_size * chunk_size
+            self.sum_nt = self.sum_nt * DECAY + chunk_size * latency
+
+            if output_tokens and recovered and not truncated:
+                tokens_per_char = output_tokens / chunk_size
+                self.tokens_per_char = (tokens_per_char if self.tokens_per_char is None
+                                        else DECAY * self.tokens_per_char + (1 - DECAY) * tokens_per_char)
+            if not truncated:
+                # what goes missing even when the output fits
+                self.base_missing_rate = DECAY * self.base_missing_rate + (1 - DECAY) * missing_rate
+
+            stats = self.size_stats.setdefault(chunk_size, {'requests': 0, 'missing_rate': 0.0, 'truncations': 0})
+            stats['missing_rate'] = (missing_rate if not stats['requests']
+                                     else DECAY * stats['missing_rate'] + (1 - DECAY) * missing_rate)
+            stats['requests'] += 1
+            stats['truncations'] += bool(truncated)
+
+    def latency_model(self):
+        """
+        (overhead, seconds per character) from the decayed least-squares fit.
+        """
+        if not self.sum_w:
+            return PRIOR_OVERHEAD, PRIOR_PER_CHAR
+        mean_n, mean_t = self.sum_n / self.sum_w, self.sum_t / self.sum_w
+        var_n = self.sum_nn / self.sum_w - mean_n * mean_n
+        if var_n > 0.25:
+            per_char = (self.sum_nt / self.sum_w - mean_n * mean_t) / var_n
+            overhead = mean_t - per_char * mean_n
+            if per_char > 0 and overhead >= 0:
+                return overhead, per_char
+        # a single chunk size so far: split the mean latency with the prior overhead
+        overhead = min(PRIOR_OVERHEAD, mean_t / 2)
+        return overhead, max(mean_t - overhead, 0.0) / max(mean_n, 1.0)
+
+    def token_limit(self):
+        """
+        Largest chunk whose expected output fits in the token budget.
+        """
+        tokens_per_char = self.tokens_per_char or PRIOR_TOKENS_PER_CHAR
+        return max(MIN_CHUNK_SIZE, int(self.max_output_tokens * TOKEN_BUDGET_SHARE / tokens_per_char))
+
+    def expected_missing_rate(self, chunk_size):
+        stats = self.size_stats.get(chunk_size)
+        if stats and stats['requests'] >= MIN_SIZE_SAMPLES:
+            return stats['missing_rate']
+        tokens_per_char = self.tokens_per_char or PRIOR_TOKENS_PER_CHAR
+        budget = self.max_output_tokens * TOKEN_BUDGET_SHARE
+        overflow = max(0.0, 1 - budget / (chunk_size * tokens_per_char))
+        estimate = min(1.0, self.base_missing_rate + overflow)
+        if stats:
+            # one observation: average it with the estimate
+            estimate = (estimate + stats['missing_rate']) / 2
+        return estimate
+
+    def seconds_per_character(self, chunk_size):
+        """
+        Expected wall time per character for chunks of `chunk_size`,
+        including the individual retries of the missing ones.
+        """
+        overhead, per_char = self.latency_model()
+        missing_rate = self.expected_missing_rate(chunk_size)
+        total = overhead + chunk_size * per_char + missing_rate * chunk_size * (overhead + per_char)
+        return total / chunk_size
+
+    def next_chunk_size(self, remaining=None):
+        """
+        The throughput-optimal chunk size, capped at `remaining` characters.
+        """
+        with self._lock:
+            if not self.samples and not self.size_stats:
+                best = min(PRIOR_CHUNK_SIZE, self.token_limit())
+            else:
+                # one step past the token limit, so truncation is noticed if the limit is pessimistic
+                upper = min(MAX_CHUNK_SIZE, self.token_limit() + 1)
+                best = min(range(MIN_CHUNK_SIZE, upper + 1), key=self.seconds_per_character)
+        return max(MIN_CHUNK_SIZE, min(best, remaining)) if remaining else best
+
+    def describe(self):
+        overhead, per_char = self.latency_model()
+        return (f"{self.model_name} / {self.language}: chunk size {self.next_chunk_size()} "
+                f"(token limit {self.token_limit()}, {self.tokens_per_char or PRIOR_TOKENS_PER_CHAR:.0f} tokens/char, "
+                f"latency {overhead:.1f}s + {per_char:.2f}s/char, "
+                f"missing {self.base_missing_rate:.0%}, {self.samples} requests)")
+
+
+def response_usage(response):
+    """
+    (output tokens, truncated) of a google-generativeai response, when reported.
+    """
+    usage = getattr(response, 'usage_metadata', None)
+    output_tokens = getattr(usage, 'candidates_token_count', None) if usage else None
+    truncated = False
+    candidates = getattr(response, 'candidates', None) or []
+    if candidates:
+        finish_reason = getattr(candidates[0], 'finish_reason', None)
+        truncated = getattr(finish_reason, 'name', str(finish_reason)) == 'MAX_TOKENS'
+    return output_tokens, truncated
+
+
+@click.command()
+@click.option('--db', 'db_path', type=click.Path(exists=True, dir_okay=False), help='Cache database (default: zinets_cache.sqlite)')
+def main(db_path):
+    """
+    Show the chunk sizes learned per model and language.
+    """
+    from zinets_config import CACHE_DB
+    from zinets_db import get_pool, table_exists
+
+    db_path = db_path or CACHE_DB
+    if not os.path.exists(db_path):
+        click.echo("No cache database found.")
+        return
+    with get_pool(db_path).connection() as conn:
+        keys = []
+        if table_exists(conn, 'chunk_tuning'):
+            keys = conn.execute('SELECT llm_model_name, language FROM chunk_tuning ORDER BY 1, 2').fetchall()
+    if not keys:
+        click.echo("Nothing learned yet.")
+    for model_name, language in keys:
+        click.echo(ChunkSizer.load(model_name, language, db_path).describe())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+    Settings and Gemini model helpers shared by `zinets_vis.py` and the
+    zinets_* modules. The modules import them from here, not from the CLI
+    script: `python zinets_vis.py` runs as `__main__`, so importing
+    `zinets_vis` from a module it uses would load a second copy of the
+    script, with its own module state.
+
+Usages:
+    from zinets_config import CACHE_DB, DEFAULT_GEMINI_MODEL, init_gemini_model
+"""
+
+import os
+import sys
+from pathlib import Path
+
+import click
+
+from zinets_llm_response import RESPONSE_SCHEMA, ParseStats
+
+
+# Database configuration
+CACHE_DB = "zinets_cache.sqlite"
+# the cache schema and queries are shared with the backends in <repo>/src/zinets_db
+# (imported where used: it loads sqlite3)
+sys.path.insert(0, str(Path(__file__).resolve().parents[4] / 'src'))
+
+GEMINI_MODELS = [
+    "gemini-2.0-flash",
+    "gemini-2.5-flash",
+    'gemini-1.5-flash',
+    "gemini-2.5-pro",
+]
+DEFAULT_GEMINI_MODEL = "gemini-2.0-flash"
+
+# Generation config for better output
+GENERATION_CONFIG = {
+    "temperature": 0.2,
+    "top_p": 0.95,
+    "top_k": 40,
+    "max_output_tokens": 8192,
+}
+# Structured output: the response is JSON following RESPONSE_SCHEMA
+JSON_GENERATION_CONFIG = dict(GENERATION_CONFIG, response_mime_type="application/json",
+                              response_schema=RESPONSE_SCHEMA)
+
+# How often responses needed the text fallback or left characters missing
+PARSE_STATS = ParseStats()
+
+
+def list_gemini_models(quiet=False):
+    """
+    Names of the Gemini models supporting generateContent ([] on errors).
+    `quiet` prints nothing, e.g. when probing in the background while
+    another command writes to the terminal.
+    """
+    gemini_models = []
+    try:
+        import google.generativeai as genai
+
+        genai.configure(api_key=os.environ.get('GEMINI_API_KEY'))
+        if not quiet:
+            print("Attempting to list available Gemini models supporting generateContent:")
+
+        # Iterate through all available models
+        for model in genai.list_models():
+            # Check if the model supports the 'generateContent' method
+            if 'generateContent' in model.supported_generation_methods:
+                # print(f"- {model.name} (Display Name: {model.display_name})")
+                gemini_models.append(model.name)
+
+    except Exception as e:
+        if not quiet:
+            print(f"Error listing models: {e}")
+
+    return [i.split('/')[-1] for i in sorted(gemini_models)]
+
+
+def init_gemini_model(model_name=DEFAULT_GEMINI_MODEL, registry=None):
+    """
+    Create a Gemini model, trying `model_name` first and then the other
+    GEMINI_MODELS in the order of the cached model list and health (see
+    zinets_models.py); no network calls. A stale model list is re-probed in
+    the background. Expects `genai.configure()` to have been called.
+
+    Returns:
+        (model, model_name) of the first model that could be created
+    """
+    import google.generativeai as genai
+
+    from zinets_models import ModelRegistry
+
+    registry = registry or ModelRegistry.load('Google')
+    registry.refresh_in_background(lambda: list_gemini_models(quiet=True))
+    for name in registry.rank_models(model_name, GEMINI_MODELS):
+        try:
+            model = genai.GenerativeModel(name)
+            click.echo(f"Using Gemini model: {name}")
+            return model, name
+        except Exception as model_error:
+            click.echo(f"Could not use model {name}: {model_error}")
+    raise Exception("No Gemini models are available")
@@ -0,0 +1,393 @@
+"""
+    LLM providers for character enrichment.
+
+    Every provider turns a prompt into a result dict
+    ({'text', 'llm_provider', 'llm_model_name', 'output_tokens', 'truncated'}) and
+    limits its own concurrency with a semaphore, so a slow local server or a
+    rate-limited API is never sent more requests in flight than it can take,
+    whatever the number of workers.
+
+    - GeminiProvider:           google-generativeai (GEMINI_API_KEY)
+    - OpenAICompatibleProvider: any /v1/chat/completions endpoint (OPENAI_API_KEY)
+    - LocalProvider:            an OpenAI-compatible local server (Ollama, llama.cpp, vLLM)
+    - FakeProvider:             deterministic answers built from the prompt, for tests
+    - HedgedProvider:           sends a request to a backup provider when the
+                                primary has not answered after `hedge_after`
+                                seconds and takes the first good answer
+
+    `llm_provider` / `llm_model_name` of the result go into the cache rows
+    ('Google' for Gemini, as in the rows cached before providers existed).
+    With a `ModelRegistry` (zinets_models.py), the latency and errors of
+    every request update the model's health.
+
+Usages:
+    from zinets_llm_providers import make_provider, HedgedProvider
+
+    provider = make_provider("gemini:gemini-2.0-flash")
+    provider = make_provider("openai:gpt-4o-mini")
+    provider = make_provider("local:qwen2.5:7b@http://localhost:11434/v1")
+    provider = HedgedProvider(make_provider("gemini"), make_provider("local:qwen2.5:7b"), hedge_after=8)
+    result = provider.generate(prompt, json_mode=True)
+
+    $ python zinets_vis.py -i in_water.md --provider openai:gpt-4o-mini
+    $ python zinets_vis.py -i in_water.md --hedge-provider local:qwen2.5:7b --hedge-after 8
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+
+
+DEFAULT_HEDGE_AFTER = 10.0        # seconds
+DEFAULT_LOCAL_URL = "http://localhost:11434/v1"
+DEFAULT_OPENAI_URL = "https://api.openai.com/v1"
+DEFAULT_OPENAI_MODEL = "gpt-4o-mini"
+REQUEST_TIMEOUT = 120
+
+# requests in flight per provider instance
+PROVIDER_CONCURRENCY = {
+    'gemini': 4,
+    'openai': 8,
+    'local': 1,
+    'fake': 8,
+}
+
+
+# how rejections of structured output read (an unsupported parameter, not a failed request)
+JSON_MODE_ERROR = re.compile(r'response_(mime_type|schema|format)|json', re.IGNORECASE)
+
+
+class ProviderError(Exception):
+    pass
+
+
+class JsonModeUnsupported(ProviderError):
+    """
+    The model rejected the request for structured output (JSON mode or the
+    response schema); the same prompt in the text format may still work.
+    """
+
+
+class LLMProvider:
+    """
+    Base class: subclasses implement `_generate(prompt, json_mode)`.
+    """
+
+    name = 'llm'
+    llm_provider = 'LLM'
+    json_mode_supported = True        # False once the model rejected JSON mode
+
+    def __init__(self, model_name, max_concurrency=None, registry=None):
+        self.model_name = model_name
+        self.max_concurrency = max_concurrency or PROVIDER_CONCURRENCY.get(self.name, 4)
+        self.registry = registry
+        self._slots = threading.BoundedSemaphore(self.max_concurrency)
+
+    def __repr__(self):
+        return f"{self.name}:{self.model_name}"
+
+    def generate(self, prompt, json_mode=False, accept=None):
+        """
+        Run `prompt`, waiting for a free slot. With `json_mode`, ask for JSON
+        following RESPONSE_SCHEMA. Raises on provider errors. `accept` is
+        only used by providers that have alternatives to choose from.
+        """
+        with self._slots:
+            started = time.monotonic()
+            try:
+                result = self._generate(prompt, json_mode)
+            except JsonModeUnsupported:
+                # a request the model cannot take, not a sign of bad health
+                self.json_mode_supported = False
+                raise
+            except Exception as e:
+                if self.registry is not None:
+                    self.registry.record(self.model_name, time.monotonic() - started, ok=False, error=e)
+                raise
+            if self.registry is not None:
+                self.registry.record(self.model_name, time.monotonic() - started, ok=True)
+            return result
+
+    def save_health(self):
+        if self.registry is not None:
+            self.registry.save()
+
+    def _generate(self, prompt, json_mode):
+        raise NotImplementedError
+
+    def _result(self, text, output_tokens=None, truncated=False):
+        return {'text': text, 'llm_provider': self.llm_provider, 'llm_model_name': self.model_name,
+                'output_tokens': output_tokens, 'truncated': truncated}
+
+
+class GeminiProvider(LLMProvider):
+
+    name = 'gemini'
+    llm_provider = 'Google'
+
+    def __init__(self, model_name=None, model=None, max_concurrency=None, registry=None):
+        """
+        Wrap a `genai.GenerativeModel`, or create one for `model_name`
+        (configuring the API key from GEMINI_API_KEY). The model is picked
+        and its health tracked with the 'Google' `ModelRegistry`.
+        """
+        from zinets_models import ModelRegistry
+        from zinets_config import DEFAULT_GEMINI_MODEL, init_gemini_model
+
+        registry = registry or ModelRegistry.load(self.llm_provider)
+        if model is None:
+            import google.generativeai as genai
+
+            api_key = os.environ.get('GEMINI_API_KEY')
+            if not api_key:
+                raise ProviderError("GEMINI_API_KEY not found in environment variables.")
+            genai.configure(api_key=api_key)
+            model, model_name = init_gemini_model(model_name or DEFAULT_GEMINI_MODEL, registry)
+        super().__init__(model_name, max_concurrency, registry)
+        self.model = model
+
+    def _generate(self, prompt, json_mode):
+        from zinets_chunking import response_usage
+        from zinets_config import GENERATION_CONFIG, JSON_GENERATION_CONFIG
+
+        try:
+            response = self.model.generate_content(
+                prompt, generation_config=JSON_GENERATION_CONFIG if json_mode else GENERATION_CONFIG)
+        except Exception as e:
+            from google.api_core.exceptions import InvalidArgument
+
+            # a 400 from the API, or the SDK refusing the schema before sending
+            if json_mode and isinstance(e, (InvalidArgument, TypeError, ValueError)) and JSON_MODE_ERROR.search(str(e)):
+                raise JsonModeUnsupported(f"{self!r}: {e}") from e
+            raise
+        output_tokens, truncated = response_usage(response)
+        return self._result(response.text, output_tokens, truncated)
+
+
+class OpenAICompatibleProvider(LLMProvider):
+    """
+    Chat completions over HTTP. JSON mode asks for a {"characters": [...]}
+    object (OpenAI's JSON mode needs an object at the top level), which
+    `parse_character_response` accepts.
+    """
+
+    name = 'openai'
+    llm_provider = 'OpenAI'
+
+    def __init__(self, model_name=DEFAULT_OPENAI_MODEL, base_url=DEFAULT_OPENAI_URL, api_key=None,
+                 max_concurrency=None):
+        super().__init__(model_name, max_concurrency)
+        self.base_url = base_url.rstrip('/')
+        self.api_key = api_key if api_key is not None else os.environ.get('OPENAI_API_KEY')
+
+    def _generate(self, prompt, json_mode):
+        import urllib.error
+        import urllib.request
+
+        from zinets_config import GENERATION_CONFIG
+
+        payload = {
+            'model': self.model_name,
+            'messages': [{'role': 'user', 'content': prompt}],
+            'temperature': GENERATION_CONFIG['temperature'],
+            'top_p': GENERATION_CONFIG['top_p'],
+            'max_tokens': GENERATION_CONFIG['max_output_tokens'],
+        }
+        if json_mode:
+            payload['messages'][0]['content'] += '\nWrap the array in an object: {"characters": [...]}'
+            payload['response_format'] = {'type': 'json_object'}
+
+        headers = {'Content-Type': 'application/json'}
+        if self.api_key:
+            headers['Authorization'] = f"Bearer {self.api_key}"
+        request = urllib.request.Request(f"{self.base_url}/chat/completions",
+                                         data=json.dumps(payload).encode('utf-8'), headers=headers)
+        try:
+            with urllib.request.urlopen(request, timeout=REQUEST_TIMEOUT) as response:
+                body = json.load(response)
+        except urllib.error.HTTPError as e:
+            detail = e.read().decode('utf-8', 'replace')[:500]
+            if json_mode and e.code in (400, 422) and JSON_MODE_ERROR.search(detail):
+                raise JsonModeUnsupported(f"{self!r}: {e} {detail}") from e
+            raise ProviderError(f"{self!r}: {e} {detail}") from e
+        except OSError as e:
+            raise ProviderError(f"{self!r}: {e}") from e
+
+        try:
+            choice = body['choices'][0]
+            text = choice['message']['content'] or ''
+        except (KeyError, IndexError, TypeError) as e:
+            raise ProviderError(f"{self!r}: unexpected response {str(body)[:200]}") from e
+        output_tokens = (body.get('usage') or {}).get('completion_tokens')
+        return self._result(text, output_tokens, choice.get('finish_reason') == 'length')
+
+
+class LocalProvider(OpenAICompatibleProvider):
+
+    name = 'local'
+    llm_provider = 'Local'
+
+    def __init__(self, model_name, base_url=DEFAULT_LOCAL_URL, max_concurrency=None):
+        super().__init__(model_name, base_url, api_key='', max_concurrency=max_concurrency)
+
+
+class FakeProvider(LLMProvider):
+    """
+    Deterministic provider for tests and benchmarks: answers with an entry
+    for every quoted character of the prompt. `latency` (seconds) and
+    `drop` (characters left out of the answer) simulate a degraded provider,
+    `no_json` a model without structured output.
+    """
+
+    name = 'fake'
+    llm_provider = 'Fake'
+
+    def __init__(self, model_name='fake', latency=0.0, drop=(), fail=False, no_json=False, max_concurrency=None):
+        super().__init__(model_name, max_concurrency)
+        self.latency = latency
+        self.drop = set(drop)
+        self.fail = fail
+        self.no_json = no_json
+        self.calls = 0
+        self.json_calls = 0
+
+    def _generate(self, prompt, json_mode):
+        self.calls += 1
+        self.json_calls += json_mode
+        if self.latency:
+            time.sleep(self.latency)
+        if self.fail:
+            raise ProviderError(f"{self!r}: failing on purpose")
+        if json_mode and self.no_json:
+            raise JsonModeUnsupported(f"{self!r}: response_schema is not supported")
+
+        characters = [char for char in dict.fromkeys(re.findall(r"'(.)'", prompt)) if char not in self.drop]
+        entries = [dict(fake_entry(char), character=char) for char in characters]
+        if json_mode:
+            text = json.dumps(entries, ensure_ascii=False)
+        else:
+            text = '\n\n'.join(f"Character: {entry['character']}\npinyin: {entry['pinyin']}\n"
+                               f"meaning: {entry['meaning']}\ncomposition: {entry['composition']}\n"
+                               f"phrases: {entry['phrases']}" for entry in entries)
+        return self._result(text, output_tokens=len(text) // 3)
+
+
+def fake_entry(char):
+    digest = hashlib.md5(char.encode('utf-8')).hexdigest()[:6]
+    return {
+        'pinyin': f"fake-{digest}",
+        'meaning': f"meaning of {char}",
+        'composition': f"composition of {char}",
+        'phrases': f"{char}一 - phrase one<br>{char}二 - phrase two",
+    }
+
+
+class HedgedProvider(LLMProvider):
+    """
+    Send each request to `primary`; if it has not answered after
+    `hedge_after` seconds (or it failed), send it to `backup` too and take
+    the first good answer. `accept(result)` decides what is good (default:
+    any answer). The slower request is left to finish in the background.
+    JSON mode is only asked of a provider that has not rejected it.
+    """
+
+    name = 'hedged'
+    llm_provider = 'Hedged'
+
+    def __init__(self, primary, backup, hedge_after=DEFAULT_HEDGE_AFTER):
+        super().__init__(f"{primary!r}|{backup!r}", max_concurrency=primary.max_concurrency + backup.max_concurrency)
+        self.primary = primary
+        self.backup = backup
+        self.hedge_after = hedge_after
+        self.hedged = 0
+        self.backup_wins = 0
+        from concurrent.futures import ThreadPoolExecutor
+
+        # the concurrency limits are the wrapped providers' own
+        self._executor = ThreadPoolExecutor(max_workers=2 * self.max_concurrency)
+
+    @property
+    def json_mode_supported(self):
+        return self.primary.json_mode_supported or self.backup.json_mode_supported
+
+    def _submit(self, provider, prompt, json_mode):
+        return self._executor.submit(provider.generate, prompt, json_mode and provider.json_mode_supported)
+
+    def generate(self, prompt, json_mode=False, accept=None):
+        from concurrent.futures import FIRST_COMPLETED, wait
+
+        accept = accept or (lambda result: True)
+        pending = {self._submit(self.primary, prompt, json_mode): self.primary}
+        hedge_at = time.monotonic() + self.hedge_after
+        hedged = False
+        errors = []
+        unsupported = 0
+        while pending or not hedged:
+            # hedge when the primary is slow, or right away when it failed
+            if not hedged and (not pending or time.monotonic() >= hedge_at):
+                hedged = True
+                self.hedged += 1
+                pending[self._submit(self.backup, prompt, json_mode)] = self.backup
+            timeout = None if hedged else max(0.0, hedge_at - time.monotonic())
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                provider = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    errors.append(f"{provider!r}: {e}")
+                    unsupported += isinstance(e, JsonModeUnsupported)
+                    continue
+                if accept(result):
+                    self.backup_wins += provider is self.backup
+                    return result
+                errors.append(f"{provider!r}: answer not accepted")
+        if unsupported == len(errors):
+            # neither could take JSON mode: the text format may still work
+            raise JsonModeUnsupported("; ".join(errors))
+        raise ProviderError("; ".join(errors))
+
+    def save_health(self):
+        self.primary.save_health()
+        self.backup.save_health()
+
+
+def make_provider(spec, max_concurrency=None):
+    """
+    Provider from a spec "<kind>[:<model>][@<base url>]", kind being gemini,
+    openai, local or fake, e.g. "openai:gpt-4o-mini", "local:qwen2.5:7b".
+    """
+    kind, _, rest = spec.partition(':')
+    model_name, _, base_url = rest.partition('@')
+    kind = kind.strip().lower()
+    if kind == 'gemini':
+        return GeminiProvider(model_name or None, max_concurrency=max_concurrency)
+    if kind == 'openai':
+        return OpenAICompatibleProvider(model_name or DEFAULT_OPENAI_MODEL, base_url or DEFAULT_OPENAI_URL,
+                                        max_concurrency=max_concurrency)
+    if kind == 'local':
+        if not model_name:
+            raise ProviderError("A local provider needs a model name, e.g. local:qwen2.5:7b")
+        return LocalProvider(model_name, base_url or DEFAULT_LOCAL_URL, max_concurrency=max_concurrency)
+    if kind == 'fake':
+        return FakeProvider(model_name or 'fake', max_concurrency=max_concurrency)
+    raise ProviderError(f"Unknown LLM provider '{kind}' (gemini, openai, local, fake)")
+
+
+def build_provider(spec=None, hedge_spec=None, hedge_after=DEFAULT_HEDGE_AFTER, default_model=None):
+    """
+    Provider for the CLI options: `spec` (default Gemini with `default_model`),
+    hedged with `hedge_spec` if given. None if neither is given.
+    """
+    if not spec and not hedge_spec:
+        return None
+    spec = spec or 'gemini'
+    if spec.strip().lower() == 'gemini' and default_model:
+        spec = f"gemini:{default_model}"
+    provider = make_provider(spec)
+    if hedge_spec:
+        provider = HedgedProvider(provider, make_provider(hedge_spec), hedge_after)
+    return provider
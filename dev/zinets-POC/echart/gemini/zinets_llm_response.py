@@ -0,0 +1,272 @@
+"""
+    Parse batched LLM responses with character data.
+
+    A response for a chunk of characters is parsed in two stages:
+
+    1. JSON (structured output): the request asks for `RESPONSE_SCHEMA`, an
+       array of {character, pinyin, meaning, composition, phrases} objects.
+       Code fences, a dict keyed by character, and truncated output (complete
+       objects before the cut are kept) are accepted.
+    2. A tolerant grammar for the "Character: / pinyin: / ..." text format:
+       markdown decoration, bullets, full-width colons, field aliases, fields
+       in any order, and entries the model merged without a "Character:"
+       line are handled.
+
+    Recovery is per character: every complete entry is kept and only the
+    characters that are really missing are reported back for a retry.
+    `ParseStats` counts how often each stage was needed (the fallback rate).
+
+Usages:
+    from zinets_llm_response import ParseStats, parse_character_response
+
+    stats = ParseStats()
+    character_data, missing = parse_character_response(response_text, ['水', '冰'], stats)
+    print(stats.summary())
+"""
+
+import json
+import re
+
+
+FIELDS = ('pinyin', 'meaning', 'composition', 'phrases')
+
+# OpenAPI-style schema for structured output (google-generativeai `response_schema`)
+RESPONSE_SCHEMA = {
+    'type': 'array',
+    'items': {
+        'type': 'object',
+        'properties': {
+            'character': {'type': 'string'},
+            'pinyin': {'type': 'string'},
+            'meaning': {'type': 'string'},
+            'composition': {'type': 'string'},
+            'phrases': {'type': 'array', 'items': {'type': 'string'}},
+        },
+        'required': ['character', *FIELDS],
+    },
+}
+
+FIELD_ALIASES = {
+    'character': 'character',
+    'char': 'character',
+    'zi': 'character',
+    '字': 'character',
+    'pinyin': 'pinyin',
+    'pronunciation': 'pinyin',
+    'reading': 'pinyin',
+    'meaning': 'meaning',
+    'meanings': 'meaning',
+    'definition': 'meaning',
+    'definitions': 'meaning',
+    'composition': 'composition',
+    'structure': 'composition',
+    'decomposition': 'composition',
+    'phrases': 'phrases',
+    'phrase': 'phrases',
+    'common phrases': 'phrases',
+    'examples': 'phrases',
+    'example phrases': 'phrases',
+}
+
+PHRASE_SEPARATOR = '<br>'
+
+_FIELD_LINE = re.compile(r'^(?P<key>[A-Za-z][A-Za-z ]{0,20}?|字)(?:\s*\d+)?\s*[:：]\s*(?P<value>.*)$')
+_DECORATION = re.compile(r'^(?:#{1,6}\s*|>\s*|[-*•]\s+|\d+[.)]\s+)+')
+_CODE_FENCE = re.compile(r'^```[a-zA-Z]*\s*$', re.MULTILINE)
+
+
+def is_cjk(char):
+    code = ord(char)
+    return (0x4E00 <= code <= 0x9FFF or 0x3400 <= code <= 0x4DBF or 0x2E80 <= code <= 0x2FDF
+            or 0x20000 <= code <= 0x2EBEF or 0xF900 <= code <= 0xFAFF)
+
+
+def _pick_character(value, expected):
+    """
+    The character an entry is about: the first expected character in `value`,
+    else its first CJK character.
+    """
+    for char in value:
+        if char in expected:
+            return char
+    return next((char for char in value if is_cjk(char)), None)
+
+
+def _normalize_entry(raw):
+    """
+    Map an entry's keys onto FIELDS; list-valued phrases are joined with <br>.
+    """
+    entry = {}
+    for key, value in raw.items():
+        field = FIELD_ALIASES.get(str(key).strip().lower())
+        if field is None or value is None:
+            continue
+        if isinstance(value, (list, tuple)):
+            value = PHRASE_SEPARATOR.join(str(item).strip() for item in value)
+        entry[field] = str(value).strip()
+    return entry
+
+
+def _is_complete(entry):
+    return all(entry.get(field) for field in FIELDS)
+
+
+def _json_candidates(text):
+    """
+    JSON values in `text`: the whole text, else every top-level object that
+    decodes on its own (recovers the complete entries of truncated output).
+    """
+    text = _CODE_FENCE.sub('', text).strip()
+    try:
+        yield json.loads(text)
+        return
+    except ValueError:
+        pass
+
+    decoder = json.JSONDecoder()
+    pos = text.find('{')
+    while pos != -1:
+        try:
+            value, end = decoder.raw_decode(text, pos)
+        except ValueError:
+            pos = text.find('{', pos + 1)
+            continue
+        yield value
+        pos = text.find('{', end)
+
+
+def parse_json_response(text, expected):
+    """
+    Parse structured output. Returns {character: entry} for complete entries,
+    or None if the text holds no JSON at all.
+    """
+    expected = set(expected)
+    entries = None
+    for value in _json_candidates(text):
+        entries = entries if entries is not None else {}
+        if isinstance(value, dict) and isinstance(value.get('characters'), list):
+            value = value['characters']
+        if isinstance(value, dict) and 'character' not in value and all(isinstance(v, dict) for v in value.values()):
+            # {"水": {"pinyin": ...}, ...}
+            value = [dict(entry, character=char) for char, entry in value.items()]
+        for raw in value if isinstance(value, list) else [value]:
+            if not isinstance(raw, dict):
+                continue
+            entry = _normalize_entry(raw)
+            char = _pick_character(entry.pop('character', ''), expected)
+            if char and char not in entries and _is_complete(entry):
+                entries[char] = entry
+    return entries
+
+
+def parse_text_response(text, expected):
+    """
+    Parse the "Character: / field: value" text format tolerantly.
+    Returns {character: entry} for complete entries.
+    """
+    expected_order, expected = list(expected), set(expected)
+    blocks = []          # [character or None, {field: value}]
+    current = None
+    current_field = None
+
+    for line in text.split('\n'):
+        line = _DECORATION.sub('', line.strip().replace('**', '').replace('__', '')).strip()
+        if not line:
+            continue
+
+        match = _FIELD_LINE.match(line)
+        field = FIELD_ALIASES.get(match.group('key').strip().lower()) if match else None
+        if field == 'character':
+            current = [_pick_character(match.group('value'), expected), {}]
+            blocks.append(current)
+            current_field = None
+        elif field:
+            if current is None or field in current[1]:
+                # a repeated field without a "Character:" line: the model merged two entries
+                current = [None, {}]
+                blocks.append(current)
+            current[1][field] = match.group('value').strip()
+            current_field = field
+        elif match:
+            # an unknown "key: value" line (a note, a heading); not part of a field
+            continue
+        elif len(line) == 1 and line in expected:
+            # a bare heading line holding just the character
+            current = [line, {}]
+            blocks.append(current)
+            current_field = None
+        elif current is not None and current_field:
+            current[1][current_field] += ' ' + line
+
+    # entries without a character line are matched to the remaining characters
+    # by position, but only when that is unambiguous
+    # (a single missing character, or no character lines at all)
+    named = {char for char, _ in blocks if char}
+    unnamed = [block for block in blocks if not block[0] and _is_complete(block[1])]
+    remaining = [char for char in expected_order if char not in named]
+    if unnamed and len(unnamed) == len(remaining) and (len(remaining) == 1 or not named):
+        for block, char in zip(unnamed, remaining):
+            block[0] = char
+
+    entries = {}
+    for char, entry in blocks:
+        if char and char not in entries and _is_complete(entry):
+            entries[char] = entry
+    return entries
+
+
+class ParseStats:
+    """
+    Counters for response parsing; the fallback rates are the share of
+    responses that needed the text grammar and of characters left missing.
+    """
+
+    def __init__(self):
+        self.responses = 0
+        self.json_parsed = 0
+        self.text_parsed = 0
+        self.unparsed = 0
+        self.characters_expected = 0
+        self.characters_recovered = 0
+        self.characters_missing = 0
+
+    @property
+    def text_fallback_rate(self):
+        return self.text_parsed / self.responses if self.responses else 0.0
+
+    @property
+    def missing_rate(self):
+        return self.characters_missing / self.characters_expected if self.characters_expected else 0.0
+
+    def summary(self):
+        return (f"{self.responses} responses: {self.json_parsed} JSON, {self.text_parsed} text fallback "
+                f"({self.text_fallback_rate:.0%}), {self.unparsed} unparsed; "
+                f"{self.characters_recovered}/{self.characters_expected} characters recovered, "
+                f"{self.characters_missing} missing ({self.missing_rate:.0%})")
+
+
+def parse_character_response(text, expected, stats=None):
+    """
+    Parse a response for the characters `expected`, JSON first, then the text grammar.
+
+    Returns:
+        (character_data, missing): complete entries for expected characters,
+        and the expected characters without one, in request order
+    """
+    expected = list(expected)
+    entries = parse_json_response(text, expected)
+    stage = 'json_parsed'
+    if not entries:
+        entries = parse_text_response(text, expected)
+        stage = 'text_parsed' if entries else 'unparsed'
+
+    character_data = {char: entries[char] for char in expected if char in entries}
+    missing = [char for char in expected if char not in entries]
+
+    if stats is not None:
+        stats.responses += 1
+        setattr(stats, stage, getattr(stats, stage) + 1)
+        stats.characters_expected += len(expected)
+        stats.characters_recovered += len(character_data)
+        stats.characters_missing += len(missing)
+    return character_data, missing
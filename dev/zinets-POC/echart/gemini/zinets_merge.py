@@ -0,0 +1,321 @@
+"""
+    Merge and diff ZiNets markdown networks.
+
+    Authors keep several overlapping networks (in_water.md, in_wood.md, ...).
+    `merge_networks` folds any number of them into one DAG keyed by character,
+    so a character shared by several networks is a single node (enriched once).
+    `diff_networks` compares two versions of one network and `changed_subtrees`
+    reduces the diff to the subtrees of the new version that need enrichment
+    and re-rendering; `zinets_merge.py delta` writes those as a network file
+    that `zinets_vis.py -i` can process on its own.
+
+Usages:
+    $ python zinets_merge.py merge in_water.md in_wood.md in_sun.md -o merged.json
+    $ python zinets_merge.py merge in_*.md --root 日 -o in_sun_merged.md
+    $ python zinets_merge.py diff old/in_water.md in_water.md
+    $ python zinets_merge.py delta old/in_water.md in_water.md -o in_water_delta.md
+    $ python zinets_vis.py -i in_water_delta.md       # enrich just the delta
+
+    from zinets_merge import merge_networks, diff_networks, changed_subtrees, delta_network
+"""
+
+import json
+import os
+
+import click
+
+from zinets_parse import parse_markdown_lines
+
+
+def read_network(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return parse_markdown_lines(f)
+
+
+def merge_networks(networks):
+    """
+    Merge parsed networks into one DAG with nodes deduplicated by name.
+
+    Args:
+        networks: Iterable of (network name, tree_data) pairs
+
+    Returns:
+        Dict with
+            'roots':     root names, in input order (deduplicated)
+            'nodes':     {name: {'decomposition': str or None, 'networks': [network names]}}
+            'children':  {name: [child names]} in first-seen order, deduplicated
+            'conflicts': {name: [decompositions]} for names given different decompositions
+    """
+    roots, nodes, children, conflicts = [], {}, {}, {}
+    seen_edges = set()
+
+    for network, tree_data in networks:
+        if tree_data['name'] not in nodes:
+            roots.append(tree_data['name'])
+        stack = [(tree_data, None)]
+        while stack:
+            node, parent = stack.pop()
+            name = node['name']
+            decomposition = node.get('decomposition')
+
+            entry = nodes.get(name)
+            if entry is None:
+                entry = nodes[name] = {'decomposition': decomposition, 'networks': [network]}
+                children[name] = []
+            else:
+                if entry['networks'][-1] != network:
+                    entry['networks'].append(network)
+                if decomposition and decomposition != entry['decomposition']:
+                    if entry['decomposition'] is None:
+                        entry['decomposition'] = decomposition
+                    else:
+                        known = conflicts.setdefault(name, [entry['decomposition']])
+                        if decomposition not in known:
+                            known.append(decomposition)
+
+            if parent is not None and (parent, name) not in seen_edges:
+                seen_edges.add((parent, name))
+                children[parent].append(name)
+            stack.extend((child, name) for child in reversed(node['children']))
+
+    # a root that is also some other network's child isn't a root of the DAG
+    child_names = {name for _, name in seen_edges}
+    roots = [name for name in roots if name not in child_names] or roots[:1]
+    return {'roots': roots, 'nodes': nodes, 'children': children, 'conflicts': conflicts}
+
+
+def dag_to_tree(dag, root=None):
+    """
+    Expand the merged DAG from `root` (default: the first root) into the
+    nested-dict tree format used by `generate_html`. Each name is expanded
+    once; later occurrences are leaves, which also breaks cycles.
+    """
+    root = root if root is not None else dag['roots'][0]
+    nodes, children = dag['nodes'], dag['children']
+
+    def make_node(name):
+        node = {'name': name, 'children': []}
+        if nodes[name]['decomposition']:
+            node['decomposition'] = nodes[name]['decomposition']
+        return node
+
+    tree_data = make_node(root)
+    expanded = {root}
+    stack = [tree_data]
+    while stack:
+        node = stack.pop()
+        for child_name in children[node['name']]:
+            child = make_node(child_name)
+            node['children'].append(child)
+            if child_name not in expanded:
+                expanded.add(child_name)
+                stack.append(child)
+    return tree_data
+
+
+def _keyed_children(node):
+    """
+    Children keyed by (name, occurrence) so repeated siblings pair up in order.
+    """
+    keyed, counts = {}, {}
+    for child in node['children']:
+        occurrence = counts[child['name']] = counts.get(child['name'], -1) + 1
+        keyed[(child['name'], occurrence)] = child
+    return keyed
+
+
+def diff_networks(old_tree, new_tree):
+    """
+    Structural diff of two versions of a network. Nodes are matched by their
+    path of names from the root (repeated sibling names pair up in order).
+
+    Returns:
+        Dict of lists, in document order:
+            'added':   name paths of subtrees only in the new version
+            'removed': name paths of subtrees only in the old version
+            'changed': {'path', 'old', 'new'} for nodes whose decomposition changed
+    """
+    diff = {'added': [], 'removed': [], 'changed': []}
+    if old_tree['name'] != new_tree['name']:
+        diff['removed'].append([old_tree['name']])
+        diff['added'].append([new_tree['name']])
+        return diff
+
+    stack = [(old_tree, new_tree, [new_tree['name']])]
+    while stack:
+        old_node, new_node, path = stack.pop()
+        if old_node is None:
+            diff['added'].append(path)
+            continue
+        if new_node is None:
+            diff['removed'].append(path)
+            continue
+        if old_node.get('decomposition') != new_node.get('decomposition'):
+            diff['changed'].append({'path': path,
+                                    'old': old_node.get('decomposition'),
+                                    'new': new_node.get('decomposition')})
+        stack.extend(reversed(_paired_children(old_node, new_node, path)))
+    return diff
+
+
+def changed_subtrees(old_tree, new_tree):
+    """
+    Subtrees of `new_tree` that were added or whose root changed, in document
+    order, as (ancestors, subtree) pairs where `ancestors` are the new-tree
+    nodes from the root down to the subtree's parent. Changes nested inside
+    such a subtree are covered by it. Removed nodes need neither enrichment
+    nor output of their own, so they are not included.
+    """
+    if old_tree['name'] != new_tree['name']:
+        return [([], new_tree)]
+
+    subtrees = []
+    stack = [(old_tree, new_tree, [])]
+    while stack:
+        old_node, new_node, ancestors = stack.pop()
+        if new_node is None:
+            continue
+        if old_node is None or old_node.get('decomposition') != new_node.get('decomposition'):
+            subtrees.append((ancestors, new_node))
+            continue
+        path = ancestors + [new_node]
+        stack.extend((old_child, new_child, path)
+                     for old_child, new_child, _ in reversed(_paired_children(old_node, new_node, [])))
+    return subtrees
+
+
+def delta_network(subtrees):
+    """
+    Prune a network down to the (ancestors, subtree) pairs of `changed_subtrees`:
+    the changed subtrees in place, with their ancestors (without their other
+    children) leading to them. Returns None when there is no change.
+    """
+    copies, delta_tree = {}, None
+    for ancestors, subtree in subtrees:
+        if not ancestors:
+            return subtree
+        parent_copy = None
+        for node in ancestors:
+            node_copy = copies.get(id(node))
+            if node_copy is None:
+                node_copy = copies[id(node)] = dict(node, children=[])
+                if parent_copy is None:
+                    delta_tree = node_copy
+                else:
+                    parent_copy['children'].append(node_copy)
+            parent_copy = node_copy
+        parent_copy['children'].append(subtree)
+    return delta_tree
+
+
+def _paired_children(old_node, new_node, path):
+    """
+    (old child, new child, path) for the children of two matched nodes, with
+    None on the side a child is missing from: new order first, then removals.
+    """
+    old_children = _keyed_children(old_node)
+    pairs = [(old_children.pop(key, None), new_child, path + [key[0]])
+             for key, new_child in _keyed_children(new_node).items()]
+    pairs.extend((old_child, None, path + [key[0]]) for key, old_child in old_children.items())
+    return pairs
+
+
+def subtree_characters(subtrees):
+    """
+    Unique single characters in `changed_subtrees` output, e.g. to enrich just a delta.
+    """
+    characters = set()
+    stack = [subtree for _, subtree in subtrees]
+    while stack:
+        node = stack.pop()
+        if len(node['name']) == 1:
+            characters.add(node['name'])
+        stack.extend(node['children'])
+    return characters
+
+
+def tree_to_markdown(tree_data, indent='    '):
+    """
+    Serialize a tree to the `in_*.md` network format (iteratively, so deep trees work).
+    """
+    lines = [tree_data['name']]
+    stack = [(child, 1) for child in reversed(tree_data['children'])]
+    while stack:
+        node, level = stack.pop()
+        decomposition = f"({node['decomposition']})" if node.get('decomposition') else ''
+        lines.append(f"{indent * level}- {node['name']}{decomposition}")
+        stack.extend((child, level + 1) for child in reversed(node['children']))
+    return '\n'.join(lines) + '\n'
+
+
+@click.group()
+def cli():
+    """Merge and diff ZiNets markdown networks."""
+
+
+@cli.command()
+@click.argument('input_files', nargs=-1, required=True, type=click.Path(exists=True, dir_okay=False))
+@click.option('-o', '--output', 'output_file', type=click.Path(dir_okay=False),
+              help='Write the DAG as .json, or the tree under --root as a network .md')
+@click.option('--root', help='Root character for .md output (default: first root)')
+def merge(input_files, output_file, root):
+    """Merge networks into one DAG with shared characters deduplicated."""
+    dag = merge_networks((os.path.basename(path), read_network(path)) for path in input_files)
+    n_edges = sum(len(names) for names in dag['children'].values())
+    click.echo(f"Merged {len(input_files)} networks: {len(dag['nodes'])} nodes, {n_edges} edges, "
+               f"roots: {' '.join(dag['roots'])}")
+    for name, decompositions in dag['conflicts'].items():
+        click.echo(click.style(f"  {name}: conflicting decompositions {decompositions}", fg='yellow'))
+
+    if output_file and output_file.endswith('.md'):
+        with open(output_file, 'w', encoding='utf-8') as f:
+            f.write(tree_to_markdown(dag_to_tree(dag, root)))
+    elif output_file:
+        with open(output_file, 'w', encoding='utf-8') as f:
+            json.dump(dag, f, ensure_ascii=False, indent=2)
+    if output_file:
+        click.echo(f"Saved to: {output_file}")
+
+
+@cli.command()
+@click.argument('old_file', type=click.Path(exists=True, dir_okay=False))
+@click.argument('new_file', type=click.Path(exists=True, dir_okay=False))
+@click.option('--json', 'as_json', is_flag=True, help='Print the diff as JSON')
+def diff(old_file, new_file, as_json):
+    """Show the structural diff between two versions of a network."""
+    result = diff_networks(read_network(old_file), read_network(new_file))
+    if as_json:
+        click.echo(json.dumps(result, ensure_ascii=False, indent=2))
+        return
+    for path in result['added']:
+        click.echo(click.style(f"+ {' / '.join(path)}", fg='green'))
+    for path in result['removed']:
+        click.echo(click.style(f"- {' / '.join(path)}", fg='red'))
+    for change in result['changed']:
+        click.echo(click.style(f"~ {' / '.join(change['path'])}: {change['old']} -> {change['new']}", fg='yellow'))
+    if not any(result.values()):
+        click.echo("No changes.")
+
+
+@cli.command()
+@click.argument('old_file', type=click.Path(exists=True, dir_okay=False))
+@click.argument('new_file', type=click.Path(exists=True, dir_okay=False))
+@click.option('-o', '--output', 'output_file', type=click.Path(dir_okay=False),
+              help='Network file for the changed subtrees (default: <new>_delta.md)')
+def delta(old_file, new_file, output_file):
+    """Write only the changed subtrees of NEW_FILE as a network file."""
+    old_tree, new_tree = read_network(old_file), read_network(new_file)
+    subtrees = changed_subtrees(old_tree, new_tree)
+    if not subtrees:
+        click.echo("No changes.")
+        return
+
+    output_file = output_file or os.path.splitext(new_file)[0] + '_delta.md'
+    with open(output_file, 'w', encoding='utf-8') as f:
+        f.write(tree_to_markdown(delta_network(subtrees)))
+    click.echo(f"{len(subtrees)} changed subtrees, {len(subtree_characters(subtrees))} characters; "
+               f"saved to: {output_file}")
+
+
+if __name__ == "__main__":
+    cli()
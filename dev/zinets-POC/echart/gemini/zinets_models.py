@@ -0,0 +1,205 @@
+"""
+    Model discovery and health, cached across runs.
+
+    Picking a model used to list the provider's models over the network on
+    every run. `ModelRegistry` keeps, per provider (the `llm_provider` of
+    the cache rows, e.g. 'Google'):
+
+    - the models the provider listed at the last probe (`llm_model_list`),
+      re-probed in a background thread once older than `MODEL_LIST_TTL`;
+    - a health record per model (`llm_model_health`): decayed latency and
+      error rate, updated from every request.
+
+    `rank_models` orders candidate models from that local state only: the
+    preferred model first while it is healthy, then the others by score
+    (error rate and latency). A model that keeps failing is skipped until
+    `RETRY_UNHEALTHY_AFTER` has passed, then gets another chance.
+
+Usages:
+    from zinets_models import ModelRegistry
+
+    registry = ModelRegistry.load("Google")
+    for model_name in registry.rank_models("gemini-2.0-flash", GEMINI_MODELS):
+        ...
+    registry.record("gemini-2.0-flash", latency=3.2, ok=True)
+    registry.save()
+
+    $ python zinets_models.py                  # cached models and health
+    $ python zinets_models.py --refresh        # probe the model list now
+"""
+
+import os
+import threading
+import time
+from datetime import datetime
+
+import click
+
+
+MODEL_LIST_TTL = 24 * 3600          # seconds before the model list is probed again
+HEALTH_DECAY = 0.8                  # weight of the past in the latency / error averages
+LATENCY_SCALE = 20.0                # seconds of latency that halve a model's score
+UNHEALTHY_ERROR_RATE = 0.5
+RETRY_UNHEALTHY_AFTER = 30 * 60     # seconds before an unhealthy model is tried again
+
+
+class ModelRegistry:
+    """
+    Cached model list and per-model health of one provider.
+    `record` may be called from worker threads; `save` persists.
+    """
+
+    def __init__(self, llm_provider, db_path=None):
+        self.llm_provider = llm_provider
+        self.db_path = db_path
+        self.models = None          # listed at the last probe; None: never probed (or nothing listed)
+        self.probed_at = None
+        self.health = {}            # model -> {'latency', 'error_rate', 'requests', 'errors', 'last_error', 'updated'}
+        self._lock = threading.Lock()
+        self._refresh_thread = None
+
+    @classmethod
+    def load(cls, llm_provider, db_path=None):
+        from zinets_config import CACHE_DB
+        from zinets_db import get_pool, table_exists
+
+        registry = cls(llm_provider, db_path or CACHE_DB)
+        if not os.path.exists(registry.db_path):
+            return registry
+        with get_pool(registry.db_path).connection() as conn:
+            if not table_exists(conn, 'llm_model_probe'):
+                return registry
+            row = conn.execute('SELECT probed_at FROM llm_model_probe WHERE llm_provider = ?',
+                               (llm_provider,)).fetchone()
+            if row:
+                registry.probed_at = row[0]
+                models = [name for (name,) in conn.execute(
+                    'SELECT llm_model_name FROM llm_model_list WHERE llm_provider = ?', (llm_provider,))]
+                registry.models = set(models) or None
+            for name, latency, error_rate, requests, errors, last_error, updated in conn.execute('''
+            SELECT llm_model_name, latency, error_rate, requests, errors, last_error, updated
+            FROM llm_model_health WHERE llm_provider = ?
+            ''', (llm_provider,)):
+                registry.health[name] = {'latency': latency, 'error_rate': error_rate, 'requests': requests,
+                                         'errors': errors, 'last_error': last_error, 'updated': updated}
+        return registry
+
+    def is_stale(self, ttl=MODEL_LIST_TTL):
+        return self.probed_at is None or time.time() - self.probed_at > ttl
+
+    def refresh(self, list_models):
+        """
+        Probe the model list now with `list_models()` and store it. An empty
+        answer (e.g. no network) is stored too, so the next probe waits for the TTL.
+        """
+        import zinets_config  # noqa: F401 (puts zinets_db on sys.path)
+        from zinets_db import get_cache_pool
+
+        models = list_models()
+        probed_at = time.time()
+        with get_cache_pool(self.db_path).connection() as conn, conn:
+            conn.execute('INSERT OR REPLACE INTO llm_model_probe VALUES (?, ?, ?)',
+                         (self.llm_provider, probed_at, len(models)))
+            conn.execute('DELETE FROM llm_model_list WHERE llm_provider = ?', (self.llm_provider,))
+            conn.executemany('INSERT OR IGNORE INTO llm_model_list VALUES (?, ?)',
+                             [(self.llm_provider, name) for name in models])
+        with self._lock:
+            self.models, self.probed_at = set(models) or None, probed_at
+        return models
+
+    def refresh_in_background(self, list_models, ttl=MODEL_LIST_TTL):
+        """
+        Re-probe a stale model list without blocking the caller; this run
+        ranks with what is cached, the next one sees the new list.
+        """
+        if not self.is_stale(ttl) or self._refresh_thread is not None:
+            return
+        self._refresh_thread = threading.Thread(target=self.refresh, args=(list_models,), daemon=True)
+        self._refresh_thread.start()
+
+    def record(self, model_name, latency, ok, error=None):
+        with self._lock:
+            health = self.health.setdefault(model_name, {'latency': latency, 'error_rate': 0.0, 'requests': 0,
+                                                         'errors': 0, 'last_error': None, 'updated': None})
+            health['latency'] = HEALTH_DECAY * health['latency'] + (1 - HEALTH_DECAY) * latency
+            health['error_rate'] = HEALTH_DECAY * health['error_rate'] + (1 - HEALTH_DECAY) * (0.0 if ok else 1.0)
+            health['requests'] += 1
+            if not ok:
+                health['errors'] += 1
+                health['last_error'] = str(error)[:500] if error else None
+            health['updated'] = time.time()
+
+    def is_healthy(self, model_name):
+        health = self.health.get(model_name)
+        if health is None or health['error_rate'] < UNHEALTHY_ERROR_RATE:
+            return True
+        return time.time() - (health['updated'] or 0) > RETRY_UNHEALTHY_AFTER
+
+    def score(self, model_name):
+        """
+        Higher is better: success rate discounted by latency; 1.0 for models without history.
+        """
+        health = self.health.get(model_name)
+        if health is None:
+            return 1.0
+        return (1 - health['error_rate']) / (1 + health['latency'] / LATENCY_SCALE)
+
+    def rank_models(self, preferred, candidates):
+        """
+        `preferred` and `candidates` in the order to try them, without network
+        calls: models the last probe didn't list are dropped, the preferred
+        model leads while healthy, the rest follow by health and score.
+        """
+        names = list(dict.fromkeys([preferred, *candidates]))
+        if self.models:
+            names = [name for name in names if name in self.models] or names
+        return sorted(names, key=lambda name: (not self.is_healthy(name), name != preferred, -self.score(name)))
+
+    def save(self):
+        import zinets_config  # noqa: F401 (puts zinets_db on sys.path)
+        from zinets_db import get_cache_pool
+
+        with self._lock:
+            rows = [(self.llm_provider, name, health['latency'], health['error_rate'], health['requests'],
+                     health['errors'], health['last_error'], health['updated'])
+                    for name, health in self.health.items()]
+        if not rows:
+            return
+        with get_cache_pool(self.db_path).connection() as conn, conn:
+            conn.executemany('INSERT OR REPLACE INTO llm_model_health VALUES (?, ?, ?, ?, ?, ?, ?, ?)', rows)
+
+
+@click.command()
+@click.option('--provider', 'llm_provider', default='Google', help='llm_provider of the cache rows (default: Google)')
+@click.option('--refresh', is_flag=True, help='Probe the model list now (Google only)')
+def main(llm_provider, refresh):
+    """
+    Show the cached model list and model health.
+    """
+    from zinets_config import GEMINI_MODELS, list_gemini_models
+
+    registry = ModelRegistry.load(llm_provider)
+    if refresh:
+        if llm_provider != 'Google':
+            raise click.UsageError("Only the Google model list can be probed.")
+        click.echo(f"{len(registry.refresh(list_gemini_models))} models listed.")
+
+    if registry.probed_at:
+        probed = datetime.fromtimestamp(registry.probed_at).isoformat(timespec='seconds')
+        click.echo(f"Model list probed {probed}: {len(registry.models or ())} models")
+    else:
+        click.echo("Model list never probed.")
+
+    candidates = GEMINI_MODELS if llm_provider == 'Google' else []
+    for name in registry.rank_models(candidates[0], candidates) if candidates else sorted(registry.health):
+        health = registry.health.get(name)
+        status = 'healthy' if registry.is_healthy(name) else 'unhealthy'
+        if health:
+            click.echo(f"{name:<30} {status:<9} score {registry.score(name):.2f}  latency {health['latency']:.1f}s  "
+                       f"errors {health['error_rate']:.0%} ({health['errors']}/{health['requests']})")
+        else:
+            click.echo(f"{name:<30} {status:<9} no requests yet")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+"""
+    Markdown parsers for ZiNets semantic networks.
+
+    A network is a root line followed by dash lines indented by tabs or
+    spaces; `(...)` / `（...）` after a name is its decomposition and anything
+    after # is a comment. `iter_network_nodes` streams the nodes of any
+    iterable of lines in a single pass; `parse_markdown_lines` and
+    `parse_markdown_to_tree_data` build the nested-dict tree used by
+    `generate_html`, `zinets_tree.ZiTree.from_lines` the array-backed one.
+
+Usages:
+    from zinets_parse import parse_markdown_lines
+
+    with open("in_water.md", encoding="utf-8") as f:
+        tree_data = parse_markdown_lines(f)
+
+    $ python bench_zinets.py parse --lines 1000000
+"""
+
+import io
+from bisect import bisect_left
+from collections import Counter
+
+
+def _space_indent_unit(space_indents):
+    """
+    Indentation unit for space-indented networks, given the sorted distinct
+    positive indents seen so far: the most common gap between them, else 2 or 4.
+    """
+    if len(space_indents) > 1:
+        diffs = [b - a for a, b in zip(space_indents, space_indents[1:])]
+        return Counter(diffs).most_common(1)[0][0]
+    # with a single indent width the "2 vs 4 spaces by count" rule of the
+    # two-pass parser depends only on that width
+    return 2 if space_indents and space_indents[0] in (2, 6) else 4
+
+
+def _add_space_indent(space_indents, diff_counts, width):
+    """
+    Insert a new distinct positive space indent and return the updated unit.
+    Counts of the gaps between adjacent indents are kept up to date in
+    `diff_counts`, so deep networks (a new indent per level) stay linear; the
+    full `_space_indent_unit` scan only runs to break ties.
+    """
+    pos = bisect_left(space_indents, width)
+    lower = space_indents[pos - 1] if pos else None
+    upper = space_indents[pos] if pos < len(space_indents) else None
+    space_indents.insert(pos, width)
+    if lower is not None and upper is not None:
+        diff_counts[upper - lower] -= 1
+        if not diff_counts[upper - lower]:
+            del diff_counts[upper - lower]
+    if lower is not None:
+        diff_counts[width - lower] += 1
+    if upper is not None:
+        diff_counts[upper - width] += 1
+
+    if diff_counts:
+        top = max(diff_counts.values())
+        leaders = [diff for diff, count in diff_counts.items() if count == top]
+        if len(leaders) == 1:
+            return leaders[0]
+    return _space_indent_unit(space_indents)
+
+
+def _indent_level(indent, using_tabs, unit):
+    """
+    Logical level of a raw indent (width in spaces, or minus the number of
+    leading tabs), as in the two-pass parser.
+    """
+    is_tab, width = indent < 0, abs(indent)
+    if using_tabs:
+        return width if is_tab else width // 4
+    return width * (4 // unit) if is_tab else round(width / unit)
+
+
+def iter_network_nodes(lines):
+    """
+    Parse semantic network lines in markdown format in a single pass, yielding
+    `(parent, name, decomposition)` per node in document order.
+
+    Nodes are numbered in the order they are yielded: the root is node 0 (with
+    parent -1) and `parent` is the number of an earlier node. `decomposition`
+    is None when the line has none. Builders: `parse_markdown_lines` (nested
+    dicts) and `zinets_tree.ZiTree.from_lines` (parallel arrays).
+
+    `lines` can be any iterable of lines (an open file, a generator, a list);
+    the input is never held in memory. The indentation unit and the tab/space
+    convention are inferred incrementally from the dash lines seen so far, and
+    the levels of the open ancestors are recomputed whenever the estimate
+    changes, so consistently indented files parse exactly as with the
+    previous two-pass parser (kept in test_parse_md_text.py). Anything after
+    # is a comment; blank lines and lines that don't start with a dash are
+    ignored.
+    """
+    lines = iter(lines)
+    root_name = None
+    for root_line in lines:
+        if root_line.strip():
+            root_name = root_line.split('#', 1)[0].strip()
+            break
+    if root_name is None:
+        return
+    yield -1, root_name, None
+    n_nodes = 1
+
+    tab_lines = space_lines = 0
+    seen_spaces = set()
+    space_indents = []      # sorted distinct positive space indents
+    diff_counts = Counter()  # gaps between adjacent space_indents
+    unit = 4
+    # open ancestors, root first; raw indents are kept so levels can be
+    # recomputed when the tab/space convention or the unit estimate changes
+    stack_nodes, stack_levels, stack_indents = [0], [0], [0]
+    levels_scale = (False, unit)
+
+    for original_line in lines:
+        # Remove comments - anything after # is ignored
+        if '#' in original_line:
+            line_without_comment = original_line.split('#', 1)[0]
+        else:
+            line_without_comment = original_line
+
+        stripped = line_without_comment.lstrip(' \t')
+        if not stripped.startswith('-'):
+            # Skip empty and non-dash lines
+            continue
+        line = stripped.strip()
+
+        # Measure indentation and update the running estimate
+        is_tab = line_without_comment[0] == '\t'
+        if is_tab:
+            width = len(line_without_comment) - len(line_without_comment.lstrip('\t'))
+            tab_lines += 1
+        else:
+            width = len(line_without_comment) - len(line_without_comment.lstrip(' '))
+            space_lines += 1
+            if width and width not in seen_spaces:
+                seen_spaces.add(width)
+                unit = _add_space_indent(space_indents, diff_counts, width)
+
+        using_tabs = tab_lines > space_lines
+        if using_tabs != levels_scale[0] or unit != levels_scale[1]:
+            levels_scale = (using_tabs, unit)
+            for i in range(1, len(stack_levels)):
+                stack_levels[i] = _indent_level(stack_indents[i], using_tabs, unit)
+        # _indent_level, inlined in the per-line loop
+        if using_tabs:
+            level = width if is_tab else width // 4
+        else:
+            level = width * (4 // unit) if is_tab else round(width / unit)
+
+        # Extract character name and decomposition
+        parts = line.split('（')
+        if len(parts) == 1:
+            parts = line.split('(')
+
+        decomposition = None
+        if len(parts) > 1:
+            decomposition = parts[1].strip('）)') or None
+
+        # Find appropriate parent; the root (level 0) is never popped, as
+        # resetting it after the stack empties is the same thing
+        while len(stack_levels) > 1 and stack_levels[-1] >= level:
+            stack_levels.pop()
+            stack_nodes.pop()
+            stack_indents.pop()
+
+        yield stack_nodes[-1], parts[0].strip('- \t'), decomposition
+        stack_nodes.append(n_nodes)
+        stack_levels.append(level)
+        stack_indents.append(-width if is_tab else width)
+        n_nodes += 1
+
+
+def parse_markdown_lines(lines):
+    """
+    Parse semantic network lines in markdown format into a tree data structure,
+    in a single pass (see `iter_network_nodes`).
+    """
+    nodes = []
+    for parent, name, decomposition in iter_network_nodes(lines):
+        node = {
+            'name': name,
+            'children': []
+        }
+        if decomposition:
+            node['decomposition'] = decomposition
+        if nodes:
+            nodes[parent]['children'].append(node)
+        nodes.append(node)
+    return nodes[0] if nodes else {'name': '', 'children': []}
+
+
+def parse_markdown_to_tree_data(markdown_text):
+    """
+    Parse semantic network data in markdown format into a tree data structure.
+    More robust indentation detection to handle files from different editors.
+    Handles comments properly - anything after # is considered a comment and ignored.
+    Fixes hierarchy nesting for proper parent-child relationships.
+
+    See `parse_markdown_lines` to parse straight from a file handle.
+
+    Notes:
+        when working with data from zinets database,
+        use `convert_d3graph_to_tree()` from `zinets/app/zadmin/pages/4-字形 Zi Structure.py`
+    """
+    return parse_markdown_lines(io.StringIO(markdown_text))
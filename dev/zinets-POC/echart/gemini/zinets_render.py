@@ -0,0 +1,376 @@
+"""
+    HTML rendering for ZiNets visualizations.
+
+    The page template lives in `zinets_vis_template.html` as a static asset with
+    `{{placeholder}}` markers. It is compiled once per process: the text is split
+    at the placeholder offsets into literal segments, so rendering a page is a
+    sequence of writes (literal, value, literal, ...) straight into a buffer or
+    an open file handle.
+
+Usages:
+    from zinets_render import render_html, write_html
+
+    html = render_html(tree_data, character_data, title="Water")
+
+    with open("vis_water.html", "w", encoding="utf-8") as f:
+        write_html(f, tree_data, character_data, title="Water")
+
+    # self-contained page for air-gapped hosts (needs vendor/echarts.min.js)
+    with open("vis_water.html", "w", encoding="utf-8") as f:
+        write_html(f, tree_data, character_data, offline=True)
+    write_gzip_sibling("vis_water.html")
+
+    # multi-page site: pages share one content-hashed character bundle
+    bundle = write_character_bundle(character_data, "site")
+    with open("site/vis_water.html", "w", encoding="utf-8") as f:
+        write_html(f, tree_data, character_data, character_data_url=bundle)
+
+    # lazy page: characters are fetched per node on click from static shards
+    shards = write_character_shards(character_data, "site")
+    with open("site/vis_water.html", "w", encoding="utf-8") as f:
+        write_html(f, tree_data, character_data, character_shards=shards)
+"""
+
+import gzip
+import hashlib
+import io
+import json
+import os
+import re
+import shutil
+from datetime import datetime
+from functools import lru_cache
+
+
+TEMPLATE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_TEMPLATE = os.path.join(TEMPLATE_DIR, "zinets_vis_template.html")
+
+PLACEHOLDER_PATTERN = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+HTML_COMMENT_PATTERN = re.compile(r"<!--.*?-->", re.DOTALL)
+SCRIPT_CLOSE_PATTERN = re.compile(r"</(script)", re.IGNORECASE)
+
+ECHARTS_VERSION = "5.4.3"
+ECHARTS_CDN_URL = f"https://cdnjs.cloudflare.com/ajax/libs/echarts/{ECHARTS_VERSION}/echarts.min.js"
+VENDOR_ECHARTS_JS = os.path.join(TEMPLATE_DIR, "vendor", "echarts.min.js")
+
+# static shards hold the characters whose code points share `code point >> bits`
+DEFAULT_SHARD_BITS = 8
+DEFAULT_LRU_SIZE = 64
+
+# networks above this many nodes render in large-graph mode unless told otherwise
+LARGE_GRAPH_NODES = 2000
+DEFAULT_COLLAPSE_DEPTH = 3
+
+ROOT_PLACEHOLDER_DATA = {
+    'pinyin': 'Unknown',
+    'meaning': 'No data available',
+    'composition': 'No data available',
+    'phrases': 'No phrases available'
+}
+
+
+class CompiledTemplate:
+    """
+    A template split at its placeholders.
+
+    `literals[i]` is the text before `fields[i]`, and `literals[-1]` is the
+    text after the last placeholder, so len(literals) == len(fields) + 1.
+    `offsets` keeps the (start, end) position of each placeholder in the
+    source text for reference.
+    """
+
+    def __init__(self, text):
+        self.literals = []
+        self.fields = []
+        self.offsets = []
+
+        pos = 0
+        for match in PLACEHOLDER_PATTERN.finditer(text):
+            self.literals.append(text[pos:match.start()])
+            self.fields.append(match.group(1))
+            self.offsets.append((match.start(), match.end()))
+            pos = match.end()
+        self.literals.append(text[pos:])
+
+        self.parts = list(zip(self.literals, self.fields))
+        self.tail = self.literals[-1]
+
+    def render_to(self, out, values, json_values=None, indent=None):
+        """
+        Write the template into `out` (anything with a `write` method).
+
+        Args:
+            out: File handle or buffer to write into
+            values: Dict of placeholder name -> text
+            json_values: Dict of placeholder name -> object serialized as JSON
+            indent: JSON indentation; None writes compact JSON
+        """
+        json_values = json_values or {}
+        separators = (',', ':') if indent is None else (',', ': ')
+        write = out.write
+
+        for literal, field in self.parts:
+            write(literal)
+            if field in json_values:
+                # json.dumps per field uses the C encoder; json.dump would fall
+                # back to the pure-Python iterencode and write tiny chunks
+                write(json.dumps(json_values[field], ensure_ascii=False,
+                                 indent=indent, separators=separators))
+            else:
+                write(values[field])
+        write(self.tail)
+
+    def render(self, values, json_values=None, indent=None):
+        buf = io.StringIO()
+        self.render_to(buf, values, json_values=json_values, indent=indent)
+        return buf.getvalue()
+
+
+def minify_template(text):
+    """
+    Conservative minifier for the page template: drops HTML comments, blank
+    lines, whole-line `//` comments and indentation. Line breaks are kept so
+    JavaScript automatic semicolon insertion is unaffected.
+    """
+    text = HTML_COMMENT_PATTERN.sub('', text)
+    lines = []
+    for line in text.split('\n'):
+        line = line.strip()
+        if not line or line.startswith('//'):
+            continue
+        lines.append(line)
+    return '\n'.join(lines) + '\n'
+
+
+@lru_cache(maxsize=None)
+def load_template(path=DEFAULT_TEMPLATE, minify=False):
+    """
+    Read and compile a template file. Compiled templates are cached per
+    (path, minify).
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        text = f.read()
+    if minify:
+        text = minify_template(text)
+    return CompiledTemplate(text)
+
+
+@lru_cache(maxsize=None)
+def load_inline_script(path):
+    """
+    Read a JavaScript file for inlining into a <script> element, escaping any
+    `</script` sequence so it cannot close the element early.
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(
+            f"{path} not found. Offline pages inline a vendored ECharts build; "
+            f"download {ECHARTS_CDN_URL} to that path (or run `python zinets_vis.py --fetch-echarts`)."
+        )
+    with open(path, 'r', encoding='utf-8') as f:
+        return SCRIPT_CLOSE_PATTERN.sub(r'<\\/\1', f.read())
+
+
+def echarts_script_tag(offline=False, echarts_js=VENDOR_ECHARTS_JS):
+    """
+    The <script> element that loads ECharts: a CDN reference, or the vendored
+    build inlined into the page when `offline` is set.
+    """
+    if not offline:
+        return f'<script src="{ECHARTS_CDN_URL}"></script>'
+    return f'<script>{load_inline_script(echarts_js)}</script>'
+
+
+def fetch_echarts(path=VENDOR_ECHARTS_JS, url=ECHARTS_CDN_URL):
+    """
+    Download the ECharts build used by offline pages. Run this once on a
+    connected machine and ship the `vendor/` directory with the deployment.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    import urllib.request
+
+    with urllib.request.urlopen(url) as response, open(path, 'wb') as f:
+        shutil.copyfileobj(response, f)
+    load_inline_script.cache_clear()
+    return path
+
+
+def write_gzip_sibling(html_path):
+    """
+    Write a gzip-precompressed `<html_path>.gz` next to a rendered page for
+    static hosts that serve precompressed files. The gzip header carries no
+    timestamp, so identical pages produce identical archives.
+    """
+    gz_path = html_path + '.gz'
+    with open(html_path, 'rb') as src, open(gz_path, 'wb') as raw:
+        with gzip.GzipFile(filename='', mode='wb', fileobj=raw, compresslevel=9, mtime=0) as dst:
+            shutil.copyfileobj(src, dst)
+    return gz_path
+
+
+def write_character_bundle(character_data, site_dir, prefix="characters"):
+    """
+    Write character data shared by all pages of a site to
+    `<site_dir>/<prefix>.<hash>.json`. The name changes only when the content
+    does, so hosts can serve it with a long cache lifetime.
+
+    Returns:
+        The bundle file name, relative to `site_dir`
+    """
+    payload = json.dumps(character_data, ensure_ascii=False, sort_keys=True,
+                         separators=(',', ':')).encode('utf-8')
+    digest = hashlib.sha256(payload).hexdigest()[:12]
+    file_name = f"{prefix}.{digest}.json"
+
+    os.makedirs(site_dir, exist_ok=True)
+    with open(os.path.join(site_dir, file_name), 'wb') as f:
+        f.write(payload)
+    return file_name
+
+
+def write_character_shards(character_data, site_dir, shard_bits=DEFAULT_SHARD_BITS,
+                           subdir="characters"):
+    """
+    Split character data into static JSON shards for pages that load
+    characters on demand. Characters are grouped by `code point >> shard_bits`
+    (256 code points per shard by default), and each shard file name carries
+    a content hash so it can be cached indefinitely.
+
+    Returns:
+        Manifest of shard key (hex) -> shard path relative to `site_dir`
+    """
+    shards = {}
+    for char, data in character_data.items():
+        shards.setdefault(format(ord(char[0]) >> shard_bits, 'x'), {})[char] = data
+
+    os.makedirs(os.path.join(site_dir, subdir), exist_ok=True)
+    manifest = {}
+    for key, shard in sorted(shards.items()):
+        payload = json.dumps(shard, ensure_ascii=False, sort_keys=True,
+                             separators=(',', ':')).encode('utf-8')
+        file_name = f"{subdir}/{key}.{hashlib.sha256(payload).hexdigest()[:12]}.json"
+        with open(os.path.join(site_dir, file_name), 'wb') as f:
+            f.write(payload)
+        manifest[key] = file_name
+    return manifest
+
+
+def count_tree_nodes(tree_data):
+    """
+    Count nodes without recursion (deep networks would hit the recursion limit).
+    """
+    count = 0
+    stack = [tree_data]
+    while stack:
+        node = stack.pop()
+        count += 1
+        stack.extend(node.get('children', ()))
+    return count
+
+
+def large_graph_options(tree_data, large_graph=None, collapse_depth=DEFAULT_COLLAPSE_DEPTH,
+                        expand_depth=1, label_nodes=300, label_zoom=2.0):
+    """
+    Page settings for large-graph mode, or None to render the whole tree.
+
+    Args:
+        large_graph: True/False to force the mode, None to enable it above
+            LARGE_GRAPH_NODES nodes
+        collapse_depth: Levels below the root shown before subtrees collapse
+        expand_depth: Levels added when a collapsed node is clicked
+        label_nodes: Labels are drawn while at most this many nodes are visible...
+        label_zoom: ...or once the chart is zoomed in at least this far
+    """
+    if large_graph is None:
+        large_graph = count_tree_nodes(tree_data) > LARGE_GRAPH_NODES
+    if not large_graph:
+        return None
+    return {
+        'depth': collapse_depth,
+        'expandDepth': max(1, expand_depth),
+        'labelNodes': label_nodes,
+        'labelZoom': label_zoom,
+    }
+
+
+def page_values(tree_data, character_data, title="ZiNets Visualization",
+                offline=False, echarts_js=VENDOR_ECHARTS_JS):
+    """
+    Build the text placeholder values shared by every page variant.
+    """
+    root_character = tree_data['name']
+    root_data = character_data.get(root_character, ROOT_PLACEHOLDER_DATA)
+
+    return {
+        'title': title,
+        'echarts_script': echarts_script_tag(offline=offline, echarts_js=echarts_js),
+        'root_character': root_character,
+        'root_pinyin': root_data['pinyin'],
+        'root_meaning': root_data['meaning'],
+        'root_composition': root_data['composition'],
+        'root_phrases': root_data['phrases'],
+        'generation_date': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+    }
+
+
+def write_html(out, tree_data, character_data, title="ZiNets Visualization",
+               indent=None, template_path=DEFAULT_TEMPLATE,
+               offline=False, minify=None, echarts_js=VENDOR_ECHARTS_JS,
+               character_data_url=None, character_shards=None, shard_bits=DEFAULT_SHARD_BITS,
+               character_api_url=None, lru_size=DEFAULT_LRU_SIZE,
+               large_graph=None, collapse_depth=DEFAULT_COLLAPSE_DEPTH):
+    """
+    Render the visualization page directly into an open text file handle.
+
+    Args:
+        out: Writable text stream
+        tree_data: Parsed network tree (see `parse_markdown_to_tree_data`)
+        character_data: Dict of character -> pinyin/meaning/composition/phrases
+        title: Title for the visualization page
+        indent: JSON indentation for embedded data (default: compact)
+        template_path: Template file to render
+        offline: Inline the vendored ECharts build instead of loading it from the CDN
+        minify: Minify the template's HTML/CSS/JS (default: same as `offline`)
+        echarts_js: Vendored ECharts build used when `offline` is set
+        character_data_url: Load character data from this URL (see
+            `write_character_bundle`) instead of embedding it; `character_data`
+            is then only used for the pre-rendered root panel
+        character_shards: Shard manifest from `write_character_shards`; the page
+            embeds no character data and fetches a node's shard when clicked
+        shard_bits: Shard grouping used to build `character_shards`
+        character_api_url: Backend base URL; the page embeds no character data
+            and fetches clicked nodes from `/api/characters/cache/batch`
+        lru_size: Entries (shards or characters) kept by the page's lazy-load LRU
+        large_graph: Collapse subtrees below `collapse_depth` and expand them on
+            click, with level-of-detail labels (default: on above LARGE_GRAPH_NODES nodes)
+        collapse_depth: Levels below the root shown initially in large-graph mode
+    """
+    if minify is None:
+        minify = offline
+    embed_data = not (character_data_url or character_shards or character_api_url)
+    template = load_template(template_path, minify)
+    template.render_to(
+        out,
+        page_values(tree_data, character_data, title=title,
+                    offline=offline, echarts_js=echarts_js),
+        json_values={
+            'tree_data_json': tree_data,
+            'character_data_json': character_data if embed_data else {},
+            'character_data_url': character_data_url,
+            'character_shards_json': character_shards,
+            'character_shard_bits': shard_bits,
+            'character_api_url': character_api_url,
+            'character_lru_size': lru_size,
+            'large_graph_json': large_graph_options(tree_data, large_graph, collapse_depth),
+        },
+        indent=indent
+    )
+
+
+def render_html(tree_data, character_data, title="ZiNets Visualization", **kwargs):
+    """
+    Render the visualization page and return it as a string.
+    Keyword arguments are passed through to `write_html`.
+    """
+    buf = io.StringIO()
+    write_html(buf, tree_data, character_data, title=title, **kwargs)
+    return buf.getvalue()
@@ -0,0 +1,184 @@
+"""
+    Compact array-backed tree for parsed ZiNets networks.
+
+    A `ZiTree` keeps one slot per node in parallel `array('i')` columns
+    (parent, first child, next sibling, name id, decomposition id) and interns
+    names and decompositions into lookup tables, so a node costs a few dozen
+    bytes instead of a dict, a children list and its own strings. All
+    traversals are iterative; depth is only limited by memory.
+
+    The nested-dict format (`{'name', 'children', 'decomposition'}`) used by
+    `generate_html` is still the interchange format: `to_dict()` / `from_dict()`
+    convert losslessly in both directions.
+
+Usages:
+    from zinets_tree import ZiTree
+
+    with open("in_water.md", encoding="utf-8") as f:
+        tree = ZiTree.from_lines(f)
+    characters = tree.characters()
+    html = generate_html(tree.to_dict(), character_data)
+
+    $ python bench_zinets.py tree --nodes 1000000
+"""
+
+from array import array
+
+
+NO_NODE = -1
+
+
+class ZiTree:
+    """
+    Network tree stored as parallel integer arrays, indexed by node number.
+
+    Attributes:
+        parent: Parent node of each node (NO_NODE for the root)
+        first_child / next_sibling: Child lists as linked lists, in document order
+        name_id: Index into `names`
+        decomposition_id: Index into `decompositions` (NO_NODE if none)
+        names / decompositions: Interned string tables
+    """
+
+    def __init__(self):
+        self.parent = array('i')
+        self.first_child = array('i')
+        self.next_sibling = array('i')
+        self.last_child = array('i')
+        self.name_id = array('i')
+        self.decomposition_id = array('i')
+        self.names = []
+        self.decompositions = []
+        self._name_ids = {}
+        self._decomposition_ids = {}
+
+    def __len__(self):
+        return len(self.parent)
+
+    def add_node(self, parent, name, decomposition=None):
+        """
+        Append a node as the last child of `parent` (NO_NODE for the root)
+        and return its node number.
+        """
+        node = len(self.parent)
+        name_id = self._name_ids.get(name)
+        if name_id is None:
+            name_id = self._name_ids[name] = len(self.names)
+            self.names.append(name)
+        if decomposition:
+            decomposition_id = self._decomposition_ids.get(decomposition)
+            if decomposition_id is None:
+                decomposition_id = self._decomposition_ids[decomposition] = len(self.decompositions)
+                self.decompositions.append(decomposition)
+        else:
+            decomposition_id = NO_NODE
+
+        self.parent.append(parent)
+        self.first_child.append(NO_NODE)
+        self.next_sibling.append(NO_NODE)
+        self.last_child.append(NO_NODE)
+        self.name_id.append(name_id)
+        self.decomposition_id.append(decomposition_id)
+
+        if parent != NO_NODE:
+            last = self.last_child[parent]
+            if last == NO_NODE:
+                self.first_child[parent] = node
+            else:
+                self.next_sibling[last] = node
+            self.last_child[parent] = node
+        return node
+
+    @classmethod
+    def from_lines(cls, lines):
+        """
+        Parse a markdown network straight into arrays (no dict nodes are built).
+        `lines` is any iterable of lines, e.g. an open file.
+        """
+        from zinets_parse import iter_network_nodes
+
+        tree = cls()
+        add_node = tree.add_node
+        for parent, name, decomposition in iter_network_nodes(lines):
+            add_node(parent, name, decomposition)
+        return tree
+
+    @classmethod
+    def from_dict(cls, tree_data):
+        """
+        Build from the nested-dict format returned by `parse_markdown_to_tree_data`.
+        """
+        tree = cls()
+        stack = [(tree_data, NO_NODE)]
+        while stack:
+            node, parent = stack.pop()
+            index = tree.add_node(parent, node['name'], node.get('decomposition'))
+            # reversed, so children are added (and numbered) in document order
+            stack.extend((child, index) for child in reversed(node.get('children', ())))
+        return tree
+
+    def name(self, node):
+        return self.names[self.name_id[node]]
+
+    def decomposition(self, node):
+        decomposition_id = self.decomposition_id[node]
+        return None if decomposition_id == NO_NODE else self.decompositions[decomposition_id]
+
+    def children(self, node):
+        child = self.first_child[node]
+        while child != NO_NODE:
+            yield child
+            child = self.next_sibling[child]
+
+    def walk(self, root=0):
+        """
+        Yield `(node, depth)` in pre-order (document order) below and including `root`.
+        """
+        if not len(self):
+            return
+        first_child, next_sibling = self.first_child, self.next_sibling
+        stack = [(root, 0)]
+        while stack:
+            node, depth = stack.pop()
+            yield node, depth
+            # siblings are pushed as one entry each time we descend: the
+            # sibling goes below the child so the child's subtree comes first
+            sibling = next_sibling[node] if node != root else NO_NODE
+            if sibling != NO_NODE:
+                stack.append((sibling, depth))
+            child = first_child[node]
+            if child != NO_NODE:
+                stack.append((child, depth + 1))
+
+    def characters(self):
+        """
+        Unique single-character names (what `extract_all_characters` returns).
+        """
+        return [name for name in self.names if len(name) == 1]
+
+    def to_dict(self, root=0):
+        """
+        Convert back to the nested-dict format expected by `generate_html`.
+        """
+        if not len(self):
+            return {'name': '', 'children': []}
+        names, decompositions = self.names, self.decompositions
+        name_id, decomposition_id = self.name_id, self.decomposition_id
+        path = []   # dicts of the ancestors of the current node, by depth
+        for node, depth in self.walk(root):
+            node_dict = {'name': names[name_id[node]], 'children': []}
+            if decomposition_id[node] != NO_NODE:
+                node_dict['decomposition'] = decompositions[decomposition_id[node]]
+            del path[depth:]
+            if path:
+                path[-1]['children'].append(node_dict)
+            path.append(node_dict)
+        return path[0]
+
+    def nbytes(self):
+        """
+        Memory held by the node arrays, excluding the interned string tables.
+        """
+        columns = (self.parent, self.first_child, self.next_sibling, self.last_child,
+                   self.name_id, self.decomposition_id)
+        return sum(column.itemsize * len(column) for column in columns)
@@ -21,20 +21,62 @@ Usages:
 
 4. show cache statistics:
     $ python zinets_vis.py --cache-stats
+    $ python zinets_cache_stats.py --check          # compare the materialized counts with a recount
+
+5. To build a self-contained page for offline / air-gapped hosting:
+    $ python zinets_vis.py --fetch-echarts          # once, on a connected machine
+    $ python zinets_vis.py -i in_water.md --offline --gzip
+
+6. To build a multi-page site sharing one character data bundle:
+    $ python zinets_vis.py --site-dir site                  # every in_*.md
+    $ python zinets_vis.py --site-dir site -i in_water.md -i in_wood.md
+
+7. To load character data per node on click instead of embedding it (large networks):
+    $ python zinets_vis.py -i in_water.md --lazy-data shards
+    $ python zinets_vis.py -i in_water.md --lazy-data api --api-url http://localhost:8000
+
+8. Networks above a few thousand nodes switch to large-graph mode automatically
+   (collapsed subtrees expanded on click, level-of-detail labels); to force it:
+    $ python zinets_vis.py -i in_radicals.md --large-graph --collapse-depth 2 --lazy-data shards
+
+9. To make later runs all cache hits, warm the character cache ahead of time (resumable):
+    $ python zinets_warm_cache.py --zi-db zi.sqlite --layer HSK_1 --layer HSK_2
+
+10. Chunk sizes are learned per model and language unless fixed with --chunk-size:
+    $ python zinets_vis.py -i in_water.md --chunk-size 10
+    $ python zinets_chunking.py                     # show what was learned
+
+11. To enrich with another LLM provider, or hedge slow requests to a second one:
+    $ python zinets_vis.py -i in_water.md --provider openai:gpt-4o-mini
+    $ python zinets_vis.py -i in_water.md --hedge-provider local:qwen2.5:7b --hedge-after 8
+
+12. Gemini models are picked from the cached model list and per-model health:
+    $ python zinets_models.py [--refresh]
+
+13. To rebuild pages within milliseconds of saving a network while editing:
+    $ python zinets_watch.py --port 8080
 
 """
 
+import glob
 import json
 import os
 import re
 import time
 import click
-import sqlite3
 from datetime import datetime
-from tqdm import tqdm
-from typing import List
 
-import google.generativeai as genai 
+from zinets_render import (DEFAULT_COLLAPSE_DEPTH, VENDOR_ECHARTS_JS, fetch_echarts, load_inline_script, render_html,
+                           write_character_bundle, write_character_shards, write_gzip_sibling,
+                           write_html)
+from zinets_llm_providers import DEFAULT_HEDGE_AFTER, ProviderError, build_provider
+# settings shared with the zinets_* modules (GEMINI_MODELS, GENERATION_CONFIG ... are
+# also importable from here, as before)
+from zinets_config import (CACHE_DB, DEFAULT_GEMINI_MODEL, GEMINI_MODELS, GENERATION_CONFIG, JSON_GENERATION_CONFIG,
+                           PARSE_STATS, init_gemini_model, list_gemini_models)
+from zinets_llm_response import parse_character_response
+# markdown network parsers (also importable from here, as before)
+from zinets_parse import parse_markdown_lines, parse_markdown_to_tree_data
 
 
 DEBUG_FLAG = True
@@ -53,15 +95,16 @@ DEFAULT_NETWORK = """藻
                 - 木"""
 
 
-BASE_PROMPT = """ 
-    For each character, provide the following information in this format:
+FIELDS_PROMPT = """ 
+    For each character, provide the following information:
     - pinyin: the pronunciation with tone marks
     - meaning: main meanings
     - composition: how character is structurally composed from radicals and parts
     - phrases: 5 common phrases with pinyin and meaning
 
     Ensure explanation texts are in the target language of '{language}'
-
+"""
+TEXT_FORMAT_PROMPT = """
     Format character's information like this:
 
     Character: [character]
@@ -73,54 +116,16 @@ BASE_PROMPT = """
     Start each character with "Character:" on a new line.
     Do not include any other formatting, explanations, or markdown.
 """
-# Database configuration
-CACHE_DB = "zinets_cache.sqlite"
-
-GEMINI_MODELS = [
-    "gemini-2.0-flash",
-    "gemini-2.5-flash",
-    'gemini-1.5-flash', 
-    "gemini-2.5-pro",
-]
-DEFAULT_GEMINI_MODEL = "gemini-2.0-flash"
-
-def list_gemini_models():
-    gemini_models = []
-    try:
-        genai.configure(api_key=os.environ.get('GEMINI_API_KEY'))
-        print("Attempting to list available Gemini models supporting generateContent:")
-
-        # Iterate through all available models
-        for model in genai.list_models():
-            # Check if the model supports the 'generateContent' method
-            if 'generateContent' in model.supported_generation_methods:
-                # print(f"- {model.name} (Display Name: {model.display_name})")
-                gemini_models.append(model.name)
-
-    except Exception as e:
-        print(f"Error listing models: {e}")
-    
-    return [i.split('/')[-1] for i in sorted(gemini_models)]
-
-def update_gemini_models(model_name: str, models: List[str]=GEMINI_MODELS) -> List[str]:
-    """
-    Updates the list of models by moving the specified model_name to the
-    front if found, or inserting it at the front if not found.
-
-    Args:
-        model_name: The name of the model to move or insert.
-        models: The list of model names to update.
-
-    Returns:
-        The updated list of model names.
-    """
-    if model_name in models:
-        # Remove the model from its current position
-        models.remove(model_name)
-    # Insert the model at the front of the list
-    models.insert(0, model_name)
+JSON_FORMAT_PROMPT = """
+    Answer with a JSON array holding one object per character, with the keys
+    "character", "pinyin", "meaning", "composition" and "phrases" (a list of
+    5 strings like "水果 (shuǐ guǒ) - fruit").
+"""
+BASE_PROMPT = FIELDS_PROMPT + TEXT_FORMAT_PROMPT
+DEFAULT_API_URL = "http://localhost:8000"
 
-    return models
+JSON_MODE = True
+GEMINI_RESPONSE_LOG = "gemini_response_batch.txt"
 
 def derive_output_filename(input_filename, language="English"):
     # Split the input filename into its root and extension
@@ -141,97 +146,19 @@ def derive_output_filename(input_filename, language="English"):
 
 def setup_cache_db():
     """
-    Set up the SQLite cache database if it doesn't exist.
+    Set up the SQLite cache database if it doesn't exist, or upgrade its
+    schema (zinets_db.schema: table, indexes, statistics, WAL).
     """
-    conn = sqlite3.connect(CACHE_DB)
-    c = conn.cursor()
-    
-    # Check if table exists
-    c.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='character_cache'")
-    table_exists = c.fetchone()
-    
-    if not table_exists:
-        # Create new table with the updated schema
-        c.execute('''
-        CREATE TABLE IF NOT EXISTS character_cache (
-            character TEXT,
-            pinyin TEXT,
-            meaning TEXT,
-            composition TEXT,
-            phrases TEXT,
-            llm_provider TEXT,
-            llm_model_name TEXT,
-            timestamp TEXT,
-            is_active TEXT DEFAULT 'Y',
-            is_best TEXT DEFAULT 'Y',
-            PRIMARY KEY (character, llm_provider, llm_model_name)
-        )
-        ''')
-    else:
-        # Check if we need to migrate from old schema to new schema
+    from zinets_db import get_pool, setup_cache_db as setup_schema
+
+    with get_pool(CACHE_DB).connection() as conn:
         try:
-            # Check if the column exists
-            c.execute("PRAGMA table_info(character_cache)")
-            columns = [info[1] for info in c.fetchall()]
-            
-            if 'source' in columns and 'llm_provider' not in columns:
-                # Need to migrate: create a new table, copy data, drop old table, rename new table
-                click.echo("Migrating database schema...")
-                
-                # Create new table
-                c.execute('''
-                CREATE TABLE character_cache_new (
-                    character TEXT,
-                    pinyin TEXT,
-                    meaning TEXT,
-                    composition TEXT,
-                    phrases TEXT,
-                    llm_provider TEXT,
-                    llm_model_name TEXT,
-                    timestamp TEXT,
-                    is_active TEXT DEFAULT 'Y',
-                    is_best TEXT DEFAULT 'Y',
-                    PRIMARY KEY (character, llm_provider, llm_model_name)
-                )
-                ''')
-                
-                # Copy data (migrating the 'source' field to 'llm_provider' and 'llm_model_name')
-                c.execute('''
-                INSERT INTO character_cache_new 
-                (character, pinyin, meaning, composition, phrases, llm_provider, llm_model_name, timestamp, is_active, is_best)
-                SELECT 
-                    character, 
-                    pinyin, 
-                    meaning, 
-                    composition, 
-                    phrases, 
-                    CASE 
-                        WHEN source LIKE 'gemini%' THEN 'Google' 
-                        ELSE 'Unknown' 
-                    END as llm_provider,
-                    CASE 
-                        WHEN source LIKE '%batch' THEN 'gemini-batch' 
-                        WHEN source LIKE '%individual' THEN 'gemini-individual'
-                        ELSE 'unknown'
-                    END as llm_model_name,
-                    timestamp,
-                    'Y',
-                    'Y'
-                FROM character_cache
-                ''')
-                
-                # Drop old table
-                c.execute("DROP TABLE character_cache")
-                
-                # Rename new table
-                c.execute("ALTER TABLE character_cache_new RENAME TO character_cache")
-                
-                click.echo("Database migration completed.")
+            applied = setup_schema(conn)
         except Exception as e:
             click.echo(f"Error migrating database: {e}")
-    
-    conn.commit()
-    conn.close()
+            return
+    if 'migrate source column' in applied:
+        click.echo("Database migration completed.")
     
 def get_cached_character(character):
     """
@@ -244,31 +171,21 @@ def get_cached_character(character):
     Returns:
         Dict with character data or None if not in cache
     """
-    # Check if cache exists, create if not
+    from zinets_db import get_pool, queries
+
+    # No cache yet: nothing to look up (it is created by the first write)
     if not os.path.exists(CACHE_DB):
-        setup_cache_db()
-        return None  # Cache was just created, so no data exists yet
+        return None
 
-    conn = sqlite3.connect(CACHE_DB)
-    c = conn.cursor()
-    
-    c.execute("""
-    SELECT pinyin, meaning, composition, phrases 
-    FROM character_cache 
-    WHERE character = ? AND is_active = 'Y' AND is_best = 'Y'
-    ORDER BY timestamp DESC
-    LIMIT 1
-    """, (character,))
-    result = c.fetchone()
-    
-    conn.close()
+    with get_pool(CACHE_DB).connection() as conn:
+        result = conn.execute(queries.SELECT_BEST, (character,)).fetchone()
     
     if result:
         return {
-            'pinyin': result[0],
-            'meaning': result[1],
-            'composition': result[2],
-            'phrases': result[3]
+            'pinyin': result[1],
+            'meaning': result[2],
+            'composition': result[3],
+            'phrases': result[4]
         }
     return None
 
@@ -283,6 +200,8 @@ def cache_character(character, data, llm_provider="Google", llm_model_name="gemi
         llm_provider: Provider of the LLM (e.g., "Google", "Anthropic", etc.)
         llm_model_name: Name of the LLM model used
     """
+    from zinets_db import get_pool, queries
+
     # Don't cache placeholder data
     if data['pinyin'] == 'Unknown' and data['meaning'] == 'Meaning not available':
         return
@@ -291,7 +210,7 @@ def cache_character(character, data, llm_provider="Google", llm_model_name="gemi
     if not os.path.exists(CACHE_DB):
         setup_cache_db()
 
-    conn = sqlite3.connect(CACHE_DB)
+    conn = get_pool(CACHE_DB).get()
     c = conn.cursor()
     
     timestamp = datetime.now().isoformat()
@@ -306,11 +225,7 @@ def cache_character(character, data, llm_provider="Google", llm_model_name="gemi
     # New records are marked as best only if no existing best record exists
     is_best = 'Y' if not has_best else 'N'
     
-    c.execute('''
-    INSERT OR REPLACE INTO character_cache 
-    (character, pinyin, meaning, composition, phrases, llm_provider, llm_model_name, timestamp, is_active, is_best)
-    VALUES (?, ?, ?, ?, ?, ?, ?, ?, 'Y', ?)
-    ''', (
+    c.execute(queries.UPSERT_REPLACE, (
         character, 
         data['pinyin'], 
         data['meaning'], 
@@ -325,219 +240,96 @@ def cache_character(character, data, llm_provider="Google", llm_model_name="gemi
     conn.commit()
     conn.close()
 
-def parse_markdown_to_tree_data(markdown_text):
+def extract_all_characters(tree_data):
     """
-    Parse semantic network data in markdown format into a tree data structure.
-    More robust indentation detection to handle files from different editors.
-    Handles comments properly - anything after # is considered a comment and ignored.
-    Fixes hierarchy nesting for proper parent-child relationships.
-
-    Notes:
-        when working with data from zinets database,
-        use `convert_d3graph_to_tree()` from `zinets/app/zadmin/pages/4-字形 Zi Structure.py`
+    Extract all unique characters from the tree data structure.
+    Iterative, so arbitrarily deep networks don't hit the recursion limit.
     """
-    lines = markdown_text.strip().split('\n')
-    if not lines:
-        return {"name": "", "children": []}
-    
-    # Get the root name, ignoring anything after # if present
-    root_line = lines[0]
-    if '#' in root_line:
-        # If there's a comment, extract the content before #
-        root_name = root_line.split('#', 1)[0].strip()
-    else:
-        root_name = root_line.strip()
+    characters = set()
+    stack = [tree_data]
+    while stack:
+        node = stack.pop()
+        if 'name' in node and len(node['name']) == 1:
+            characters.add(node['name'])
+        stack.extend(node.get('children', ()))
+    return list(characters)
 
-    # Initialize the root node
-    tree_data = {
-        'name': root_name,
-        'children': []
-    }
+def fetch_character_chunk(provider, char_chunk, language='English', use_cache=True, debug=DEBUG_FLAG,
+                          log_label="", json_mode=JSON_MODE, sizer=None):
+    """
+    Request data for a chunk of characters in one LLM call (see
+    zinets_llm_providers.py) and parse the response with
+    `parse_character_response`. Complete entries are cached.
 
-    # First pass: Analyze indentation patterns in the file
-    line_indentations = []  # Store actual indentation for each line
-    indent_levels = []      # Store logical level for each line
-    
-    for i in range(1, len(lines)):
-        original_line = lines[i]
-        
-        # Remove comments - anything after # is ignored
-        if '#' in original_line:
-            line_without_comment = original_line.split('#', 1)[0]
-        else:
-            line_without_comment = original_line
-            
-        line = line_without_comment.strip()
-        if not line:
-            # Skip empty lines
-            line_indentations.append(None)
-            indent_levels.append(None)
-            continue
-            
-        # Only process lines that start with dash
-        if not line_without_comment.lstrip(' \t').startswith('-'):
-            # Skip non-dash lines
-            line_indentations.append(None)
-            indent_levels.append(None)
-            continue
-        
-        # Measure actual indentation
-        leading_spaces = len(line_without_comment) - len(line_without_comment.lstrip(' '))
-        leading_tabs = len(line_without_comment) - len(line_without_comment.lstrip('\t'))
-        
-        # Store raw indentation (we'll convert to logical levels later)
-        if leading_tabs > 0:
-            # Tab-based
-            line_indentations.append(('tab', leading_tabs))
-        else:
-            # Space-based
-            line_indentations.append(('space', leading_spaces))
-    
-    # Determine indentation pattern from collected data
-    tab_counts = {}
-    space_counts = {}
-    space_sequences = []
-    
-    for indent in line_indentations:
-        if indent is None:
-            continue
-            
-        indent_type, indent_size = indent
-        
-        if indent_type == 'tab':
-            tab_counts[indent_size] = tab_counts.get(indent_size, 0) + 1
-        else:
-            space_counts[indent_size] = space_counts.get(indent_size, 0) + 1
-            if indent_size > 0:
-                space_sequences.append(indent_size)
-    
-    # Determine if we're using tabs or spaces
-    using_tabs = sum(tab_counts.values()) > sum(space_counts.values())
-    
-    # Convert raw indentations to logical levels
-    if using_tabs:
-        # Tab-based: each tab is one level
-        for i, indent in enumerate(line_indentations):
-            if indent is None:
-                indent_levels.append(None)
-            else:
-                indent_type, indent_size = indent
-                if indent_type == 'tab':
-                    indent_levels.append(indent_size)
-                else:
-                    # Convert spaces to equivalent tabs (assuming 4 spaces = 1 tab)
-                    indent_levels.append(indent_size // 4)
-    else:
-        # Space-based: determine common increment
-        space_diffs = []
-        sorted_spaces = sorted(list(set(space_sequences)))
-        
-        if len(sorted_spaces) > 1:
-            for i in range(1, len(sorted_spaces)):
-                diff = sorted_spaces[i] - sorted_spaces[i-1]
-                if diff > 0:
-                    space_diffs.append(diff)
-        
-        # Determine the common indentation unit
-        if space_diffs:
-            # Use the most common difference
-            from collections import Counter
-            common_diff = Counter(space_diffs).most_common(1)[0][0]
-        else:
-            # Default to 2 or 4 spaces based on what appears most
-            space_2_count = space_counts.get(2, 0) + space_counts.get(4, 0) + space_counts.get(6, 0) + space_counts.get(8, 0)
-            space_4_count = space_counts.get(4, 0) + space_counts.get(8, 0) + space_counts.get(12, 0)
-            common_diff = 2 if space_2_count > space_4_count else 4
-        
-        # Convert spaces to logical levels
-        base_indent = min(space_sequences) if space_sequences else common_diff
-        
-        for i, indent in enumerate(line_indentations):
-            if indent is None:
-                indent_levels.append(None)
-            else:
-                indent_type, indent_size = indent
-                if indent_type == 'space':
-                    # Round to nearest level (to handle inconsistent indentation)
-                    indent_levels.append(round(indent_size / common_diff))
-                else:
-                    # Convert tabs to spaces
-                    indent_levels.append(indent_size * (4 // common_diff))
-    
-    # Second pass: build the tree using determined indent levels
-    stack = [(0, tree_data)]  # (level, node)
-    
-    for i in range(1, len(lines)):
-        level = indent_levels[i-1]  # -1 because we started storing from lines[1]
-        
-        if level is None:
-            continue
-            
-        original_line = lines[i]
-        
-        # Remove comments
-        if '#' in original_line:
-            line_without_comment = original_line.split('#', 1)[0]
-        else:
-            line_without_comment = original_line
-            
-        line = line_without_comment.strip()
-        
-        # Extract character name and decomposition
-        parts = line.split('（')
-        if len(parts) == 1:
-            parts = line.split('(')
-            
-        char_name = parts[0].strip('- \t')
-        decomposition = None
-        if len(parts) > 1:
-            decomposition = parts[1].strip('）)')
-            
-        # Create new node
-        new_node = {
-            'name': char_name,
-            # 'symbolSize': 25,
-            'children': []
-        }
-        
-        if decomposition:
-            new_node['decomposition'] = decomposition
-            
-        # Find appropriate parent
-        while stack and stack[-1][0] >= level:
-            stack.pop()
-            
-        # Ensure stack is never empty
-        if not stack:
-            stack = [(0, tree_data)]
-            
-        # Add node to parent
-        parent = stack[-1][1]
-        parent['children'].append(new_node)
-        
-        # Add to stack
-        stack.append((level, new_node))
-        
-    return tree_data
+    With `json_mode` the request asks for structured output (RESPONSE_SCHEMA);
+    if the model rejects that (JsonModeUnsupported), the text format is
+    requested instead, for this and later chunks. Other errors are raised.
+    A hedged provider only takes answers with at least one usable entry.
+    A `ChunkSizer` gets the request's latency, output tokens and recovery.
 
-def extract_all_characters(tree_data):
+    Returns:
+        Dict of character data for the characters found in the response
+        (characters missing from it are left to the caller)
     """
-    Extract all unique characters from the tree data structure.
+    chars_str = ', '.join([f"'{char}'" for char in char_chunk])
+    fields_prompt = FIELDS_PROMPT.format(language=language)
+
+    def usable(result):
+        return bool(parse_character_response(result['text'], char_chunk)[0])
+
+    from zinets_llm_providers import JsonModeUnsupported
+
+    result = None
+    started = time.monotonic()
+    if json_mode and provider.json_mode_supported:
+        batch_prompt = f"""
+    Generate information about these Chinese characters: {chars_str}
+
+    {fields_prompt}{JSON_FORMAT_PROMPT}
     """
-    characters = set()
+        try:
+            result = provider.generate(batch_prompt, json_mode=True, accept=usable)
+        except JsonModeUnsupported as json_error:
+            # other errors (network, quota, keys) are the caller's: the text format would fail the same way
+            click.echo(f"Structured output is not supported ({json_error}), requesting the text format")
+            started = time.monotonic()
 
-    def dfs(node):
-        if 'name' in node and len(node['name']) == 1:
-            characters.add(node['name'])
+    if result is None:
+        batch_prompt = f"""
+    Generate information about these Chinese characters: {chars_str}
 
-        if 'children' in node:
-            for child in node['children']:
-                dfs(child)
+    {fields_prompt}{TEXT_FORMAT_PROMPT}
+    """
+        result = provider.generate(batch_prompt, json_mode=False, accept=usable)
+    latency = time.monotonic() - started
+    response_text = result['text']
+
+    # Save response for debugging
+    if debug:
+        LINE_MARKER = "===" * 80
+        log_header = f"\n\nAI Model: {result['llm_provider']} {result['llm_model_name']}\n{log_label}\nDatetime: {time.strftime('%Y-%m-%d %H:%M:%S')}\n{LINE_MARKER}\n"
+        # Save the raw response for debugging
+        with open(GEMINI_RESPONSE_LOG, "a", encoding="utf-8") as f:
+            f.write(log_header)
+            f.write(batch_prompt)
+            f.write(response_text)
+        click.echo(f"API response saved to {GEMINI_RESPONSE_LOG}")
+
+    # JSON first, then the tolerant text grammar; incomplete entries count as missing
+    batch_character_data, _ = parse_character_response(response_text, char_chunk, PARSE_STATS)
+    if sizer is not None:
+        sizer.record(len(char_chunk), len(batch_character_data), latency, result['output_tokens'],
+                     result['truncated'])
+    if use_cache:
+        for char, char_data in batch_character_data.items():
+            if char_data['pinyin'] != 'Unknown':
+                cache_character(char, char_data, llm_provider=result['llm_provider'],
+                                llm_model_name=result['llm_model_name'])
 
-    dfs(tree_data)
-    return list(characters)
+    return batch_character_data
 
-def get_character_data_from_gemini(characters, model_name=DEFAULT_GEMINI_MODEL, debug=DEBUG_FLAG, use_cache=True, chunk_size=10, language='English'):
+def get_character_data_from_gemini(characters, model_name=DEFAULT_GEMINI_MODEL, debug=DEBUG_FLAG, use_cache=True, chunk_size=None, language='English',
+                                   provider=None):
     """
     Use Google Gemini API to generate character data using the official Python library.
     With caching support to reduce API calls.
@@ -549,11 +341,18 @@ def get_character_data_from_gemini(characters, model_name=DEFAULT_GEMINI_MODEL,
         model_name: The name of the Gemini model to use
         debug: Whether to save debug information
         use_cache: Whether to use cached data
-        chunk_size: Maximum number of characters to process in a single batch
+        chunk_size: Characters per batch request (None: adaptive, see zinets_chunking.py)
+        provider: LLM provider to use instead of Gemini (see zinets_llm_providers.py)
 
     Returns:
         A dictionary with character data
     """
+    from tqdm import tqdm
+
+    from zinets_chunking import ChunkSizer
+    from zinets_llm_providers import GeminiProvider
+    from zinets_models import ModelRegistry
+
     # Set up cache database if using cache
     if use_cache:
         if not os.path.exists(CACHE_DB):
@@ -586,179 +385,72 @@ def get_character_data_from_gemini(characters, model_name=DEFAULT_GEMINI_MODEL,
     
     click.echo(f"Fetching data for {len(missing_chars)} characters not in cache...")
     
-    try:
-        import google.generativeai as genai
-    except ImportError:
-        click.echo("Google Generative AI library not found. Install with 'pip install google-generativeai'")
-        # Generate placeholder data for missing characters
-        for char in missing_chars:
-            character_data[char] = generate_placeholder_data(char)
-            # Note: We don't cache placeholder data anymore
-        return character_data
-
-    api_key = os.environ.get('GEMINI_API_KEY')
-    if not api_key:
-        click.echo("[ERROR] GEMINI_API_KEY not found in environment variables. Using placeholder data.")
-        # Generate placeholder data for missing characters
-        for char in missing_chars:
-            character_data[char] = generate_placeholder_data(char)
-            # Note: We don't cache placeholder data anymore
-        return character_data
-
-    # Configure the Google Generative AI library with your API key
-    genai.configure(api_key=api_key)
-
-    # Use the correct model
-    try:
-        # Try to use the best available model, falling back to others if needed
-        models_to_try = update_gemini_models(model_name)
-
-        model = None
-        model_name = None
-        for name in models_to_try:
-            try:
-                model = genai.GenerativeModel(name)
-                model_name = name
-                click.echo(f"Using Gemini model: {model_name}")
-                break
-            except Exception as model_error:
-                click.echo(f"Could not use model {name}: {model_error}")
-                continue
-
-        if model is None:
-            raise Exception("No Gemini models are available")
-
-    except Exception as e:
-        click.echo(f"Error initializing Gemini model: {e}")
-        # Generate placeholder data for missing characters
-        for char in missing_chars:
-            character_data[char] = generate_placeholder_data(char)
-            # Note: We don't cache placeholder data anymore
-        return character_data
-
-    # Generation config for better output
-    generation_config = {
-        "temperature": 0.2,
-        "top_p": 0.95,
-        "top_k": 40,
-        "max_output_tokens": 8192,
-    }
-
-    base_prompt = BASE_PROMPT.format(language=language)
-    file_raw = "gemini_response_batch.txt"
+    if provider is None:
+        try:
+            import google.generativeai as genai
+        except ImportError:
+            click.echo("Google Generative AI library not found. Install with 'pip install google-generativeai'")
+            # Generate placeholder data for missing characters
+            for char in missing_chars:
+                character_data[char] = generate_placeholder_data(char)
+                # Note: We don't cache placeholder data anymore
+            return character_data
+
+        api_key = os.environ.get('GEMINI_API_KEY')
+        if not api_key:
+            click.echo("[ERROR] GEMINI_API_KEY not found in environment variables. Using placeholder data.")
+            # Generate placeholder data for missing characters
+            for char in missing_chars:
+                character_data[char] = generate_placeholder_data(char)
+                # Note: We don't cache placeholder data anymore
+            return character_data
+
+        # Configure the Google Generative AI library with your API key
+        genai.configure(api_key=api_key)
+
+        registry = ModelRegistry.load('Google')
+        try:
+            model, model_name = init_gemini_model(model_name, registry)
+        except Exception as e:
+            click.echo(f"Error initializing Gemini model: {e}")
+            # Generate placeholder data for missing characters
+            for char in missing_chars:
+                character_data[char] = generate_placeholder_data(char)
+                # Note: We don't cache placeholder data anymore
+            return character_data
+        provider = GeminiProvider(model_name, model=model, registry=registry)
+    model_name = provider.model_name
 
     # APPROACH 1: Process characters in chunks for better rate limit handling
     # Initialize a list to track characters that need individual processing
     still_missing_chars = missing_chars.copy()
     
     if missing_chars:
-        # Create chunks of characters to process in batches
-        char_chunks = [missing_chars[i:i + chunk_size] for i in range(0, len(missing_chars), chunk_size)]
-        
-        click.echo(f"Processing {len(missing_chars)} characters in {len(char_chunks)} chunks of max size {chunk_size}")
-        
+        # A fixed chunk_size, or sizes learned per model and language (see zinets_chunking.py)
+        sizer = None if chunk_size else ChunkSizer.load(model_name, language)
+        if sizer:
+            click.echo(f"Adaptive chunk size: {sizer.describe()}")
+        else:
+            click.echo(f"Processing {len(missing_chars)} characters in chunks of max size {chunk_size}")
+
         # Process each chunk
-        for chunk_index, char_chunk in enumerate(char_chunks):
+        chunk_index, position = 0, 0
+        while position < len(missing_chars):
+            size = sizer.next_chunk_size(len(missing_chars) - position) if sizer else chunk_size
+            char_chunk = missing_chars[position:position + size]
+            position += len(char_chunk)
+            chunk_index += 1
             try:
                 if len(char_chunk) > 1:
-                    click.echo(f"Processing chunk {chunk_index+1}/{len(char_chunks)} with {len(char_chunk)} characters...")
-                    
-                    chars_str = ', '.join([f"'{char}'" for char in char_chunk])
-
-                    batch_prompt = f"""
-                    Generate information about these Chinese characters: {chars_str}
-
-                    {base_prompt}
-
-                    """
-
-                    response = model.generate_content(
-                        batch_prompt,
-                        generation_config=generation_config
-                    )
-
-                    response_text = response.text
-
-                    # Save response for debugging
-                    if debug:
-                        LINE_MARKER = "===" * 80
-                        log_header = f"\n\nAI Model: {model_name}\nChunk: {chunk_index+1}/{len(char_chunks)}\nDatetime: {time.strftime('%Y-%m-%d %H:%M:%S')}\n{LINE_MARKER}\n"
-                        # Save the raw response for debugging
-                        with open(file_raw, "a", encoding="utf-8") as f:
-                            f.write(log_header)
-                            f.write(batch_prompt)
-                            f.write(response_text)
-                        click.echo(f"API response saved to {file_raw}")
-
-                    # Parse the non-JSON response format
-                    batch_character_data = {}
-                    lines = response_text.split('\n')
-
-                    current_char = None
-                    current_data = {}
-                    current_field = None
-
-                    for line in lines:
-                        line = line.strip()
-                        if not line:
-                            continue
-
-                        # Check for new character section
-                        if line.startswith('Character:'):
-                            # Save previous character if we were processing one
-                            if current_char and current_data:
-                                if all(field in current_data for field in ['pinyin', 'meaning', 'composition', 'phrases']):
-                                    batch_character_data[current_char] = current_data
-                                    # Cache the character data
-                                    if use_cache and current_data['pinyin'] != 'Unknown':
-                                        cache_character(current_char, current_data, llm_provider="Google", llm_model_name=model_name)
-                                    
-                                    # Remove from still_missing_chars since we successfully processed it
-                                    # (This handles all characters except the last one in the response)
-                                    if current_char in still_missing_chars:
-                                        still_missing_chars.remove(current_char)
-
-                            # Start new character
-                            char_parts = line.split(':', 1)
-                            if len(char_parts) > 1:
-                                potential_char = char_parts[1].strip()
-                                # Handle cases where the character might have extra text
-                                for c in potential_char:
-                                    if c in char_chunk:
-                                        current_char = c
-                                        break
-                                else:
-                                    # If no known character found, use the first character
-                                    current_char = potential_char[0] if potential_char else None
-
-                            current_data = {}
-                            current_field = None
-
-                        # Check for field definitions
-                        elif ':' in line and not line.startswith('Character:'):
-                            field_parts = line.split(':', 1)
-                            field_name = field_parts[0].strip().lower()
-                            field_value = field_parts[1].strip()
-
-                            if field_name in ['pinyin', 'meaning', 'composition', 'phrases']:
-                                current_data[field_name] = field_value
-                                current_field = field_name
-
-                        # Continuation of previous field
-                        elif current_field:
-                            current_data[current_field] += ' ' + line
-
-                    # Add the last character
-                    if current_char and current_data:
-                        if all(field in current_data for field in ['pinyin', 'meaning', 'composition', 'phrases']):
-                            batch_character_data[current_char] = current_data
-                            # Cache the character data
-                            if use_cache and current_data['pinyin'] != 'Unknown':
-                                cache_character(current_char, current_data, llm_provider="Google", llm_model_name=model_name)
-                            
-                            # Handle the last character in the response (which won't be caught by the Character: line check)
-                            if current_char in still_missing_chars:
-                                still_missing_chars.remove(current_char)
+                    click.echo(f"Processing chunk {chunk_index} with {len(char_chunk)} characters "
+                               f"({position}/{len(missing_chars)})...")
+
+                    batch_character_data = fetch_character_chunk(
+                        provider, char_chunk, language=language, use_cache=use_cache, debug=debug,
+                        log_label=f"Chunk: {chunk_index}", sizer=sizer)
+                    for char in batch_character_data:
+                        if char in still_missing_chars:
+                            still_missing_chars.remove(char)
 
                     # Update our main character_data dictionary
                     character_data.update(batch_character_data)
@@ -766,20 +458,23 @@ def get_character_data_from_gemini(characters, model_name=DEFAULT_GEMINI_MODEL,
                     # Report on processing success
                     processed_chars = list(batch_character_data.keys())
                     if len(processed_chars) == len(char_chunk):
-                        click.echo(f"Successfully processed all {len(char_chunk)} characters in chunk {chunk_index+1}")
+                        click.echo(f"Successfully processed all {len(char_chunk)} characters in chunk {chunk_index}")
                     else:
                         missing_count = len(char_chunk) - len(processed_chars)
-                        click.echo(f"Chunk {chunk_index+1} processing: got {len(processed_chars)}/{len(char_chunk)} characters. {missing_count} will be processed individually later.")
+                        click.echo(f"Chunk {chunk_index} processing: got {len(processed_chars)}/{len(char_chunk)} characters. {missing_count} will be processed individually later.")
                 
                 # Add a small delay between chunks to avoid rate limiting
-                if chunk_index < len(char_chunks) - 1:
+                if position < len(missing_chars):
                     delay_time = 1.0  # 1 second delay between chunks
                     click.echo(f"Waiting {delay_time}s before next chunk to avoid rate limits...")
                     time.sleep(delay_time)
                     
             except Exception as chunk_error:
-                click.echo(f"Error processing chunk {chunk_index+1}: {chunk_error}")
+                click.echo(f"Error processing chunk {chunk_index}: {chunk_error}")
                 # Characters in this chunk will remain in still_missing_chars for individual processing
+
+        if sizer:
+            sizer.save()
     
     # APPROACH 2: Process any remaining characters one by one
     # We're using the still_missing_chars list that was updated during chunk processing
@@ -791,61 +486,12 @@ def get_character_data_from_gemini(characters, model_name=DEFAULT_GEMINI_MODEL,
         with tqdm(total=len(still_missing_chars), desc="Processing characters individually", disable=len(still_missing_chars) < 3) as pbar:
             for char in still_missing_chars:
                 try:
-                    # Prompt for a single character
-                    prompt = f"""
-                    Generate information about this Chinese character '{char}' in this EXACT format:
-
-                    {base_prompt}
-
-                    """
-
-                    response = model.generate_content(
-                        prompt,
-                        generation_config=generation_config
-                    )
-
-                    response_text = response.text.strip()
-
-                    # Save response for debugging
-                    if debug:
-                        LINE_MARKER = "===" * 80
-                        log_header = f"\n\nAI Model: {model_name}\nDatetime: {time.strftime('%Y-%m-%d %H:%M:%S')}\n{LINE_MARKER}\n"
-                        # Save the raw response for debugging
-                        with open(file_raw, "a", encoding="utf-8") as f:
-                            f.write(log_header)
-                            f.write(batch_prompt)
-                            f.write(response_text)
-                        click.echo(f"API response saved to {file_raw}")
-
-
-                    # Simple line-by-line parsing
-                    char_data = {}
-                    current_field = None
-
-                    for line in response_text.split('\n'):
-                        line = line.strip()
-                        if not line:
-                            continue
-
-                        if ':' in line:
-                            parts = line.split(':', 1)
-                            field_name = parts[0].strip().lower()
-                            field_value = parts[1].strip()
-
-                            if field_name in ['pinyin', 'meaning', 'composition', 'phrases']:
-                                char_data[field_name] = field_value
-                                current_field = field_name
-                        else:
-                            # Continuation of previous field
-                            if current_field:
-                                char_data[current_field] += ' ' + line
-
-                    # Check if we got all the fields
-                    if all(field in char_data for field in ['pinyin', 'meaning', 'composition', 'phrases']):
+                    # Only the characters still missing after the chunks get here
+                    char_data = fetch_character_chunk(provider, [char], language=language,
+                                                      use_cache=use_cache, debug=debug,
+                                                      log_label=f"Character: {char}").get(char)
+                    if char_data:
                         character_data[char] = char_data
-                        # Cache the character data only if it's not placeholder data
-                        if use_cache and char_data['pinyin'] != 'Unknown':
-                            cache_character(char, char_data, llm_provider="Google", llm_model_name=model_name)
                     else:
                         click.echo(f"Missing some fields for character {char}. Using placeholder data.")
                         character_data[char] = generate_placeholder_data(char)
@@ -873,6 +519,9 @@ def get_character_data_from_gemini(characters, model_name=DEFAULT_GEMINI_MODEL,
             character_data[char] = generate_placeholder_data(char)
             # Note: We don't cache placeholder data
 
+    provider.save_health()
+    if PARSE_STATS.responses:
+        click.echo(f"Response parsing: {PARSE_STATS.summary()}")
     return character_data
 
 def generate_placeholder_data(character):
@@ -886,532 +535,82 @@ def generate_placeholder_data(character):
         'phrases': f'{character}语 - Example phrase 1<br>{character}文 - Example phrase 2'
     }
 
-def generate_html(tree_data, character_data, title="ZiNets Visualization"):
+def generate_html(tree_data, character_data, title="ZiNets Visualization", indent=None):
     """
     Generate HTML with the tree data and character data embedded as JavaScript objects.
+
+    The page template is the static asset `zinets_vis_template.html`, compiled once
+    and cached by `zinets_render`. Embedded JSON is compact unless `indent` is given.
     """
-    html_template = """<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>{title}</title>
-    <script src="https://cdnjs.cloudflare.com/ajax/libs/echarts/5.4.3/echarts.min.js"></script>
-    <style>
-        body {{
-            font-family: 'Microsoft YaHei', 'Segoe UI', Tahoma, sans-serif;
-            margin: 0;
-            padding: 0;
-            display: flex;
-            height: 100vh;
-        }}
-        #chart-container {{
-            width: 50%;
-            height: 100%;
-        }}
-        #info-panel {{
-            width: 50%;
-            padding: 20px;
-            background-color: #f5f5f5;
-            overflow-y: auto;
-            border-left: 1px solid #ddd;
-        }}
-        .node-tooltip {{
-            position: absolute;
-            padding: 10px;
-            background-color: rgba(255, 255, 255, 0.9);
-            border-radius: 4px;
-            border: 1px solid #ddd;
-            pointer-events: none;
-            font-size: 14px;
-            display: none;
-        }}
-        .character {{
-            font-size: 72px;
-            text-align: center;
-            margin-bottom: 10px;
-        }}
-        .pinyin {{
-            font-size: 18px;
-            text-align: center;
-            color: #666;
-            margin-bottom: 20px;
-        }}
-
-        .tab-nav {{
-            display: flex;
-            border-bottom: 1px solid #ddd;
-            margin-bottom: 20px;
-        }}
-        .tab-btn {{
-            padding: 8px 15px;
-            background-color: #f1f1f1;
-            border: none;
-            cursor: pointer;
-            transition: background-color 0.3s;
-            font-size: 16px;
-            font-weight: 500;
-            border-radius: 5px 5px 0 0;
-            margin-right: 5px;
-        }}
-        .tab-btn:hover {{
-            background-color: #e0e0e0;
-        }}
-        .tab-btn.active {{
-            background-color: #fff;
-            border: 1px solid #ddd;
-            border-bottom: 1px solid #fff;
-            margin-bottom: -1px;
-        }}
-
-        .tab-content {{
-            display: none;
-        }}
-        .tab-content.active {{
-            display: block;
-        }}        
-        .section {{
-            margin-bottom: 20px;
-        }}
-        .section h3 {{
-            border-bottom: 1px solid #ddd;
-            padding-bottom: 5px;
-            color: #333;
-        }}
-        .composition {{
-            display: flex;
-            align-items: center;
-            font-size: 16px;
-            margin-bottom: 10px;
-        }}
-        .phrases {{
-            line-height: 1.6;
-        }}
-        .meaning {{
-            line-height: 1.6;
-        }}
-        .footer {{
-            margin-top: 20px;
-            font-size: 12px;
-            color: #666;
-            text-align: center;
-        }}
-
-
-        .character-list {{
-            display: flex;
-            flex-wrap: wrap;
-            justify-content: flex-start;
-            gap: 10px;
-            margin-top: 10px;
-        }}
-        .character-item {{
-            display: inline-block;
-            width: 40px;
-            height: 40px;
-            line-height: 40px;
-            text-align: center;
-            font-size: 20px;
-            background-color: white;
-            border: 1px solid #ddd;
-            border-radius: 2px;
-            text-decoration: none;
-            color: #333;
-            transition: all 0.3s;
-            cursor: pointer;
-        }}
-        .character-item:hover {{
-            background-color: #f0f0f0;
-            transform: scale(1.05);
-            box-shadow: 0 2px 5px rgba(0,0,0,0.1);
-        }}
-        .character-item.selected {{
-            background-color: #e6f7ff;
-            border-color: #1890ff;
-            box-shadow: 0 0 0 2px rgba(24, 144, 255, 0.2);
-        }}
-
-        .search-options {{
-            margin-top: 20px;
-            padding: 15px;
-            background-color: white;
-            border-radius: 5px;
-            box-shadow: 0 1px 3px rgba(0,0,0,0.1);
-        }}
-        .search-options h4 {{
-            margin-top: 0;
-            margin-bottom: 10px;
-            color: #333;
-        }}
-        .search-buttons {{
-            display: flex;
-            flex-wrap: wrap;
-            gap: 10px;
-            margin-top: 15px;
-        }}
-        .search-btn {{
-            padding: 8px 12px;
-            background-color: #f5f5f5;
-            border: 1px solid #ddd;
-            border-radius: 4px;
-            cursor: pointer;
-            font-size: 14px;
-            transition: all 0.3s;
-            color: #333;
-            text-decoration: none;
-            display: inline-block;
-        }}
-        .search-btn:hover {{
-            background-color: #e6f7ff;
-            border-color: #1890ff;
-        }}
-        .search-btn.disabled {{
-            opacity: 0.5;
-            cursor: not-allowed;
-            pointer-events: none;
-        }}
-        .selected-char-display {{
-            font-size: 36px;
-            margin-right: 15px;
-            vertical-align: middle;
-        }}
-        .selected-char-info {{
-            display: flex;
-            align-items: center;
-            margin-bottom: 15px;
-        }}
-        .no-selection-message {{
-            color: #999;
-            font-style: italic;
-            margin: 10px 0;
-        }}        
-    </style>
-</head>
-<body>
-    <div id="chart-container"></div>
-    <div id="info-panel">
-        <!-- Character and Pinyin (displayed on all tabs) -->
-        <div class="character" id="selected-char">{root_character}</div>
-        <div class="pinyin" id="selected-pinyin">{root_pinyin}</div>
-
-        <!-- Tab Navigation -->
-        <div class="tab-nav">
-            <button class="tab-btn active" data-tab="overview">Overview</button>
-            <button class="tab-btn" data-tab="phrases">Phrases</button>
-            <button class="tab-btn" data-tab="search">Search</button>
-        </div>
-
-        <!-- Overview Tab -->
-        <div id="overview-tab" class="tab-content active">        
-            <div class="section">
-                <h3>Meaning</h3>
-                <div class="meaning" id="selected-meaning">
-                    {root_meaning}
-                </div>
-            </div>
-
-            <div class="section">
-                <h3>Composition</h3>
-                <div class="composition" id="selected-composition">
-                    {root_composition}
-                </div>
-            </div>
-        </div>
-
-        <!-- Phrases Tab -->
-        <div id="phrases-tab" class="tab-content">
-            <div class="section">
-                <h3>Related Phrases</h3>
-                <div class="phrases" id="selected-phrases">
-                    {root_phrases}
-                </div>
-            </div>
-        </div>
+    return render_html(tree_data, character_data, title=title, indent=indent)
 
-                
-        <!-- Search Tab -->
-        <div id="search-tab" class="tab-content">
-            <div class="section">
-                <h3>Character Search</h3>
-                <p>Step 1: Select a character from the grid</p>
-                <div class="character-list" id="character-search-list">
-                    <!-- This will be populated with character buttons -->
-                </div>
-                
-                <div class="search-options" id="search-options">
-                    <div class="selected-char-info">
-                        <span class="selected-char-display" id="search-selected-char">⚠️</span>
-                        <span id="search-selected-info">No character selected</span>
-                    </div>
-                    
-                    <p class="no-selection-message" id="no-selection-message">Please select a character first from above list to enable search</p>
-                    
-                    <h4>Step 2: Choose a dictionary or resource</h4>
-                    <div class="search-buttons">
-                        <a href="#" class="search-btn disabled" id="baidu-search" target="_blank">Baidu - Google Search</a>
-                        <a href="#" class="search-btn disabled" id="zdic-search" target="_blank">汉典</a>
-                        <a href="#" class="search-btn disabled" id="hwxnet-search" target="_blank">文学网</a>
-                        <a href="#" class="search-btn disabled" id="qianp-search" target="_blank">千篇字典</a>
-                        <a href="#" class="search-btn disabled" id="cuhk-search" target="_blank">多功能字庫</a>
-                        <a href="#" class="search-btn disabled" id="hanziyuan-search" target="_blank">字源</a>
-                    </div>
-                </div>
-            </div>
-        </div>
-        
-        <br><br>
-        <div class="footer">
-            Provided by ZiNets on {generation_date}
-        </div>
-    </div>
-
-    <script>
-        // Character data repository
-        const characterData = {character_data_json};
-
-        // Initialize ECharts
-        const chartContainer = document.getElementById('chart-container');
-        const chart = echarts.init(chartContainer);
-
-        // Define the tree structure based on your data
-        const treeData = {tree_data_json};
-
-        // Set the option
-        const option = {{
-            tooltip: {{
-                trigger: 'item',
-                formatter: function(params) {{
-                    if (params.data.decomposition) {{
-                        return `<div style="font-size:18px; font-weight:bold; margin-bottom:5px;">${{params.data.name}}</div>
-                                <div>${{params.data.decomposition}}</div>`;
-                    }} else {{
-                        return params.data.name;
-                    }}
-                }},
-                backgroundColor: 'rgba(255, 255, 255, 0.9)',
-                borderColor: '#ccc',
-                borderWidth: 0,
-                padding: 2,
-                textStyle: {{
-                    color: '#333',
-                    fontSize: 25
-                }}
-            }},
-            series: [
-                {{
-                    type: 'tree',
-                    data: [treeData],
-                    symbolSize: 40,
-                    orient: 'TB',
-                    symbol: 'rect',
-                    label: {{
-                        "show": true,
-                        "color": "red",
-                        "fontSize": 25,
-                        "valueAnimation": false
-                    }},
-                    leaves: {{
-                    }},
-                    emphasis: {{
-                        focus: 'relative',
-                        itemStyle: {{
-                            shadowBlur: 40,
-                            shadowOffsetX: 0,
-                            shadowColor: 'rgba(10, 10, 10, 0.75)'
-                        }}
-                    }},
-                    expandAndCollapse: false,
-                    animationDuration: 550,
-                    animationDurationUpdate: 750
-                }}
-            ]
-        }};
-
-        // Set the initial option and render
-        chart.setOption(option);
-
-
-        // Variable to track currently selected character in the search tab
-        let selectedSearchCharacter = null;
-
-        // Generate character buttons for the search tab
-        function generateCharacterButtons() {{
-            const characterList = document.getElementById('character-search-list');
-            characterList.innerHTML = '';
-            
-            // Get all unique characters from the characterData dictionary
-            const characters = Object.keys(characterData);
-            
-            // Sort characters for better user experience
-            characters.sort();
-            
-            // Create buttons for each character
-            for (const char of characters) {{
-                // Create character button element
-                const button = document.createElement('div');
-                button.className = 'character-item';
-                button.textContent = char;
-                button.title = `${{char}} (${{characterData[char].pinyin}}) - ${{characterData[char].meaning}}`;
-                
-                // Add click handler
-                button.addEventListener('click', function() {{
-                    // Remove selected class from all buttons
-                    document.querySelectorAll('.character-item').forEach(item => {{
-                        item.classList.remove('selected');
-                    }});
-                    
-                    // Add selected class to this button
-                    this.classList.add('selected');
-                    
-                    // Update selected character
-                    selectedSearchCharacter = char;
-                    
-                    // Update displayed character and info
-                    document.getElementById('search-selected-char').textContent = char;
-                    document.getElementById('search-selected-info').textContent = 
-                        `${{characterData[char].pinyin}} - ${{characterData[char].meaning}}`;
-                    
-                    // Hide no selection message
-                    document.getElementById('no-selection-message').style.display = 'none';
-                    
-                    // Update search buttons
-                    updateSearchButtons(char);
-                }});
-                
-                // Add to list
-                characterList.appendChild(button);
-            }}
-        }}
-
-        // Update search buttons with correct URLs for the selected character
-        function updateSearchButtons(character) {{
-            const encodedChar = encodeURIComponent(character);
-            
-            // Baidu (via Google search)
-            const baiduSearchBtn = document.getElementById('baidu-search');
-            baiduSearchBtn.href = `https://www.google.com/search?q=baidu+${{encodedChar}}`;
-            baiduSearchBtn.classList.remove('disabled');
-            
-            // ZDIC
-            const zdicSearchBtn = document.getElementById('zdic-search');
-            zdicSearchBtn.href = `https://www.zdic.net/hans/${{encodedChar}}`;
-            zdicSearchBtn.classList.remove('disabled');
-            
-            // Qianp
-            const qianpSearchBtn = document.getElementById('qianp-search');
-            qianpSearchBtn.href = `https://zidian.qianp.com/zi/${{encodedChar}}`;
-            qianpSearchBtn.classList.remove('disabled');
-            
-            // Hwxnet
-            const hwxnetSearchBtn = document.getElementById('hwxnet-search');
-            hwxnetSearchBtn.href = `https://zd.hwxnet.com/search.do?keyword=${{encodedChar}}`;
-            hwxnetSearchBtn.classList.remove('disabled');
-            
-            // Hanziyuan
-            const hanziyuanSearchBtn = document.getElementById('hanziyuan-search');
-            hanziyuanSearchBtn.href = `https://hanziyuan.net/#${{encodedChar}}`;
-            hanziyuanSearchBtn.classList.remove('disabled');
-
-            // CUHK Multi-Function Chinese Character Database
-            const cuhkSearchBtn = document.getElementById('cuhk-search');
-            cuhkSearchBtn.href = `https://humanum.arts.cuhk.edu.hk/Lexis/lexi-mf/search.php?word=${{encodedChar}}`;
-            cuhkSearchBtn.classList.remove('disabled');
-
-        }}        
-
-        // Handle node click event
-        chart.on('click', function(params) {{
-            const zi = params.data.name;
-            if (zi) {{
-                const charData = characterData[zi];
-                if (charData) {{
-                    // Update info panel
-                    document.getElementById('selected-char').textContent = zi;
-                    document.getElementById('selected-pinyin').textContent = charData.pinyin;
-                    document.getElementById('selected-meaning').textContent = charData.meaning;
-                    document.getElementById('selected-composition').textContent = charData.composition;
-                    document.getElementById('selected-phrases').innerHTML = charData.phrases;
-                }}
-            }}
-        }});
-
-        // Tab switching functionality
-        document.querySelectorAll('.tab-btn').forEach(button => {{
-            button.addEventListener('click', function() {{
-                // Remove active class from all buttons and content
-                document.querySelectorAll('.tab-btn').forEach(btn => {{
-                    btn.classList.remove('active');
-                }});
-                document.querySelectorAll('.tab-content').forEach(content => {{
-                    content.classList.remove('active');
-                }});
-                
-                // Add active class to clicked button and corresponding content
-                this.classList.add('active');
-                const tabId = this.getAttribute('data-tab');
-                document.getElementById(tabId + '-tab').classList.add('active');
-
-                // Generate character buttons if switching to search tab
-                if (tabId === 'search') {{
-                    generateCharacterButtons();
-                    
-                    // If there was a previously selected character, re-select it
-                    if (selectedSearchCharacter) {{
-                        const characterItems = document.querySelectorAll('.character-item');
-                        for (const item of characterItems) {{
-                            if (item.textContent === selectedSearchCharacter) {{
-                                item.classList.add('selected');
-                                break;
-                            }}
-                        }}
-                    }}
-                }}
-
-            }});
-        }});
-
-
-        // Make chart responsive
-        window.addEventListener('resize', function() {{
-            chart.resize();
-        }});
-    </script>
-</body>
-</html>
-"""
+def collect_character_data(characters, use_gemini=True, model_name=DEFAULT_GEMINI_MODEL,
+                           use_cache=True, debug=DEBUG_FLAG, chunk_size=None, language="English", provider=None):
+    """
+    Get character data from Gemini API (with cache) or from cache / placeholder data.
 
-    # Get root character
-    root_character = tree_data['name']
-    root_data = character_data.get(root_character, {
-        'pinyin': 'Unknown',
-        'meaning': 'No data available',
-        'composition': 'No data available',
-        'phrases': 'No phrases available'
-    })
+    Returns:
+        A dictionary of character -> pinyin/meaning/composition/phrases
+    """
+    from tqdm import tqdm
 
-    # Get current date for footer
-    generation_date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    if use_gemini:
+        ts_start = time.time()
+        character_data = get_character_data_from_gemini(
+            characters, 
+            model_name,
+            debug=debug, 
+            use_cache=use_cache,
+            chunk_size=chunk_size,
+            language=language,
+            provider=provider
+        )
+        ts_end = time.time()
+        click.echo(f"Gemini API call took {ts_end - ts_start:.2f} seconds.")
+    else:
+        # When not using Gemini, we still use cache if enabled
+        if use_cache:
+            character_data = {}
+            # Check cache first 
+            with tqdm(total=len(characters), desc="Checking cache", disable=len(characters) < 5) as pbar:
+                for char in characters:
+                    cached_data = get_cached_character(char)
+                    if cached_data:
+                        character_data[char] = cached_data
+                    else:
+                        character_data[char] = generate_placeholder_data(char)
+                    pbar.update(1)
+        else:
+            character_data = {char: generate_placeholder_data(char) for char in characters}
 
-    # Replace placeholders in HTML template
-    html = html_template.format(
-        title=title,
-        root_character=root_character,
-        root_pinyin=root_data['pinyin'],
-        root_meaning=root_data['meaning'],
-        root_composition=root_data['composition'],
-        root_phrases=root_data['phrases'],
-        character_data_json=json.dumps(character_data, ensure_ascii=False, indent=4),
-        tree_data_json=json.dumps(tree_data, ensure_ascii=False, indent=4),
-        generation_date=generation_date
-    )
+    return character_data
+
+def lazy_data_source(lazy_data, character_data, site_dir, api_url=DEFAULT_API_URL):
+    """
+    Prepare the `write_html` keyword arguments for a lazy character data mode.
 
-    return html
+    Args:
+        lazy_data: None (embed data), 'shards' or 'api'
+        character_data: Character data to shard for 'shards'
+        site_dir: Directory the shards are written to, next to the pages
+        api_url: Backend base URL for 'api'
+    """
+    if lazy_data == 'shards':
+        shards = write_character_shards(character_data, site_dir)
+        click.echo(f"Wrote {len(shards)} character data shards to {os.path.join(site_dir, 'characters')}")
+        return {'character_shards': shards}
+    if lazy_data == 'api':
+        return {'character_api_url': api_url.rstrip('/')}
+    return {}
 
 def process_semantic_network(markdown_text, output_file=DEFAULT_OUTPUT_HTML, 
                     use_gemini=True, model_name=DEFAULT_GEMINI_MODEL,
                     use_cache=True, 
                     title="ZiNets Visualization", 
-                    debug=DEBUG_FLAG, chunk_size=10, language="English"):
+                    debug=DEBUG_FLAG, chunk_size=None, language="English", provider=None,
+                    offline=False, gzip_output=False,
+                    lazy_data=None, api_url=DEFAULT_API_URL,
+                    large_graph=None, collapse_depth=DEFAULT_COLLAPSE_DEPTH):
     """
     Process semantic network data and generate HTML file.
 
@@ -1422,9 +621,24 @@ def process_semantic_network(markdown_text, output_file=DEFAULT_OUTPUT_HTML,
         use_cache: Whether to use character data caching
         title: Title for the visualization page
         debug: Whether to enable debug mode
-        chunk_size: Maximum number of characters to process in a single batch
+        chunk_size: Characters per batch request (None: adaptive, see zinets_chunking.py)
         language: Language for the output (default: English)
+        provider: LLM provider to use instead of Gemini (see zinets_llm_providers.py)
+        offline: Inline the vendored ECharts build and minify the page
+        gzip_output: Also write a gzip-precompressed `<output_file>.gz`
+        lazy_data: Load character data on node click instead of embedding it:
+            'shards' writes static shards next to the output file,
+            'api' fetches from the backend batch API at `api_url`
+        api_url: Backend base URL for `lazy_data='api'`
+        large_graph: Render collapsed subtrees expanded on click (default: automatic by size)
+        collapse_depth: Levels shown before subtrees collapse in large-graph mode
     """
+    from tqdm import tqdm
+
+    if offline:
+        # fail before any LLM calls if the vendored ECharts build is missing
+        load_inline_script(VENDOR_ECHARTS_JS)
+
     # Parse markdown to tree data
     tree_data = parse_markdown_to_tree_data(markdown_text)
     if debug and tree_data:
@@ -1439,53 +653,118 @@ def process_semantic_network(markdown_text, output_file=DEFAULT_OUTPUT_HTML,
     
     click.echo(f"Found {len(characters)} unique characters in the semantic network.")
 
-    # Get character data from Gemini API or generate placeholder data
-    if use_gemini:
-        ts_start = time.time()
-        character_data = get_character_data_from_gemini(
-            characters, 
-            model_name,
-            debug=debug, 
-            use_cache=use_cache,
-            chunk_size=chunk_size,
-            language=language
-        )
-        ts_end = time.time()
-        click.echo(f"Gemini API call took {ts_end - ts_start:.2f} seconds.")
-    else:
-        # When not using Gemini, we still use cache if enabled
-        if use_cache:
-            character_data = {}
-            # Check cache first 
-            with tqdm(total=len(characters), desc="Checking cache", disable=len(characters) < 5) as pbar:
-                for char in characters:
-                    cached_data = get_cached_character(char)
-                    if cached_data:
-                        character_data[char] = cached_data
-                    else:
-                        character_data[char] = generate_placeholder_data(char)
-                    pbar.update(1)
-        else:
-            character_data = {char: generate_placeholder_data(char) for char in characters}
-    
+    character_data = collect_character_data(
+        characters,
+        use_gemini=use_gemini,
+        model_name=model_name,
+        use_cache=use_cache,
+        debug=debug,
+        chunk_size=chunk_size,
+        language=language,
+        provider=provider
+    )
 
-    # Generate HTML with embedded JavaScript objects
-    with tqdm(total=1, desc="Generating HTML", disable=False) as pbar:
-        html = generate_html(tree_data, character_data, title=title)
-        pbar.update(1)
+    data_source = lazy_data_source(lazy_data, character_data,
+                                   os.path.dirname(output_file) or '.', api_url)
 
-    # Write to file
+    # Render HTML with embedded JavaScript objects straight into the output file
     with tqdm(total=1, desc="Writing output file", disable=False) as pbar:
         with open(output_file, 'w', encoding='utf-8') as f:
-            f.write(html)
+            write_html(f, tree_data, character_data, title=title, offline=offline,
+                       large_graph=large_graph, collapse_depth=collapse_depth, **data_source)
         pbar.update(1)
 
+    if gzip_output:
+        gz_file = write_gzip_sibling(output_file)
+        click.echo(f"Precompressed copy written: {gz_file}")
+
     click.echo(click.style(f"HTML file generated successfully: {output_file}", fg='green'))
     return output_file
 
+def build_site(input_files, site_dir, use_gemini=True, model_name=DEFAULT_GEMINI_MODEL,
+               use_cache=True, title="ZiNets Visualization",
+               debug=DEBUG_FLAG, chunk_size=None, language="English", provider=None,
+               offline=False, gzip_output=False,
+               lazy_data=None, api_url=DEFAULT_API_URL,
+               large_graph=None, collapse_depth=DEFAULT_COLLAPSE_DEPTH):
+    """
+    Build a multi-page site from several network files.
+
+    Character data for all networks is fetched once and written to a single
+    content-hashed `characters.<hash>.json` in `site_dir`; every page embeds
+    only its own tree and loads the shared bundle, so the browser downloads
+    and caches character data once for the whole site.
+
+    With `lazy_data` ('shards' or 'api') no bundle is written; pages load each
+    character on demand instead (see `lazy_data_source`).
+
+    Pages fetch the bundle over HTTP, so serve `site_dir` from a web server
+    (e.g. `python -m http.server -d <site_dir>`) rather than opening files directly.
+    Input files not named `in_<tag>.md` have no page name; they are reported
+    and skipped.
+
+    Returns:
+        List of written page paths
+    """
+    from tqdm import tqdm
+
+    if offline:
+        load_inline_script(VENDOR_ECHARTS_JS)
+    os.makedirs(site_dir, exist_ok=True)
+
+    # pages are named before anything is fetched, so a misnamed file costs no LLM calls
+    networks = []
+    for input_file in input_files:
+        try:
+            output_name = derive_output_filename(os.path.basename(input_file), language)
+        except ValueError as e:
+            click.echo(click.style(f"Skipping {input_file}: {e}", fg='yellow'))
+            continue
+        with open(input_file, 'r', encoding='utf-8') as f:
+            networks.append((output_name, parse_markdown_lines(f)))
+    if not networks:
+        raise click.ClickException("No input file named in_<tag>.md to build.")
+
+    characters = sorted(set().union(*(extract_all_characters(tree) for _, tree in networks)))
+    click.echo(f"Found {len(characters)} unique characters in {len(networks)} networks.")
+
+    character_data = collect_character_data(
+        characters,
+        use_gemini=use_gemini,
+        model_name=model_name,
+        use_cache=use_cache,
+        debug=debug,
+        chunk_size=chunk_size,
+        language=language,
+        provider=provider
+    )
+
+    if lazy_data:
+        data_source = lazy_data_source(lazy_data, character_data, site_dir, api_url)
+        data_files = [os.path.join(site_dir, path) for path in data_source.get('character_shards', {}).values()]
+    else:
+        bundle = write_character_bundle(character_data, site_dir)
+        data_source = {'character_data_url': bundle}
+        data_files = [os.path.join(site_dir, bundle)]
+
+    pages = []
+    for output_name, tree_data in tqdm(networks, desc="Writing pages"):
+        output_file = os.path.join(site_dir, output_name)
+        with open(output_file, 'w', encoding='utf-8') as f:
+            write_html(f, tree_data, character_data, title=title, offline=offline,
+                       large_graph=large_graph, collapse_depth=collapse_depth, **data_source)
+        pages.append(output_file)
+
+    if gzip_output:
+        for output_file in data_files + pages:
+            write_gzip_sibling(output_file)
+
+    click.echo(click.style(f"Site generated in {site_dir}: {len(networks)} pages, {len(data_files)} character data files", fg='green'))
+    return pages
+
 @click.command()
-@click.option('--input-file', '-i', type=click.Path(exists=True, readable=True), 
-              help='Input markdown file with zi_network data')
+@click.option('--input-file', '-i', 'input_files', multiple=True, type=click.Path(exists=True, readable=True), 
+              help='Input markdown file with zi_network data (repeat for several networks)')
 @click.option('--output-file', '-o', default=DEFAULT_OUTPUT_HTML, 
               help=f'Output HTML file path (default: {DEFAULT_OUTPUT_HTML})')
 @click.option('--title', '-t', default='ZiNets Visualization',
@@ -1500,11 +779,38 @@ def process_semantic_network(markdown_text, output_file=DEFAULT_OUTPUT_HTML,
               help='Enable debug mode to save API responses (default: False)')
 @click.option('--cache-stats', is_flag=True, default=False,
               help='Display cache statistics and exit')
-@click.option('--chunk-size', default=10, type=int,
-              help='Maximum number of characters to process in a single batch (default: 10)')
+@click.option('--chunk-size', default=None, type=int,
+              help='Characters per batch request (default: adaptive, learned per model and language)')
 @click.option('--language', '-l', default='English',
               help='Language for the output (default: English)')
-def main(input_file, output_file, title, use_gemini, model_name, use_cache, debug, cache_stats, chunk_size, language):
+@click.option('--provider', 'provider_spec',
+              help='LLM provider as <kind>[:<model>][@<base url>], kind: gemini, openai, local, fake '
+                   '(default: gemini with --model-name)')
+@click.option('--hedge-provider', 'hedge_spec',
+              help='Backup provider that also gets a request when the first is slow; the first good answer wins')
+@click.option('--hedge-after', default=DEFAULT_HEDGE_AFTER, type=float,
+              help=f'Seconds before a request is hedged to --hedge-provider (default: {DEFAULT_HEDGE_AFTER:g})')
+@click.option('--offline/--cdn', default=False,
+              help='Inline the vendored ECharts build and minify the page instead of loading ECharts from the CDN (default: CDN)')
+@click.option('--gzip', 'gzip_output', is_flag=True, default=False,
+              help='Also write a gzip-precompressed .html.gz next to the output')
+@click.option('--fetch-echarts', 'fetch_echarts_js', is_flag=True, default=False,
+              help='Download the ECharts build used by --offline into vendor/ and exit')
+@click.option('--lazy-data', type=click.Choice(['shards', 'api']), default=None,
+              help='Load character data per node on click instead of embedding it: from static JSON shards '
+                   'written next to the output, or from the backend batch API')
+@click.option('--api-url', default=DEFAULT_API_URL,
+              help=f'Backend base URL for --lazy-data api (default: {DEFAULT_API_URL})')
+@click.option('--large-graph/--full-graph', default=None,
+              help='Collapse deep subtrees and expand them on click, with level-of-detail labels '
+                   '(default: automatic for networks above a few thousand nodes)')
+@click.option('--collapse-depth', default=DEFAULT_COLLAPSE_DEPTH, type=int,
+              help=f'Levels shown before subtrees collapse in large-graph mode (default: {DEFAULT_COLLAPSE_DEPTH})')
+@click.option('--site-dir', type=click.Path(file_okay=False),
+              help='Build a multi-page site in this directory with one shared character data bundle '
+                   '(uses the -i files, or every in_*.md in the current directory)')
+def main(input_files, output_file, title, use_gemini, model_name, use_cache, debug, cache_stats, chunk_size, language,
+         provider_spec, hedge_spec, hedge_after, offline, gzip_output, fetch_echarts_js, lazy_data, api_url, large_graph, collapse_depth, site_dir):
     """
     ZiNets - Chinese Character Network Visualization Tool
     
@@ -1518,45 +824,86 @@ def main(input_file, output_file, title, use_gemini, model_name, use_cache, debu
         show_cache_statistics()
         return
 
-    # Get markdown text from file or use default
-    if input_file:
-        click.echo(f"Reading from file: {input_file}")
-        with open(input_file, 'r', encoding='utf-8') as f:
-            markdown_text = f.read()
+    if fetch_echarts_js:
+        click.echo(f"ECharts build saved to: {fetch_echarts()}")
+        return
+
+    try:
+        provider = build_provider(provider_spec, hedge_spec, hedge_after, model_name) if use_gemini else None
+    except ProviderError as e:
+        raise click.ClickException(str(e))
+
+    # migrate the cache schema once, before any lookup
+    if use_cache:
+        setup_cache_db()
 
-        if not output_file or output_file == DEFAULT_OUTPUT_HTML:
-            output_file = derive_output_filename(input_file, language)
+    render_options = dict(
+        use_gemini=use_gemini,
+        model_name=model_name,
+        use_cache=use_cache,
+        title=title,
+        debug=debug,
+        chunk_size=chunk_size,
+        language=language,
+        provider=provider,
+        offline=offline,
+        gzip_output=gzip_output,
+        lazy_data=lazy_data,
+        api_url=api_url,
+        large_graph=large_graph,
+        collapse_depth=collapse_depth
+    )
+
+    if site_dir:
+        input_files = input_files or sorted(glob.glob("in_*.md"))
+        try:
+            build_site(input_files, site_dir, **render_options)
+        except Exception as e:
+            click.echo(click.style(f"Error: {e}", fg='red'))
+            raise click.Abort()
+        return
+
+    # Get markdown text from file(s) or use default
+    if input_files:
+        networks = []
+        for input_file in input_files:
+            click.echo(f"Reading from file: {input_file}")
+            with open(input_file, 'r', encoding='utf-8') as f:
+                markdown_text = f.read()
+
+            network_output_file = output_file
+            if len(input_files) > 1 or not output_file or output_file == DEFAULT_OUTPUT_HTML:
+                network_output_file = derive_output_filename(input_file, language)
+            networks.append((markdown_text, network_output_file))
     else:
         click.echo("No input file provided. Using default network.")
-        markdown_text = DEFAULT_NETWORK
+        networks = [(DEFAULT_NETWORK, output_file)]
     
-    # Process the network and generate visualization
-    try:
-        output_path = process_semantic_network(
-            markdown_text, 
-            output_file=output_file, 
-            use_gemini=use_gemini,
-            model_name=model_name,
-            use_cache=use_cache,
-            title=title,
-            debug=debug,
-            chunk_size=chunk_size,
-            language=language
-        )
-        click.echo(click.style(f"Success! Visualization saved to: {output_path}", fg='green'))
-    except Exception as e:
-        click.echo(click.style(f"Error: {e}", fg='red'))
-        raise click.Abort()
+    # Process the network(s) and generate visualization
+    for markdown_text, network_output_file in networks:
+        try:
+            output_path = process_semantic_network(
+                markdown_text, 
+                output_file=network_output_file, 
+                **render_options
+            )
+            click.echo(click.style(f"Success! Visualization saved to: {output_path}", fg='green'))
+        except Exception as e:
+            click.echo(click.style(f"Error: {e}", fg='red'))
+            raise click.Abort()
 
 def show_cache_statistics():
     """
     Display statistics about the character cache.
     """
+    from zinets_db import get_pool, read_cache_stats
+
     if not os.path.exists(CACHE_DB):
         click.echo("Cache database does not exist. No statistics available.")
         return
     
-    conn = sqlite3.connect(CACHE_DB)
+    # read-only: a cache not migrated yet is counted without its statistics table
+    conn = get_pool(CACHE_DB).get()
     c = conn.cursor()
     
     try:
@@ -1566,33 +913,19 @@ def show_cache_statistics():
         
         has_new_schema = 'llm_provider' in columns
         
-        # Get total count of active records
         if has_new_schema:
-            c.execute("SELECT COUNT(*) FROM character_cache WHERE is_active = 'Y'")
+            # counts come from the trigger-maintained statistics table
+            stats = read_cache_stats(conn)
+            total_count = stats['active']
+            best_count = stats['best']
+            provider_counts = sorted(stats['providers'].items())
+            model_counts = sorted(stats['models'].items())
         else:
             c.execute("SELECT COUNT(*) FROM character_cache")
-        total_count = c.fetchone()[0]
-        
-        # Get count of records marked as "best"
-        if has_new_schema:
-            c.execute("SELECT COUNT(*) FROM character_cache WHERE is_active = 'Y' AND is_best = 'Y'")
-            best_count = c.fetchone()[0]
-        else:
+            total_count = c.fetchone()[0]
             best_count = total_count  # In old schema, all records are considered "best"
-        
-        # Get provider distribution
-        if has_new_schema:
-            c.execute("SELECT llm_provider, COUNT(*) FROM character_cache WHERE is_active = 'Y' GROUP BY llm_provider")
-            provider_counts = c.fetchall()
-        else:
             c.execute("SELECT source, COUNT(*) FROM character_cache GROUP BY source")
             provider_counts = c.fetchall()
-        
-        # Get model distribution
-        if has_new_schema:
-            c.execute("SELECT llm_model_name, COUNT(*) FROM character_cache WHERE is_active = 'Y' GROUP BY llm_model_name")
-            model_counts = c.fetchall()
-        else:
             model_counts = []  # Not available in old schema
         
         # Get recent entries
@@ -0,0 +1,289 @@
+"""
+    Prefetch character data into the ZiNets cache ahead of time.
+
+    Characters come from the zinets dictionary database (`t_zi`, optionally
+    filtered by HSK `layer`) or from a text corpus, optionally cut off at the
+    N most frequent. Characters already in `character_cache` are skipped; the
+    rest are sent to Gemini in chunks by a small concurrent scheduler (a thread
+    pool with a requests-per-minute limit) and cached as they arrive, so later
+    `zinets_vis.py` runs are all cache hits.
+
+    Progress is checkpointed per character in the `warm_cache_progress` table
+    of the cache database, keyed by a run name derived from the source: an
+    interrupted run picks up where it stopped when started again with the
+    same arguments.
+
+Usages:
+    $ python zinets_warm_cache.py --zi-db zi.sqlite --layer HSK_1 --layer HSK_2
+    $ python zinets_warm_cache.py --zi-db zi.sqlite --top 3000 --workers 4 --rpm 30
+    $ python zinets_warm_cache.py --corpus novel.txt --min-count 5
+    $ python zinets_warm_cache.py --zi-db zi.sqlite --provider local:qwen2.5:7b --workers 2
+    $ nohup python zinets_warm_cache.py --zi-db zi.sqlite --top 5000 > warm.log 2>&1 &
+    $ python zinets_warm_cache.py --status
+"""
+
+import os
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+
+import click
+from tqdm import tqdm
+
+from zinets_chunking import ChunkSizer
+from zinets_config import CACHE_DB, DEFAULT_GEMINI_MODEL, PARSE_STATS
+from zinets_llm_providers import DEFAULT_HEDGE_AFTER, ProviderError, build_provider
+from zinets_llm_response import is_cjk
+from zinets_vis import fetch_character_chunk
+
+
+DEFAULT_WORKERS = 4
+DEFAULT_RPM = 15          # Gemini free tier limit for flash models
+DEFAULT_MAX_ATTEMPTS = 3
+
+
+def characters_from_zi_db(zi_db, layers=(), top=None):
+    """
+    Active characters of the `t_zi` table in `sort_val` order, optionally
+    restricted to HSK layers (prefix match, e.g. 'HSK_1' matches 'HSK_1-Common-01').
+    `top` counts distinct characters.
+    """
+    # filtered and deduplicated in SQL, so the LIMIT applies to characters
+    # (each at its first sort_val) rather than to rows
+    sql_stmt = "SELECT trim(zi) FROM t_zi WHERE is_active = 'Y' AND length(trim(zi)) = 1"
+    params = []
+    if layers:
+        sql_stmt += " AND (" + " OR ".join("layer LIKE ?" for _ in layers) + ")"
+        params = [f"{layer}%" for layer in layers]
+    sql_stmt += " GROUP BY trim(zi) ORDER BY min(sort_val), trim(zi)"
+    if top:
+        sql_stmt += " LIMIT ?"
+        params.append(int(top))
+
+    from zinets_db import get_pool
+
+    with get_pool(zi_db).connection() as conn:
+        return [zi for (zi,) in conn.execute(sql_stmt, params)]
+
+
+def characters_from_corpus(paths, min_count=1, top=None):
+    """
+    CJK characters of text files, most frequent first.
+    """
+    counts = Counter()
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                counts.update(char for char in line if is_cjk(char))
+    ranked = [char for char, count in counts.most_common(top) if count >= min_count]
+    return ranked
+
+
+def checkpoint_characters(conn, run_name, characters):
+    """
+    Register the run's characters (existing rows keep their status) and mark
+    those already in `character_cache`. Returns status counts.
+    """
+    now = datetime.now().isoformat()
+    conn.executemany('''
+    INSERT OR IGNORE INTO warm_cache_progress (run_name, character, position, status, updated)
+    VALUES (?, ?, ?, 'pending', ?)
+    ''', [(run_name, char, position, now) for position, char in enumerate(characters)])
+    conn.execute('''
+    UPDATE warm_cache_progress SET status = 'cached', updated = ?
+    WHERE run_name = ? AND status != 'done'
+      AND character IN (SELECT character FROM character_cache WHERE is_active = 'Y' AND is_best = 'Y')
+    ''', (now, run_name))
+    conn.commit()
+    return progress_counts(conn, run_name)
+
+
+def progress_counts(conn, run_name):
+    return dict(conn.execute('''
+    SELECT status, COUNT(*) FROM warm_cache_progress WHERE run_name = ? GROUP BY status
+    ''', (run_name,)).fetchall())
+
+
+def pending_characters(conn, run_name, max_attempts):
+    rows = conn.execute('''
+    SELECT character FROM warm_cache_progress
+    WHERE run_name = ? AND status IN ('pending', 'failed') AND attempts < ?
+    ORDER BY position
+    ''', (run_name, max_attempts)).fetchall()
+    return [char for (char,) in rows]
+
+
+def record_chunk(conn, run_name, char_chunk, fetched):
+    now = datetime.now().isoformat()
+    conn.executemany('''
+    UPDATE warm_cache_progress
+    SET status = ?, attempts = attempts + 1, updated = ?
+    WHERE run_name = ? AND character = ?
+    ''', [('done' if char in fetched else 'failed', now, run_name, char) for char in char_chunk])
+    conn.commit()
+
+
+def run_chunks(chunks, work, on_done, workers=DEFAULT_WORKERS, rpm=DEFAULT_RPM):
+    """
+    Concurrent LLM scheduler: run `work(chunk)` for every chunk on a thread
+    pool with at most `workers` requests in flight and request starts spaced
+    to stay under `rpm` requests per minute. `on_done(chunk, result, error)`
+    is called on the calling thread as chunks complete.
+    """
+    interval = 60.0 / rpm if rpm else 0.0
+    next_start = time.monotonic()
+    chunks = iter(chunks)
+    in_flight = {}
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while True:
+            while len(in_flight) < workers:
+                chunk = next(chunks, None)
+                if chunk is None:
+                    break
+                delay = next_start - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                next_start = max(next_start, time.monotonic()) + interval
+                in_flight[executor.submit(work, chunk)] = chunk
+            if not in_flight:
+                return
+
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                chunk = in_flight.pop(future)
+                error = future.exception()
+                on_done(chunk, None if error else future.result(), error)
+
+
+def warm_cache(characters, run_name, model_name=DEFAULT_GEMINI_MODEL, language='English',
+               chunk_size=None, workers=DEFAULT_WORKERS, rpm=DEFAULT_RPM,
+               max_attempts=DEFAULT_MAX_ATTEMPTS, provider_spec=None, hedge_spec=None, hedge_after=DEFAULT_HEDGE_AFTER):
+    """
+    Fetch and cache every character of `characters` that isn't cached yet,
+    checkpointing progress under `run_name`. Without `chunk_size`, chunks are
+    sized by the `ChunkSizer` learned for the model and language.
+
+    Returns:
+        Status counts of the run ('done', 'cached', 'failed', 'pending')
+    """
+    from zinets_db import get_cache_pool
+
+    conn = get_cache_pool(CACHE_DB).get()
+    try:
+        counts = checkpoint_characters(conn, run_name, characters)
+        todo = pending_characters(conn, run_name, max_attempts)
+        click.echo(f"Run '{run_name}': {len(characters)} characters, "
+                   f"{counts.get('cached', 0) + counts.get('done', 0)} already cached, {len(todo)} to fetch")
+        if not todo:
+            return counts
+
+        try:
+            provider = build_provider(provider_spec or 'gemini', hedge_spec, hedge_after, model_name)
+        except ProviderError as e:
+            raise click.ClickException(str(e))
+        model_name = provider.model_name
+
+        sizer = None if chunk_size else ChunkSizer.load(model_name, language)
+        if sizer:
+            click.echo(f"Adaptive chunk size: {sizer.describe()}")
+
+        def work(char_chunk):
+            return fetch_character_chunk(provider, char_chunk, language=language,
+                                         use_cache=True, debug=False, sizer=sizer)
+
+        def make_chunks():
+            # sized lazily, so chunks submitted later use what earlier ones measured
+            position = 0
+            while position < len(todo):
+                size = sizer.next_chunk_size(len(todo) - position) if sizer else chunk_size
+                yield todo[position:position + size]
+                position += size
+
+        with tqdm(total=len(todo), desc="Warming cache") as pbar:
+            def on_done(char_chunk, fetched, error):
+                if error:
+                    tqdm.write(f"Chunk {''.join(char_chunk)} failed: {error}")
+                record_chunk(conn, run_name, char_chunk, fetched or {})
+                if sizer:
+                    sizer.save()
+                provider.save_health()
+                pbar.update(len(char_chunk))
+
+            run_chunks(make_chunks(), work, on_done, workers=workers, rpm=rpm)
+
+        click.echo(f"Response parsing: {PARSE_STATS.summary()}")
+        return progress_counts(conn, run_name)
+    finally:
+        conn.close()
+
+
+def show_progress():
+    if not os.path.exists(CACHE_DB):
+        click.echo("No cache database found.")
+        return
+    from zinets_db import get_pool, table_exists
+
+    with get_pool(CACHE_DB).connection() as conn:
+        rows = []
+        if table_exists(conn, 'warm_cache_progress'):
+            rows = conn.execute('''
+            SELECT run_name, status, COUNT(*), MAX(updated) FROM warm_cache_progress
+            GROUP BY run_name, status ORDER BY run_name, status
+            ''').fetchall()
+    if not rows:
+        click.echo("No warm-cache runs recorded.")
+    for run_name, status, count, updated in rows:
+        click.echo(f"{run_name:<40} {status:<8} {count:>6}  (last update {updated})")
+
+
+@click.command(name='warm-cache')
+@click.option('--zi-db', type=click.Path(exists=True, dir_okay=False),
+              help='zinets dictionary database with the t_zi table')
+@click.option('--layer', 'layers', multiple=True, help='HSK layer prefix in t_zi, e.g. HSK_1 (repeatable)')
+@click.option('--corpus', 'corpus_files', multiple=True, type=click.Path(exists=True, dir_okay=False),
+              help='Text file(s) to take characters from, most frequent first (repeatable)')
+@click.option('--min-count', default=1, type=int, help='Corpus: minimum occurrences of a character')
+@click.option('--top', type=int, help='Only the first N characters (t_zi order or corpus frequency)')
+@click.option('--run-name', help='Checkpoint name (default: derived from the source options)')
+@click.option('-m', '--model', 'model_name', default=DEFAULT_GEMINI_MODEL, help='Gemini model name')
+@click.option('--provider', 'provider_spec',
+              help='LLM provider as <kind>[:<model>][@<base url>], kind: gemini, openai, local (default: gemini)')
+@click.option('--hedge-provider', 'hedge_spec', help='Backup provider for requests slower than --hedge-after')
+@click.option('--hedge-after', default=DEFAULT_HEDGE_AFTER, type=float, help='Seconds before a request is hedged')
+@click.option('-l', '--language', default='English', help='Language for meanings and phrases')
+@click.option('--chunk-size', type=int, help='Characters per request (default: adaptive)')
+@click.option('--workers', default=DEFAULT_WORKERS, type=int, help='Concurrent requests')
+@click.option('--rpm', default=DEFAULT_RPM, type=float, help='Request starts per minute (0: unlimited)')
+@click.option('--max-attempts', default=DEFAULT_MAX_ATTEMPTS, type=int,
+              help='Stop retrying a character after this many failed requests')
+@click.option('--status', is_flag=True, help='Show checkpointed progress of all runs and exit')
+def main(zi_db, layers, corpus_files, min_count, top, run_name, model_name, provider_spec, hedge_spec, hedge_after,
+         language, chunk_size, workers, rpm, max_attempts, status):
+    """
+    Fill the character cache ahead of time from t_zi or a text corpus.
+    """
+    if status:
+        show_progress()
+        return
+
+    if zi_db:
+        characters = characters_from_zi_db(zi_db, layers, top)
+        default_run_name = f"t_zi:{','.join(layers) or 'all'}:top={top or 'all'}"
+    elif corpus_files:
+        characters = characters_from_corpus(corpus_files, min_count, top)
+        default_run_name = (f"corpus:{','.join(os.path.basename(path) for path in corpus_files)}"
+                            f":min={min_count}:top={top or 'all'}")
+    else:
+        raise click.UsageError("Give a character source: --zi-db or --corpus.")
+
+    run_name = run_name or default_run_name
+    counts = warm_cache(characters, run_name, model_name=model_name, language=language, chunk_size=chunk_size,
+                        workers=workers, rpm=rpm, max_attempts=max_attempts, provider_spec=provider_spec,
+                        hedge_spec=hedge_spec, hedge_after=hedge_after)
+    click.echo(", ".join(f"{count} {status_name}" for status_name, count in sorted(counts.items())))
+
+
+if __name__ == "__main__":
+    main()
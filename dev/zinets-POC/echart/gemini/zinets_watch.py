@@ -0,0 +1,314 @@
+"""
+    Watch network files and rebuild their pages as they are saved.
+
+    Running `zinets_vis.py` per edit pays interpreter startup, imports, the
+    cache database open and the template compile every time. `zinets_watch.py`
+    keeps all of that resident: one cache connection, the compiled template
+    (zinets_render's cache) and the character data seen so far. It polls the
+    `in_*.md` files and, when one changes, re-parses it and rewrites its
+    `vis_*.html` right away, with cached data or placeholders for characters
+    not enriched yet.
+
+    Enrichment of new characters runs on a background thread (the usual
+    `get_character_data_from_gemini` path, so results are cached); when it
+    completes, every page using those characters is rendered again;
+    characters it could not enrich are retried later, with a delay that
+    doubles after each failure. Pages
+    are written to a temporary file and renamed, so a browser reloading
+    mid-write never sees half a page. Editing the page template rebuilds
+    everything.
+
+Usages:
+    $ python zinets_watch.py                          # every in_*.md in the current directory
+    $ python zinets_watch.py -i in_water.md -l Spanish --no-gemini
+    $ python zinets_watch.py --out-dir site --port 8080   # also serve the pages
+"""
+
+import glob
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import click
+
+from zinets_config import CACHE_DB, DEFAULT_GEMINI_MODEL
+from zinets_parse import parse_markdown_lines
+from zinets_render import DEFAULT_TEMPLATE, load_template, write_html
+from zinets_vis import (derive_output_filename, extract_all_characters, generate_placeholder_data,
+                        get_character_data_from_gemini)
+
+
+DEFAULT_PATTERN = "in_*.md"
+DEFAULT_INTERVAL = 0.2        # seconds between polls
+ENRICH_RETRY_DELAY = 30.0     # seconds before a failed enrichment is retried; doubles per failure
+ENRICH_RETRY_MAX_DELAY = 900.0
+
+
+class CacheReader:
+    """
+    One resident connection to the character cache for batched lookups.
+    """
+
+    def __init__(self, db_path=CACHE_DB):
+        from zinets_db import get_cache_pool
+
+        self.conn = get_cache_pool(db_path).get()
+
+    def lookup(self, characters):
+        found = {}
+        characters = list(characters)
+        for i in range(0, len(characters), 500):
+            chunk = characters[i:i + 500]
+            rows = self.conn.execute(f'''
+            SELECT character, pinyin, meaning, composition, phrases FROM character_cache
+            WHERE character IN ({','.join('?' * len(chunk))}) AND is_active = 'Y' AND is_best = 'Y'
+            ORDER BY timestamp
+            ''', chunk).fetchall()
+            # later rows win, so each character keeps its newest entry
+            for character, pinyin, meaning, composition, phrases in rows:
+                found[character] = {'pinyin': pinyin, 'meaning': meaning,
+                                    'composition': composition, 'phrases': phrases}
+        return found
+
+    def close(self):
+        self.conn.close()
+
+
+class NetworkWatcher:
+    """
+    Resident state of the watch loop: known files with their mtime, parsed
+    characters and output page, plus all character data loaded so far.
+    """
+
+    def __init__(self, input_files, pattern=DEFAULT_PATTERN, out_dir='.', language='English',
+                 title="ZiNets Visualization", use_gemini=True, model_name=DEFAULT_GEMINI_MODEL,
+                 provider=None, render_options=None):
+        self.input_files = list(input_files)
+        self.pattern = pattern
+        self.out_dir = out_dir
+        self.language = language
+        self.title = title
+        self.use_gemini = use_gemini
+        self.model_name = model_name
+        self.provider = provider
+        self.render_options = render_options or {}
+
+        self.cache = CacheReader()
+        self.character_data = {}
+        self.placeholders = set()     # characters currently shown with placeholder data
+        self.pending = set()          # characters being enriched
+        self.retries = {}             # character -> (failed enrichments, monotonic time of the next try)
+        self.networks = {}            # path -> {'mtime', 'tree', 'characters', 'output'}
+        self.skipped = {}             # path -> mtime of a file that could not be built
+        self.template_mtime = None
+        self.completed = queue.Queue()
+        self.executor = ThreadPoolExecutor(max_workers=1)
+
+    def network_files(self):
+        if self.input_files:
+            return [path for path in self.input_files if os.path.exists(path)]
+        return sorted(glob.glob(self.pattern))
+
+    def poll(self):
+        """
+        One pass: rebuild changed networks and pages whose enrichment completed.
+        """
+        try:
+            template_mtime = os.path.getmtime(DEFAULT_TEMPLATE)
+        except OSError:                 # being replaced by an editor: look again next pass
+            template_mtime = self.template_mtime
+        if self.template_mtime is not None and template_mtime != self.template_mtime:
+            load_template.cache_clear()
+            click.echo("Template changed, rebuilding all pages")
+            for network in self.networks.values():
+                network['mtime'] = None
+        self.template_mtime = template_mtime
+
+        paths = self.network_files()
+        for path in set(self.networks) - set(paths):
+            click.echo(f"{path} removed")
+            del self.networks[path]
+        for path in set(self.skipped) - set(paths):
+            del self.skipped[path]
+        for path in paths:
+            try:
+                mtime = os.path.getmtime(path)
+            except OSError:             # removed since listed: dropped next pass
+                continue
+            network = self.networks.get(path)
+            if (network is None or network['mtime'] != mtime) and self.skipped.get(path) != mtime:
+                self.rebuild(path, mtime)
+
+        self.apply_completed()
+        self.retry_enrichment()
+
+    def rebuild(self, path, mtime):
+        """
+        Parse `path` and write its page; a file that cannot be read or named
+        is reported once and skipped until it changes.
+        """
+        started = time.perf_counter()
+        try:
+            output = os.path.join(self.out_dir, derive_output_filename(os.path.basename(path), self.language))
+            with open(path, 'r', encoding='utf-8') as f:
+                tree_data = parse_markdown_lines(f)
+        except (OSError, UnicodeDecodeError, ValueError) as e:
+            click.echo(click.style(f"{path}: {e} Skipped.", fg='red'))
+            self.skipped[path] = mtime
+            return
+        self.skipped.pop(path, None)
+        characters = set(extract_all_characters(tree_data))
+        self.networks[path] = {'mtime': mtime, 'tree': tree_data, 'characters': characters, 'output': output}
+
+        unknown = [char for char in characters if char not in self.character_data]
+        if unknown:
+            cached = self.cache.lookup(unknown)
+            self.character_data.update(cached)
+            for char in unknown:
+                if char not in cached:
+                    self.character_data[char] = generate_placeholder_data(char)
+                    self.placeholders.add(char)
+
+        self.render(path)
+        missing = sorted((characters & self.placeholders) - self.pending - set(self.retries))
+        if missing and self.use_gemini:
+            self.submit_enrichment(missing)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        pending = len(characters & self.pending)
+        click.echo(f"Rebuilt {output} in {elapsed_ms:.0f} ms"
+                   + (f" ({pending} characters being enriched)" if pending else ""))
+
+    def submit_enrichment(self, characters):
+        self.pending.update(characters)
+        self.executor.submit(self.enrich, characters)
+
+    def retry_enrichment(self):
+        """
+        Enrich again the characters whose retry delay is over, if a page still uses them.
+        """
+        now = time.monotonic()
+        used = set().union(*(network['characters'] for network in self.networks.values()))
+        due = sorted(char for char, (_, retry_at) in self.retries.items()
+                     if retry_at <= now and char in used and char in self.placeholders and char not in self.pending)
+        if due:
+            click.echo(f"Retrying enrichment of {len(due)} characters")
+            self.submit_enrichment(due)
+
+    def enrich(self, characters):
+        """
+        Background thread: fetch data for `characters` and hand it to the loop.
+        """
+        try:
+            data = get_character_data_from_gemini(characters, self.model_name, debug=False, use_cache=True,
+                                                  language=self.language, provider=self.provider)
+        except Exception as e:
+            click.echo(click.style(f"Enrichment failed: {e}", fg='red'))
+            data = {}
+        self.completed.put((characters, data))
+
+    def apply_completed(self):
+        changed = set()
+        failed = []
+        while True:
+            try:
+                characters, data = self.completed.get_nowait()
+            except queue.Empty:
+                break
+            self.pending.difference_update(characters)
+            for char in characters:
+                char_data = data.get(char)
+                if char_data and char_data['pinyin'] != 'Unknown':
+                    self.character_data[char] = char_data
+                    self.placeholders.discard(char)
+                    self.retries.pop(char, None)
+                    changed.add(char)
+                else:
+                    failures = self.retries.get(char, (0, None))[0] + 1
+                    delay = min(ENRICH_RETRY_DELAY * 2 ** (failures - 1), ENRICH_RETRY_MAX_DELAY)
+                    self.retries[char] = (failures, time.monotonic() + delay)
+                    failed.append(delay)
+        if failed:
+            click.echo(f"{len(failed)} characters not enriched, retrying in {min(failed):.0f} s or more")
+        if not changed:
+            return
+        for path, network in self.networks.items():
+            if network['characters'] & changed:
+                self.render(path)
+                click.echo(f"Enriched {len(network['characters'] & changed)} characters, re-rendered {network['output']}")
+
+    def render(self, path):
+        network = self.networks[path]
+        characters = network['characters']
+        page_data = {char: self.character_data[char] for char in characters if char in self.character_data}
+        output = network['output']
+        tmp_output = output + '.tmp'
+        with open(tmp_output, 'w', encoding='utf-8') as f:
+            write_html(f, network['tree'], page_data, title=self.title, **self.render_options)
+        os.replace(tmp_output, output)
+
+    def run(self, interval=DEFAULT_INTERVAL):
+        click.echo(f"Watching {', '.join(self.input_files) or self.pattern} (Ctrl+C to stop)")
+        try:
+            while True:
+                self.poll()
+                time.sleep(interval)
+        finally:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.cache.close()
+
+
+def serve_directory(directory, port):
+    """
+    Serve `directory` over HTTP on a daemon thread.
+    """
+    import functools
+    from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+    handler = functools.partial(SimpleHTTPRequestHandler, directory=directory)
+    server = ThreadingHTTPServer(('127.0.0.1', port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    click.echo(f"Serving {directory} at http://127.0.0.1:{port}/")
+    return server
+
+
+@click.command()
+@click.option('--input-file', '-i', 'input_files', multiple=True, type=click.Path(dir_okay=False),
+              help=f'Network file to watch (repeatable; default: every {DEFAULT_PATTERN})')
+@click.option('--out-dir', '-d', default='.', type=click.Path(file_okay=False), help='Directory for the pages')
+@click.option('--title', '-t', default='ZiNets Visualization', help='Title for the pages')
+@click.option('--language', '-l', default='English', help='Language for the output (default: English)')
+@click.option('--use-gemini/--no-gemini', default=True, help='Enrich new characters in the background')
+@click.option('--model-name', '-m', default=DEFAULT_GEMINI_MODEL, help='Gemini model')
+@click.option('--provider', 'provider_spec', help='LLM provider, as for zinets_vis.py --provider')
+@click.option('--offline/--cdn', default=False, help='Inline the vendored ECharts build')
+@click.option('--large-graph/--full-graph', default=None, help='Force large-graph mode on or off')
+@click.option('--interval', default=DEFAULT_INTERVAL, type=float, help='Seconds between file polls')
+@click.option('--port', type=int, help='Also serve the output directory over HTTP on this port')
+def main(input_files, out_dir, title, language, use_gemini, model_name, provider_spec, offline, large_graph,
+         interval, port):
+    """
+    Rebuild vis_*.html pages whenever their in_*.md networks change.
+    """
+    from zinets_llm_providers import ProviderError, build_provider
+
+    os.makedirs(out_dir, exist_ok=True)
+    try:
+        provider = build_provider(provider_spec, default_model=model_name) if use_gemini else None
+    except ProviderError as e:
+        raise click.ClickException(str(e))
+
+    watcher = NetworkWatcher(input_files, out_dir=out_dir, language=language, title=title, use_gemini=use_gemini,
+                             model_name=model_name, provider=provider,
+                             render_options={'offline': offline, 'large_graph': large_graph})
+    if port:
+        serve_directory(out_dir, port)
+    try:
+        watcher.run(interval)
+    except KeyboardInterrupt:
+        click.echo("Stopped.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,11 @@
 import sqlite3
+import sys
 import datetime
+from pathlib import Path
+
+# the shared data-access package lives in <repo>/src
+sys.path.insert(0, str(Path(__file__).resolve().parents[5] / "src"))
+from zinets_db import connect, queries, setup_cache_db
 
 # Sample data
 sample_data = [
@@ -152,34 +158,16 @@ sample_data = [
 
 def init_db():
     # Connect to SQLite database
-    conn = sqlite3.connect('zinets_cache.sqlite')
+    conn = connect('zinets_cache.sqlite')
     cursor = conn.cursor()
     
-    # Create table if it doesn't exist
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS character_cache (
-        character TEXT,
-        pinyin TEXT,
-        meaning TEXT,
-        composition TEXT,
-        phrases TEXT,
-        llm_provider TEXT,
-        llm_model_name TEXT,
-        timestamp TEXT,
-        is_active TEXT DEFAULT 'Y',
-        is_best TEXT DEFAULT 'Y',
-        PRIMARY KEY (character, llm_provider, llm_model_name)
-    )
-    ''')
+    # Create or upgrade the schema (same as the backends, zinets_db.schema)
+    setup_cache_db(conn)
     
     # Insert sample data
     for data in sample_data:
         try:
-            cursor.execute('''
-            INSERT INTO character_cache 
-            (character, pinyin, meaning, composition, phrases, llm_provider, llm_model_name, timestamp, is_active, is_best)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
+            cursor.execute(queries.INSERT, (
                 data["character"], data["pinyin"], data["meaning"], data["composition"],
                 data["phrases"], data["llm_provider"], data["llm_model_name"],
                 data["timestamp"], data["is_active"], data["is_best"]
@@ -1,10 +1,16 @@
 import sqlite3
+import sys
+from pathlib import Path
 from fastapi import FastAPI, HTTPException, Query, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import Optional, List
 import datetime
 
+# the shared data-access package lives in <repo>/src
+sys.path.insert(0, str(Path(__file__).resolve().parents[5] / "src"))
+from zinets_db import close_pools, get_pool, queries, setup_cache_db
+
 # Create FastAPI app
 app = FastAPI(title="Chinese Character API")
 
@@ -19,9 +25,8 @@ app.add_middleware(
 
 # Database connection
 def get_db_connection():
-    conn = sqlite3.connect('zinets_cache.sqlite')
-    conn.row_factory = sqlite3.Row
-    return conn
+    # a pooled connection; close() returns it to the pool
+    return get_pool('zinets_cache.sqlite', row_factory=sqlite3.Row).get()
 
 # Pydantic models
 class CharacterBase(BaseModel):
@@ -58,29 +63,15 @@ class CharacterResponse(BaseModel):
 # Initialize database
 @app.on_event("startup")
 def startup_db_client():
+    # Schema, indexes, statistics triggers and WAL (zinets_db.schema)
     conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    # Create table if it doesn't exist
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS character_cache (
-        character TEXT,
-        pinyin TEXT,
-        meaning TEXT,
-        composition TEXT,
-        phrases TEXT,
-        llm_provider TEXT,
-        llm_model_name TEXT,
-        timestamp TEXT,
-        is_active TEXT DEFAULT 'Y',
-        is_best TEXT DEFAULT 'Y',
-        PRIMARY KEY (character, llm_provider, llm_model_name)
-    )
-    ''')
-    
-    conn.commit()
+    setup_cache_db(conn)
     conn.close()
 
+@app.on_event("shutdown")
+def shutdown_db_client():
+    close_pools()
+
 # API Routes
 @app.get("/api/characters", response_model=CharacterResponse)
 def get_characters(
@@ -165,7 +156,7 @@ def get_character(
 ):
     cursor = conn.cursor()
     cursor.execute(
-        "SELECT * FROM character_cache WHERE character = ? AND llm_provider = ? AND llm_model_name = ?",
+        queries.SELECT_BY_KEY,
         (character, llm_provider, llm_model_name)
     )
     
@@ -186,7 +177,7 @@ def create_character(
     
     # Check if character already exists
     cursor.execute(
-        "SELECT * FROM character_cache WHERE character = ? AND llm_provider = ? AND llm_model_name = ?",
+        queries.SELECT_BY_KEY,
         (character.character, character.llm_provider, character.llm_model_name)
     )
     
@@ -200,11 +191,7 @@ def create_character(
     
     # Insert new character
     cursor.execute(
-        """
-        INSERT INTO character_cache 
-        (character, pinyin, meaning, composition, phrases, llm_provider, llm_model_name, timestamp, is_active, is_best)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """,
+        queries.INSERT,
         (
             character.character, character.pinyin, character.meaning, character.composition,
             character.phrases, character.llm_provider, character.llm_model_name,
@@ -229,7 +216,7 @@ def update_character(
     
     # Check if character exists
     cursor.execute(
-        "SELECT * FROM character_cache WHERE character = ? AND llm_provider = ? AND llm_model_name = ?",
+        queries.SELECT_BY_KEY,
         (character, llm_provider, llm_model_name)
     )
     
@@ -269,7 +256,7 @@ def update_character(
     
     # Get updated character
     cursor.execute(
-        "SELECT * FROM character_cache WHERE character = ? AND llm_provider = ? AND llm_model_name = ?",
+        queries.SELECT_BY_KEY,
         (character, llm_provider, llm_model_name)
     )
     
@@ -289,7 +276,7 @@ def deactivate_character(
     
     # Check if character exists
     cursor.execute(
-        "SELECT * FROM character_cache WHERE character = ? AND llm_provider = ? AND llm_model_name = ?",
+        queries.SELECT_BY_KEY,
         (character, llm_provider, llm_model_name)
     )
     
@@ -300,7 +287,7 @@ def deactivate_character(
     # Soft delete - set is_active to 'N'
     timestamp = datetime.datetime.now().isoformat()
     cursor.execute(
-        "UPDATE character_cache SET is_active = 'N', timestamp = ? WHERE character = ? AND llm_provider = ? AND llm_model_name = ?",
+        queries.DEACTIVATE_BY_KEY,
         (timestamp, character, llm_provider, llm_model_name)
     )
     
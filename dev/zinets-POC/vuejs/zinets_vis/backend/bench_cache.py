@@ -0,0 +1,271 @@
+"""
+    Benchmarks for the character cache API, run in-process against a
+    temporary database.
+
+Usages:
+    $ python bench_cache.py bulk --items 10000
+    $ python bench_cache.py batch --sizes 10,1000,50000 --rows 200000
+    $ python bench_cache.py compact --characters 20000 --history 10
+    $ python bench_cache.py writes --writers 8 --readers 4 --writes 500
+"""
+
+import contextlib
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+import click
+from fastapi.testclient import TestClient
+
+import main
+
+
+def make_items(n_items, provider='Google', model='gemini-2.0-flash', offset=0):
+    return [{"character": f"字{offset + i}", "pinyin": "zì", "meaning": "character; word",
+             "composition": "宀 + 子", "phrases": "汉字 (hàn zì) - Chinese character",
+             "llm_provider": provider, "llm_model_name": model, "timestamp": ""}
+            for i in range(n_items)]
+
+
+@contextlib.contextmanager
+def temp_client():
+    """
+    A TestClient of the API with its startup run, on an empty database in a
+    temporary working directory.
+    """
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.chdir(tmp_dir)
+        try:
+            with TestClient(main.app) as client:
+                yield client
+        finally:
+            os.chdir(cwd)
+
+
+def timed(func, repeat=1):
+    """
+    (result, seconds) of the fastest of `repeat` calls.
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        ts_start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - ts_start)
+    return result, best
+
+
+@click.group()
+def cli():
+    """Character cache API benchmarks."""
+
+
+@cli.command()
+@click.option('--items', 'n_items', default=10000, type=int, help='Characters to cache')
+def bulk(n_items):
+    """One POST per character vs one bulk POST, for new and existing rows."""
+    items = make_items(n_items)
+    with temp_client() as client:
+        _, single_insert_s = timed(lambda: [client.post("/api/characters/cache", json=item) for item in items])
+        _, single_update_s = timed(lambda: [client.post("/api/characters/cache", json=item) for item in items])
+
+    with temp_client() as client:
+        response, bulk_insert_s = timed(lambda: client.post("/api/characters/cache/bulk", json=items))
+        assert response.json()["inserted"] == n_items
+        response, bulk_update_s = timed(lambda: client.post("/api/characters/cache/bulk", json=items))
+        assert response.json()["updated"] == n_items
+
+    click.echo(f"{n_items} items      {'insert s':>9} {'items/s':>9} {'update s':>9} {'items/s':>9}")
+    for label, insert_s, update_s in (("one per POST", single_insert_s, single_update_s),
+                                      ("bulk POST   ", bulk_insert_s, bulk_update_s)):
+        click.echo(f"{label}     {insert_s:>9.2f} {n_items / insert_s:>9.0f} "
+                   f"{update_s:>9.2f} {n_items / update_s:>9.0f}")
+
+
+SQLITE_DEFAULT_MAX_VARIABLES = 32766   # 999 before SQLite 3.32; some builds raise it
+
+
+def legacy_batch(characters):
+    """
+    The batch endpoint before chunking: one IN (...) with a variable per
+    character, under SQLite's default variable limit.
+    """
+    conn = sqlite3.connect('zinets_cache.sqlite')
+    conn.setlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER, SQLITE_DEFAULT_MAX_VARIABLES)
+    try:
+        rows = conn.execute(f"""
+            SELECT character, pinyin, meaning, composition, phrases FROM character_cache
+            WHERE character IN ({','.join('?' * len(characters))}) AND is_active = 'Y' AND is_best = 'Y'
+            ORDER BY character
+        """, characters).fetchall()
+    finally:
+        conn.close()
+    return [main.CharacterCache(character=row[0], pinyin=row[1], meaning=row[2], composition=row[3],
+                                phrases=row[4]) for row in rows]
+
+
+@cli.command()
+@click.option('--sizes', default='10,1000,50000', help='Comma-separated numbers of requested characters')
+@click.option('--rows', 'n_rows', default=200000, type=int, help='Cached rows (a quarter active and best)')
+def batch(sizes, n_rows):
+    """Batch cache lookups of several sizes, half of them misses."""
+    with temp_client() as client:
+        # four providers per character, one of them best; the others inactive or not best
+        for provider in ('Google', 'OpenAI', 'Anthropic', 'Local'):
+            client.post("/api/characters/cache/bulk", json=make_items(n_rows // 4, provider=provider))
+        conn = sqlite3.connect('zinets_cache.sqlite')
+        with conn:
+            conn.execute("UPDATE character_cache SET is_best = 'N' WHERE llm_provider != 'Google'")
+            conn.execute("UPDATE character_cache SET is_active = 'N' WHERE llm_provider = 'Local'")
+        conn.close()
+
+        click.echo(f"{'requested':>10} {'found':>7} {'missing':>8} {'HTTP ms':>9} {'handler ms':>11} {'legacy ms':>10}")
+        for size in [int(s) for s in sizes.split(',')]:
+            # every other requested character is cached
+            characters = [f"字{i // 2}" if i % 2 else f"无{i}" for i in range(size)]
+            response, http_s = timed(lambda: client.post("/api/characters/cache/batch", json=characters))
+            rows = response.json()
+            assert [row["character"] for row in rows] == characters
+            n_found = sum(row["found"] for row in rows)
+            _, handler_s = timed(lambda: main.get_cached_characters_batch(characters, main.get_db_connection()))
+            try:
+                _, legacy_s = timed(lambda: legacy_batch(characters))
+                legacy = f"{legacy_s * 1000:>10.1f}"
+            except sqlite3.OperationalError as e:
+                legacy = f"{'fails':>10} ({e})"
+            click.echo(f"{size:>10} {n_found:>7} {size - n_found:>8} {http_s * 1000:>9.1f} "
+                       f"{handler_s * 1000:>11.1f} {legacy}")
+
+
+@cli.command()
+@click.option('--characters', 'n_characters', default=20000, type=int, help='Distinct characters')
+@click.option('--history', default=10, type=int, help='Rows per character; all but one inactive or non-best')
+def compact(n_characters, history):
+    """Table size and query latency before and after compaction of a history-heavy cache."""
+    from compact_cache import compact as compact_rows, file_size, table_size, vacuum
+
+    old = '2024-01-01T00:00:00'
+    rows = []
+    for i in range(n_characters):
+        for k in range(history):
+            # the newest row is the active best one; older answers were superseded or deactivated
+            is_best = 'Y' if k == 0 else 'N'
+            is_active = 'Y' if k == 0 or k % 2 else 'N'
+            rows.append((f"字{i}", "zì", "character; word " * 4, "宀 + 子", "汉字 (hàn zì) - Chinese character " * 3,
+                         "Google", f"model-{k}", old if k else '2025-06-01T00:00:00', is_active, is_best))
+
+    def measure(client):
+        characters = [f"字{i}" for i in range(0, n_characters, max(1, n_characters // 1000))]
+        page = "/api/characters?is_active=Y&is_best=Y&page_size=50&count=none"
+        return {
+            'list page': timed(lambda: client.get(page), 5)[1],
+            'list + exact count': timed(lambda: client.get(page.replace('none', 'exact')), 5)[1],
+            'meaning search': timed(lambda: client.get("/api/characters?meaning=nothing&count=none"), 5)[1],
+            f'batch of {len(characters)}': timed(lambda: client.post("/api/characters/cache/batch",
+                                                                      json=characters), 5)[1],
+            'stats': timed(lambda: client.get("/api/cache/stats"), 5)[1],
+        }
+
+    with temp_client() as client:
+        conn = sqlite3.connect('zinets_cache.sqlite')
+        with conn:
+            conn.executemany(f"INSERT INTO character_cache VALUES ({','.join('?' * 10)})", rows)
+        conn.execute('ANALYZE')
+        click.echo(f"auto_vacuum {conn.execute('PRAGMA auto_vacuum').fetchone()[0]} (2: incremental)")
+        before_rows, before_size = table_size(conn)
+        before_file = file_size(conn)
+        before = measure(client)
+
+        moved, compact_s = timed(lambda: compact_rows(conn, retention_days=30, archive_db='archive.sqlite'))
+        _, vacuum_s = timed(lambda: vacuum(conn))
+        conn.execute('ANALYZE')
+        after_rows, after_size = table_size(conn)
+        after_file = file_size(conn)
+        after = measure(client)
+        conn.close()
+
+    mb = 1024 * 1024
+    click.echo(f"archived {moved} rows in {compact_s:.1f} s, incremental vacuum {vacuum_s:.2f} s")
+    click.echo(f"{'':<22} {'before':>10} {'after':>10}")
+    click.echo(f"{'rows':<22} {before_rows:>10} {after_rows:>10}")
+    if before_size is not None:
+        click.echo(f"{'table + indexes MB':<22} {before_size / mb:>10.1f} {after_size / mb:>10.1f}")
+    click.echo(f"{'database file MB':<22} {before_file / mb:>10.1f} {after_file / mb:>10.1f}")
+    for name in before:
+        click.echo(f"{name + ' ms':<22} {before[name] * 1000:>10.1f} {after[name] * 1000:>10.1f}")
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))] if values else 0.0
+
+
+def write_burst(n_writers, n_readers, n_writes):
+    """
+    `n_writers` threads each caching `n_writes` characters through the
+    handler while `n_readers` threads look up cached ones; returns write and
+    read latencies in seconds and the elapsed time.
+    """
+    write_s, read_s = [], []
+    done = threading.Event()
+
+    def writer(w):
+        for item in make_items(n_writes, offset=w * n_writes):
+            ts_start = time.perf_counter()
+            main.cache_character(main.CharacterCreate(**item), main.get_db_connection())
+            write_s.append(time.perf_counter() - ts_start)
+
+    def reader():
+        i = 0
+        while not done.is_set():
+            ts_start = time.perf_counter()
+            try:
+                main.get_cached_character(f"字{i % 1000}", main.get_db_connection())
+            except main.HTTPException:
+                pass            # not written yet
+            read_s.append(time.perf_counter() - ts_start)
+            i += 1
+
+    readers = [threading.Thread(target=reader) for _ in range(n_readers)]
+    writers = [threading.Thread(target=writer, args=(w,)) for w in range(n_writers)]
+    ts_start = time.perf_counter()
+    for thread in readers + writers:
+        thread.start()
+    for thread in writers:
+        thread.join()
+    main.cache_writer.flush()
+    elapsed = time.perf_counter() - ts_start
+    done.set()
+    for thread in readers:
+        thread.join()
+    return write_s, read_s, elapsed
+
+
+@cli.command()
+@click.option('--writers', 'n_writers', default=8, type=int, help='Concurrent writing threads')
+@click.option('--readers', 'n_readers', default=4, type=int, help='Concurrent reading threads')
+@click.option('--writes', 'n_writes', default=500, type=int, help='Characters cached per writer')
+def writes(n_writers, n_readers, n_writes):
+    """A write burst with concurrent reads, synchronous commits vs the batching cache writer with WAL."""
+    click.echo(f"{'mode':<22} {'writes/s':>9} {'write p50 ms':>13} {'write p99 ms':>13} "
+               f"{'read p50 ms':>12} {'read p99 ms':>12} {'commits':>8} {'batch':>6}")
+    for label, write_behind in (("synchronous, rollback", False), ("batched, WAL", True)):
+        main.cache_writer = main.CacheWriter(main.DB_PATH, main.WRITE_MAX_LATENCY, main.WRITE_BATCH_SIZE,
+                                             enabled=write_behind, on_commit=main._count_cache.clear)
+        with temp_client():
+            if not write_behind:
+                main.close_pools()     # the journal mode changes only without other connections
+                conn = sqlite3.connect('zinets_cache.sqlite')
+                conn.execute('PRAGMA journal_mode = DELETE')
+                conn.close()
+            write_s, read_s, elapsed = write_burst(n_writers, n_readers, n_writes)
+            stats = main.cache_writer.stats()
+        click.echo(f"{label:<22} {len(write_s) / elapsed:>9.0f} {percentile(write_s, 50) * 1000:>13.2f} "
+                   f"{percentile(write_s, 99) * 1000:>13.2f} {percentile(read_s, 50) * 1000:>12.2f} "
+                   f"{percentile(read_s, 99) * 1000:>12.2f} {stats['commits']:>8} {stats['mean_batch_size']:>6.1f}")
+
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,226 @@
+"""
+    Compaction of the character cache.
+
+    Deactivating or clearing characters only marks rows is_active = 'N', and
+    new LLM answers leave the older ones behind with is_best = 'N'; nothing
+    removed them, so the table and every scan of it kept growing. This job
+    moves those cold rows, once older than the retention period, to the
+    `character_cache_archive` table (in the same database or a separate
+    archive file) and deletes them from `character_cache`, in batches of
+    short transactions so API readers and writers are held up only briefly.
+    The statistics triggers see the deletes, so /api/cache/stats stays exact.
+
+    With WAL, a transaction across two database files is not atomic (each
+    file commits on its own), so with a separate archive file each batch is
+    copied and committed there first, and only rows with an identical copy
+    in the archive are then deleted; rows changed in between stay in the
+    cache, and a batch interrupted between the two steps is not copied twice.
+
+    Freed pages are then returned to the file system with
+    `PRAGMA incremental_vacuum`. A database created before auto_vacuum was
+    configured needs one `--full-vacuum` to switch it to incremental mode.
+
+Usages:
+    $ python compact_cache.py --dry-run                     # what would be archived
+    $ python compact_cache.py --retention-days 30
+    $ python compact_cache.py --archive-db zinets_cache_archive.sqlite
+    $ python compact_cache.py --retention-days 0 --full-vacuum
+"""
+
+import sqlite3
+import time
+from datetime import datetime, timedelta
+
+import click
+
+
+DB_PATH = 'zinets_cache.sqlite'
+DEFAULT_RETENTION_DAYS = 30
+DEFAULT_BATCH_SIZE = 2000       # rows moved per transaction
+
+COLD_ROWS = "(is_active = 'N' OR is_best = 'N')"    # matches idx_character_cache_cold_rows
+
+ARCHIVE_TABLE = '''
+CREATE TABLE IF NOT EXISTS {schema}.character_cache_archive (
+    character TEXT,
+    pinyin TEXT,
+    meaning TEXT,
+    composition TEXT,
+    phrases TEXT,
+    llm_provider TEXT,
+    llm_model_name TEXT,
+    timestamp TEXT,
+    is_active TEXT,
+    is_best TEXT,
+    archived_at TEXT
+)
+'''
+
+ARCHIVE_INDEX = '''
+CREATE INDEX IF NOT EXISTS {schema}.idx_character_cache_archive_row
+ON character_cache_archive (character, llm_provider, llm_model_name, timestamp)
+'''
+
+COLUMNS = ('character, pinyin, meaning, composition, phrases, llm_provider, llm_model_name, timestamp, '
+           'is_active, is_best')
+
+# the archive holds an identical copy of cache row c (IS: NULLs match)
+ARCHIVED = ('EXISTS (SELECT 1 FROM archive.character_cache_archive a WHERE '
+            + ' AND '.join(f'a.{column} IS c.{column}' for column in COLUMNS.split(', ')) + ')')
+
+
+def table_size(conn, table='character_cache'):
+    """
+    (rows, bytes) of a table with its indexes; bytes need the dbstat
+    virtual table and are None without it.
+    """
+    rows = conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+    try:
+        size = conn.execute('''
+        SELECT SUM(pgsize) FROM dbstat
+        WHERE name = ? OR name IN (SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = ?)
+        ''', (table, table)).fetchone()[0]
+    except sqlite3.OperationalError:
+        size = None
+    return rows, size
+
+
+def file_size(conn):
+    page_size = conn.execute('PRAGMA page_size').fetchone()[0]
+    return conn.execute('PRAGMA page_count').fetchone()[0] * page_size
+
+
+def count_cold_rows(conn, cutoff):
+    return conn.execute(f'SELECT COUNT(*) FROM character_cache WHERE {COLD_ROWS} AND timestamp < ?',
+                        (cutoff,)).fetchone()[0]
+
+
+def compact(conn, retention_days=DEFAULT_RETENTION_DAYS, archive_db=None, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Move cold rows older than `retention_days` to the archive table, one
+    batch per transaction. Returns the number of rows moved.
+    """
+    schema = 'main'
+    if archive_db:
+        conn.execute('ATTACH DATABASE ? AS archive', (archive_db,))
+        schema = 'archive'
+    conn.execute(ARCHIVE_TABLE.format(schema=schema))
+    if archive_db:
+        conn.execute(ARCHIVE_INDEX.format(schema=schema))
+    conn.commit()
+
+    cutoff = (datetime.now() - timedelta(days=retention_days)).isoformat()
+    archived_at = datetime.now().isoformat()
+    moved = 0
+    try:
+        while True:
+            if archive_db:
+                batch = _move_to_archive_db(conn, cutoff, archived_at, batch_size)
+                if batch is None:
+                    break
+                moved += batch
+                continue
+            with conn:
+                # take the write lock first: selected rows cannot be reactivated before they move
+                conn.execute('BEGIN IMMEDIATE')
+                rowids = _cold_rowids(conn, cutoff, batch_size)
+                if not rowids:
+                    break
+                placeholders = ','.join('?' * len(rowids))
+                conn.execute(f'''
+                INSERT INTO {schema}.character_cache_archive
+                SELECT {COLUMNS}, ? FROM character_cache WHERE rowid IN ({placeholders})
+                ''', [archived_at, *rowids])
+                conn.execute(f'DELETE FROM character_cache WHERE rowid IN ({placeholders})', rowids)
+            moved += len(rowids)
+    finally:
+        if archive_db:
+            conn.execute('DETACH DATABASE archive')
+    return moved
+
+
+def _cold_rowids(conn, cutoff, batch_size):
+    return [rowid for (rowid,) in conn.execute(f'''
+    SELECT rowid FROM character_cache WHERE {COLD_ROWS} AND timestamp < ? LIMIT ?
+    ''', (cutoff, batch_size))]
+
+
+def _move_to_archive_db(conn, cutoff, archived_at, batch_size):
+    """
+    One batch to the attached archive: copy and commit, then delete the
+    rows whose copy is there. Returns the rows deleted, None when done.
+    """
+    rowids = _cold_rowids(conn, cutoff, batch_size)
+    if not rowids:
+        return None
+    placeholders = ','.join('?' * len(rowids))
+    with conn:
+        conn.execute(f'''
+        INSERT INTO archive.character_cache_archive
+        SELECT {COLUMNS}, ? FROM character_cache c WHERE rowid IN ({placeholders}) AND NOT {ARCHIVED}
+        ''', [archived_at, *rowids])
+    with conn:
+        conn.execute('BEGIN IMMEDIATE')
+        # rows reactivated or rewritten since the copy no longer match it and stay
+        return conn.execute(f'''
+        DELETE FROM character_cache AS c
+        WHERE rowid IN ({placeholders}) AND {COLD_ROWS} AND timestamp < ? AND {ARCHIVED}
+        ''', [*rowids, cutoff]).rowcount
+
+
+def vacuum(conn, full=False):
+    """
+    Return free pages to the file system: incrementally when auto_vacuum is
+    INCREMENTAL, or with `full` by rebuilding the file, which also switches
+    it to incremental auto_vacuum. False if nothing could be done.
+    """
+    if full:
+        conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+        conn.execute('VACUUM')
+        return True
+    if conn.execute('PRAGMA auto_vacuum').fetchone()[0] == 2:      # INCREMENTAL
+        # executescript steps the pragma to completion; execute() would free a single page
+        conn.executescript('PRAGMA incremental_vacuum;')
+        return True
+    return False
+
+
+@click.command()
+@click.option('--db', 'db_path', default=DB_PATH, type=click.Path(exists=True, dir_okay=False),
+              help=f'Cache database (default: {DB_PATH})')
+@click.option('--retention-days', default=DEFAULT_RETENTION_DAYS, type=float,
+              help=f'Keep inactive and non-best rows this long (default: {DEFAULT_RETENTION_DAYS})')
+@click.option('--archive-db', type=click.Path(dir_okay=False),
+              help='Archive to character_cache_archive in this file instead of the cache database')
+@click.option('--batch-size', default=DEFAULT_BATCH_SIZE, type=int, help='Rows moved per transaction')
+@click.option('--full-vacuum', is_flag=True, help='Rebuild the file with VACUUM (locks it while running)')
+@click.option('--dry-run', is_flag=True, help='Only report what would be archived')
+def main(db_path, retention_days, archive_db, batch_size, full_vacuum, dry_run):
+    """
+    Archive inactive and non-best cache rows past the retention period.
+    """
+    conn = sqlite3.connect(db_path, timeout=30)
+    try:
+        rows, size = table_size(conn)
+        cutoff = (datetime.now() - timedelta(days=retention_days)).isoformat()
+        cold = count_cold_rows(conn, cutoff)
+        click.echo(f"character_cache: {rows} rows"
+                   + (f", {size / 1024 / 1024:.1f} MB with indexes" if size is not None else "")
+                   + f"; {cold} inactive or non-best rows older than {retention_days:g} days")
+        if dry_run:
+            return
+
+        before = file_size(conn)
+        ts_start = time.perf_counter()
+        moved = compact(conn, retention_days, archive_db, batch_size)
+        vacuumed = vacuum(conn, full_vacuum)
+        click.echo(f"Archived {moved} rows to {archive_db or db_path} in {time.perf_counter() - ts_start:.1f} s; "
+                   f"file {before / 1024 / 1024:.1f} MB -> {file_size(conn) / 1024 / 1024:.1f} MB")
+        if not vacuumed:
+            click.echo("auto_vacuum is not incremental here; run once with --full-vacuum to return freed space.")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
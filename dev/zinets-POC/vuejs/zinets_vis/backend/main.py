@@ -1,10 +1,19 @@
+import base64
+import json
+import os
 import sqlite3
+import sys
+from pathlib import Path
 from fastapi import FastAPI, HTTPException, Query, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import Optional, List
 from datetime import datetime
 
+# the shared data-access package lives in <repo>/src
+sys.path.insert(0, str(Path(__file__).resolve().parents[5] / "src"))
+from zinets_db import CacheWriter, TTLCache, close_pools, get_pool, queries, read_cache_stats, setup_cache_db
+
 # Create FastAPI app
 app = FastAPI(title="Chinese Character API")
 
@@ -18,10 +27,11 @@ app.add_middleware(
 )
 
 # Database connection
+DB_PATH = 'zinets_cache.sqlite'
+
 def get_db_connection():
-    conn = sqlite3.connect('zinets_cache.sqlite')
-    conn.row_factory = sqlite3.Row
-    return conn
+    # a pooled connection; close() returns it to the pool
+    return get_pool(DB_PATH, row_factory=sqlite3.Row).get()
 
 # Pydantic models
 class CharacterBase(BaseModel):
@@ -48,6 +58,7 @@ class CharacterCache(BaseModel):
     meaning: Optional[str] = None
     composition: Optional[str] = None
     phrases: Optional[str] = None
+    found: bool = True
 
 class CacheStats(BaseModel):
     total_characters: int
@@ -57,6 +68,17 @@ class CacheStats(BaseModel):
 
 
 
+class BulkCacheItem(BaseModel):
+    character: str
+    llm_provider: str
+    llm_model_name: str
+    status: str
+
+class BulkCacheResponse(BaseModel):
+    inserted: int
+    updated: int
+    items: List[BulkCacheItem]
+
 class CharacterUpdate(BaseModel):
     pinyin: Optional[str] = None
     meaning: Optional[str] = None
@@ -68,33 +90,105 @@ class CharacterUpdate(BaseModel):
 
 class CharacterResponse(BaseModel):
     items: List[Character]
-    total: int
+    total: Optional[int] = None
+    total_is_estimate: bool = False
+    next_cursor: Optional[str] = None
 
 # Initialize database
 @app.on_event("startup")
 def startup_db_client():
+    # Schema, indexes, statistics triggers, WAL and auto_vacuum (zinets_db.schema)
     conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    # Create table if it doesn't exist
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS character_cache (
-        character TEXT,
-        pinyin TEXT,
-        meaning TEXT,
-        composition TEXT,
-        phrases TEXT,
-        llm_provider TEXT,
-        llm_model_name TEXT,
-        timestamp TEXT,
-        is_active TEXT DEFAULT 'Y',
-        is_best TEXT DEFAULT 'Y',
-        PRIMARY KEY (character, llm_provider, llm_model_name)
-    )
-    ''')
-    
-    conn.commit()
+    setup_cache_db(conn)
     conn.close()
+    
+    cache_writer.start()
+
+@app.on_event("shutdown")
+def shutdown_db_client():
+    # Everything accepted is committed before the process exits
+    cache_writer.stop()
+    close_pools()
+
+# Query helpers
+COUNT_CACHE_TTL = 60          # seconds a cached total is reused
+_count_cache = TTLCache(COUNT_CACHE_TTL)    # (where clause, params) -> total
+
+def prefix_range(prefix):
+    """
+    Bounds [low, high) of the strings starting with `prefix`, so a prefix
+    match is an index range instead of a LIKE scan. `high` is None when
+    there is no upper bound (a prefix of U+10FFFF only).
+    """
+    # the last code point has no successor: bump the character before it
+    stem = prefix.rstrip(chr(sys.maxunicode))
+    if not stem:
+        return prefix, None
+    return prefix, stem[:-1] + chr(ord(stem[-1]) + 1)
+
+def encode_cursor(row):
+    key = [row["character"], row["llm_provider"], row["llm_model_name"]]
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode()
+
+def decode_cursor(cursor):
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(key, list) or len(key) != 3:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return key
+
+def count_rows(cursor, where, params, mode):
+    """
+    Total rows matching `where`: (total, is_estimate). 'cached' reuses a
+    count of the same filters for COUNT_CACHE_TTL seconds, 'none' skips it.
+    """
+    if mode == "none":
+        return None, False
+    key = (where, tuple(params))
+    if mode == "cached":
+        cached = _count_cache.get(key)
+        if cached is not None:
+            return cached, True
+    cursor.execute(f"SELECT COUNT(*) FROM character_cache WHERE {where}", params)
+    total = cursor.fetchone()[0]
+    _count_cache.set(key, total)
+    return total, False
+
+# Batched cache writes (zinets_db.writer): concurrent writes share one
+# transaction and a handler answers with its write's real outcome. Handlers
+# wait for the commit, so the writer does not hold a batch open for more
+# (WRITE_MAX_LATENCY 0): writes queued during one commit go in the next
+WRITE_BEHIND = os.environ.get("ZINETS_WRITE_BEHIND", "1") != "0"
+WRITE_MAX_LATENCY = float(os.environ.get("ZINETS_WRITE_MAX_LATENCY", "0"))      # seconds a batch waits for more writes
+WRITE_BATCH_SIZE = int(os.environ.get("ZINETS_WRITE_BATCH_SIZE", "500"))        # writes per transaction
+WRITE_TIMEOUT = 30            # seconds a handler waits for its write to commit
+
+cache_writer = CacheWriter(DB_PATH, WRITE_MAX_LATENCY, WRITE_BATCH_SIZE, WRITE_BEHIND, on_commit=_count_cache.clear)
+
+def write(key, sql, params, exists_detail=None):
+    """
+    Submit a write to cache_writer and wait until it is committed. A
+    constraint violation is a 400 with `exists_detail` (if given); any
+    other failure is a 503, so nothing is acknowledged that was not
+    committed.
+    """
+    try:
+        cache_writer.submit(key, sql, params).result(timeout=WRITE_TIMEOUT)
+    except sqlite3.IntegrityError:
+        if exists_detail is None:
+            raise HTTPException(status_code=500, detail="Cache write failed")
+        raise HTTPException(status_code=400, detail=exists_detail)
+    except (sqlite3.Error, RuntimeError, TimeoutError) as e:
+        raise HTTPException(status_code=503, detail=f"Cache write failed: {e}")
+
+def flush_writes():
+    """cache_writer.flush(), as a 503 if the writer is stuck or stopped."""
+    try:
+        cache_writer.flush()
+    except (RuntimeError, TimeoutError) as e:
+        raise HTTPException(status_code=503, detail=f"Cache writer unavailable: {e}")
 
 # API Routes
 @app.get("/api/characters", response_model=CharacterResponse)
@@ -104,72 +198,87 @@ def get_characters(
     meaning: Optional[str] = None,
     llm_provider: Optional[str] = None,
     llm_model_name: Optional[str] = None,
-    is_active: Optional[str] = None,
-    is_best: Optional[str] = None,
+    is_active: Optional[str] = Query(None, pattern="^[YN]$"),
+    is_best: Optional[str] = Query(None, pattern="^[YN]$"),
+    match: str = Query("contains", pattern="^(prefix|contains)$"),
     page: int = Query(1, ge=1),
     page_size: int = Query(10, ge=1, le=100),
+    after: Optional[str] = None,
+    count: str = Query("exact", pattern="^(exact|cached|none)$"),
     conn = Depends(get_db_connection)
 ):
+    """
+    List cache rows ordered by (character, llm_provider, llm_model_name).
+
+    Filters match as substrings; with `match=prefix`, `character`, `pinyin`
+    and `llm_model_name` match as prefixes (index ranges) instead, while
+    `meaning` stays a substring match. Pass the returned `next_cursor` as
+    `after` to page without OFFSET; `page` still works but reads every
+    skipped row. `count` selects an exact total (the default), one cached
+    for COUNT_CACHE_TTL seconds (`total_is_estimate` is set when it was
+    reused), or none.
+    """
     cursor = conn.cursor()
     
-    # Build query
-    query = "SELECT * FROM character_cache WHERE 1=1"
-    count_query = "SELECT COUNT(*) FROM character_cache WHERE 1=1"
+    # Build filters
+    conditions = ["1=1"]
     params = []
     
-    # Add filters
-    if character:
-        query += " AND character LIKE ?"
-        count_query += " AND character LIKE ?"
-        params.append(f"%{character}%")
-    
-    if pinyin:
-        query += " AND pinyin LIKE ?"
-        count_query += " AND pinyin LIKE ?"
-        params.append(f"%{pinyin}%")
+    for column, value in (("character", character), ("pinyin", pinyin), ("llm_model_name", llm_model_name)):
+        if not value:
+            continue
+        if match == "prefix":
+            low, high = prefix_range(value)
+            conditions.append(f"{column} >= ?")
+            params.append(low)
+            if high is not None:
+                conditions.append(f"{column} < ?")
+                params.append(high)
+        else:
+            conditions.append(f"{column} LIKE ?")
+            params.append(f"%{value}%")
     
     if meaning:
-        query += " AND meaning LIKE ?"
-        count_query += " AND meaning LIKE ?"
+        conditions.append("meaning LIKE ?")
         params.append(f"%{meaning}%")
     
     if llm_provider:
-        query += " AND llm_provider = ?"
-        count_query += " AND llm_provider = ?"
+        conditions.append("llm_provider = ?")
         params.append(llm_provider)
     
-    if llm_model_name:
-        query += " AND llm_model_name LIKE ?"
-        count_query += " AND llm_model_name LIKE ?"
-        params.append(f"%{llm_model_name}%")
-    
+    # Flags go in as literals (validated Y/N) so the planner can match the
+    # partial indexes on active and best rows
     if is_active:
-        query += " AND is_active = ?"
-        count_query += " AND is_active = ?"
-        params.append(is_active)
+        conditions.append(f"is_active = '{is_active}'")
     
     if is_best:
-        query += " AND is_best = ?"
-        count_query += " AND is_best = ?"
-        params.append(is_best)
-    
-    # Add pagination
-    query += " ORDER BY character LIMIT ? OFFSET ?"
-    params.extend([page_size, (page - 1) * page_size])
-    
-    # Execute queries
-    cursor.execute(count_query, params[:-2] if params else [])
-    total_count = cursor.fetchone()[0]
-    
-    cursor.execute(query, params)
+        conditions.append(f"is_best = '{is_best}'")
+    
+    where = " AND ".join(conditions)
+    total_count, total_is_estimate = count_rows(cursor, where, params, count)
+    
+    # Keyset pagination after the cursor, else OFFSET for page numbers;
+    # one extra row tells whether there is a next page
+    query = f"SELECT * FROM character_cache WHERE {where}"
+    page_params = list(params)
+    if after:
+        query += " AND (character, llm_provider, llm_model_name) > (?, ?, ?)"
+        page_params.extend(decode_cursor(after))
+        offset = 0
+    else:
+        offset = (page - 1) * page_size
+    query += " ORDER BY character, llm_provider, llm_model_name LIMIT ? OFFSET ?"
+    page_params.extend([page_size + 1, offset])
+    
+    cursor.execute(query, page_params)
     rows = cursor.fetchall()
-    
-    # Convert to list of dictionaries
-    characters = [dict(row) for row in rows]
-    
     conn.close()
     
-    return {"items": characters, "total": total_count}
+    next_cursor = encode_cursor(rows[page_size - 1]) if len(rows) > page_size else None
+    characters = [dict(row) for row in rows[:page_size]]
+    
+    return {"items": characters, "total": total_count, "total_is_estimate": total_is_estimate,
+            "next_cursor": next_cursor}
 
 @app.get("/api/characters/{character}/{llm_provider}/{llm_model_name}", response_model=Character)
 def get_character(
@@ -180,7 +289,7 @@ def get_character(
 ):
     cursor = conn.cursor()
     cursor.execute(
-        "SELECT * FROM character_cache WHERE character = ? AND llm_provider = ? AND llm_model_name = ?",
+        queries.SELECT_BY_KEY,
         (character, llm_provider, llm_model_name)
     )
     
@@ -198,11 +307,13 @@ def create_character(
     conn = Depends(get_db_connection)
 ):
     cursor = conn.cursor()
+    key = (character.character, character.llm_provider, character.llm_model_name)
     
-    # Check if character already exists
+    # Check if character already exists (fast path; the primary key is what
+    # rejects a duplicate created concurrently)
     cursor.execute(
-        "SELECT * FROM character_cache WHERE character = ? AND llm_provider = ? AND llm_model_name = ?",
-        (character.character, character.llm_provider, character.llm_model_name)
+        queries.SELECT_BY_KEY,
+        key
     )
     
     if cursor.fetchone():
@@ -213,23 +324,20 @@ def create_character(
     if not character.timestamp:
         character.timestamp = datetime.now().isoformat()
     
-    # Insert new character
-    cursor.execute(
-        """
-        INSERT INTO character_cache 
-        (character, pinyin, meaning, composition, phrases, llm_provider, llm_model_name, timestamp, is_active, is_best)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """,
+    conn.close()
+    
+    # Insert new character; returns once it is committed
+    write(
+        key,
+        queries.INSERT,
         (
             character.character, character.pinyin, character.meaning, character.composition,
             character.phrases, character.llm_provider, character.llm_model_name,
             character.timestamp, character.is_active, character.is_best
-        )
+        ),
+        exists_detail="Character already exists"
     )
     
-    conn.commit()
-    conn.close()
-    
     return character
 
 @app.put("/api/characters/{character}/{llm_provider}/{llm_model_name}", response_model=Character)
@@ -241,10 +349,11 @@ def update_character(
     conn = Depends(get_db_connection)
 ):
     cursor = conn.cursor()
+    cache_writer.flush_pending((character, llm_provider, llm_model_name))
     
     # Check if character exists
     cursor.execute(
-        "SELECT * FROM character_cache WHERE character = ? AND llm_provider = ? AND llm_model_name = ?",
+        queries.SELECT_BY_KEY,
         (character, llm_provider, llm_model_name)
     )
     
@@ -274,24 +383,18 @@ def update_character(
     # Add primary key values
     update_values.extend([character, llm_provider, llm_model_name])
     
-    # Execute update
-    cursor.execute(
+    conn.close()
+    
+    # Execute update; returns once it is committed
+    write(
+        (character, llm_provider, llm_model_name),
         f"UPDATE character_cache SET {', '.join(update_fields)} WHERE character = ? AND llm_provider = ? AND llm_model_name = ?",
         update_values
     )
     
-    conn.commit()
-    
-    # Get updated character
-    cursor.execute(
-        "SELECT * FROM character_cache WHERE character = ? AND llm_provider = ? AND llm_model_name = ?",
-        (character, llm_provider, llm_model_name)
-    )
-    
-    updated_char = cursor.fetchone()
-    conn.close()
-    
-    return dict(updated_char)
+    updated_char = dict(existing_char)
+    updated_char.update({key: value for key, value in character_update_dict.items() if value is not None})
+    return updated_char
 
 @app.patch("/api/characters/{character}/{llm_provider}/{llm_model_name}/deactivate")
 def deactivate_character(
@@ -301,27 +404,27 @@ def deactivate_character(
     conn = Depends(get_db_connection)
 ):
     cursor = conn.cursor()
+    cache_writer.flush_pending((character, llm_provider, llm_model_name))
     
     # Check if character exists
     cursor.execute(
-        "SELECT * FROM character_cache WHERE character = ? AND llm_provider = ? AND llm_model_name = ?",
+        queries.SELECT_BY_KEY,
         (character, llm_provider, llm_model_name)
     )
     
     if not cursor.fetchone():
         conn.close()
         raise HTTPException(status_code=404, detail="Character not found")
+    conn.close()
     
-    # Soft delete - set is_active to 'N'
+    # Soft delete - set is_active to 'N'; returns once it is committed
     timestamp = datetime.now().isoformat()
-    cursor.execute(
-        "UPDATE character_cache SET is_active = 'N', timestamp = ? WHERE character = ? AND llm_provider = ? AND llm_model_name = ?",
+    write(
+        (character, llm_provider, llm_model_name),
+        queries.DEACTIVATE_BY_KEY,
         (timestamp, character, llm_provider, llm_model_name)
     )
     
-    conn.commit()
-    conn.close()
-    
     return {"message": "Character deactivated successfully"}
 
 # Endpoint 1: Check if character exists in cache (for LLM optimization)
@@ -333,13 +436,7 @@ def get_cached_character(character: str, conn = Depends(get_db_connection)):
     """
     cursor = conn.cursor()
     
-    cursor.execute("""
-        SELECT character, pinyin, meaning, composition, phrases 
-        FROM character_cache 
-        WHERE character = ? AND is_active = 'Y' AND is_best = 'Y'
-        ORDER BY timestamp DESC
-        LIMIT 1
-    """, (character,))
+    cursor.execute(queries.SELECT_BEST, (character,))
     
     result = cursor.fetchone()
     conn.close()
@@ -359,35 +456,38 @@ def get_cached_character(character: str, conn = Depends(get_db_connection)):
 @app.post("/api/characters/cache/batch", response_model=List[CharacterCache])
 def get_cached_characters_batch(characters: List[str], conn = Depends(get_db_connection)):
     """
-    Check cache for multiple characters at once.
-    Returns only characters that are found in cache.
+    Check cache for multiple characters at once, any number of them.
+    Returns one entry per distinct requested character, in request order;
+    characters not in cache come back with found = false and no data.
     """
     cursor = conn.cursor()
+    requested = list(dict.fromkeys(characters))
     
-    # Create placeholder string for SQL IN clause
-    placeholders = ','.join('?' * len(characters))
-    
-    cursor.execute(f"""
-        SELECT character, pinyin, meaning, composition, phrases 
-        FROM character_cache 
-        WHERE character IN ({placeholders}) 
-        AND is_active = 'Y' AND is_best = 'Y'
-        ORDER BY character
-    """, characters)
+    # Lookups go by chunks of queries.BATCH_CHUNK_SIZE, under SQLite's limit
+    # on bound variables; each chunk is a search of idx_character_cache_best_rows
+    found = {}
+    for chunk in queries.chunked(requested):
+        cursor.execute(queries.select_best_in(len(chunk)), chunk)
+        # later rows win, so each character keeps its newest entry
+        for row in cursor.fetchall():
+            found[row[0]] = row
     
-    results = cursor.fetchall()
     conn.close()
     
-    return [
-        CharacterCache(
-            character=row[0],
-            pinyin=row[1],
-            meaning=row[2],
-            composition=row[3],
-            phrases=row[4]
-        )
-        for row in results
-    ]
+    results = []
+    for character in requested:
+        row = found.get(character)
+        if row is None:
+            results.append(CharacterCache(character=character, found=False))
+        else:
+            results.append(CharacterCache(
+                character=row[0],
+                pinyin=row[1],
+                meaning=row[2],
+                composition=row[3],
+                phrases=row[4]
+            ))
+    return results
 
 # Endpoint 3: Add character to cache (after LLM call)
 @app.post("/api/characters/cache", response_model=dict)
@@ -401,89 +501,85 @@ def cache_character(character_data: CharacterCreate, conn = Depends(get_db_conne
     # Set timestamp
     character_data.timestamp = datetime.now().isoformat()
     
-    try:
-        # Try to insert new character
-        cursor.execute('''
-            INSERT INTO character_cache 
-            (character, pinyin, meaning, composition, phrases, llm_provider, llm_model_name, timestamp, is_active, is_best)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, 'Y', 'Y')
-        ''', (
-            character_data.character,
-            character_data.pinyin,
-            character_data.meaning,
-            character_data.composition,
-            character_data.phrases,
-            character_data.llm_provider,
-            character_data.llm_model_name,
-            character_data.timestamp
-        ))
-        
-        conn.commit()
-        conn.close()
-        
-        return {"message": "Character cached successfully", "character": character_data.character}
-        
-    except sqlite3.IntegrityError:
-        # Character already exists, update timestamp
-        cursor.execute('''
-            UPDATE character_cache 
-            SET timestamp = ?, is_active = 'Y'
-            WHERE character = ? AND llm_provider = ? AND llm_model_name = ?
-        ''', (
-            character_data.timestamp,
-            character_data.character,
-            character_data.llm_provider,
-            character_data.llm_model_name
-        ))
-        
-        conn.commit()
-        conn.close()
-        
+    key = (character_data.character, character_data.llm_provider, character_data.llm_model_name)
+    cache_writer.flush_pending(key)
+    cursor.execute(queries.EXISTS_BY_KEY, key)
+    exists = cursor.fetchone() is not None
+    conn.close()
+    
+    # Insert new character, or refresh the timestamp of an existing one
+    write(key, queries.UPSERT_REFRESH, (
+        character_data.character,
+        character_data.pinyin,
+        character_data.meaning,
+        character_data.composition,
+        character_data.phrases,
+        character_data.llm_provider,
+        character_data.llm_model_name,
+        character_data.timestamp
+    ))
+    
+    if exists:
         return {"message": "Character cache updated", "character": character_data.character}
+    return {"message": "Character cached successfully", "character": character_data.character}
 
-# Endpoint 4: Get cache statistics
-@app.get("/api/cache/stats", response_model=CacheStats)
-def get_cache_statistics(conn = Depends(get_db_connection)):
+# Endpoint 3b: Add many characters to cache in one transaction (enrichment jobs)
+@app.post("/api/characters/cache/bulk", response_model=BulkCacheResponse)
+def cache_characters_bulk(characters: List[CharacterCreate], conn = Depends(get_db_connection)):
     """
-    Get statistics about the character cache.
+    Add or refresh many cached characters with one upsert and one commit.
+    Same semantics per item as POST /api/characters/cache: new rows are
+    inserted active and best, existing ones get a new timestamp and are
+    reactivated. Each item's status is "inserted" or "updated".
     """
     cursor = conn.cursor()
+    timestamp = datetime.now().isoformat()
+    keys = [(c.character, c.llm_provider, c.llm_model_name) for c in characters]
+    flush_writes()          # queued single writes commit first, in order
+    
+    # BEGIN IMMEDIATE takes the write lock first, so the existing keys read
+    # below cannot change before the upsert
+    cursor.execute("BEGIN IMMEDIATE")
+    existing = set()
+    distinct_characters = sorted({key[0] for key in keys})
+    for chunk in queries.chunked(distinct_characters):
+        cursor.execute(queries.select_keys_in(len(chunk)), chunk)
+        existing.update(tuple(row) for row in cursor.fetchall())
+    
+    cursor.executemany(queries.UPSERT_REFRESH, [
+        (c.character, c.pinyin, c.meaning, c.composition, c.phrases, c.llm_provider, c.llm_model_name, timestamp)
+        for c in characters
+    ])
     
-    # Total characters
-    cursor.execute("SELECT COUNT(*) FROM character_cache")
-    total_count = cursor.fetchone()[0]
+    conn.commit()
+    _count_cache.clear()
+    conn.close()
     
-    # Active characters
-    cursor.execute("SELECT COUNT(*) FROM character_cache WHERE is_active = 'Y'")
-    active_count = cursor.fetchone()[0]
-    
-    # Provider distribution
-    cursor.execute("""
-        SELECT llm_provider, COUNT(*) 
-        FROM character_cache 
-        WHERE is_active = 'Y' 
-        GROUP BY llm_provider
-    """)
-    providers = dict(cursor.fetchall())
-    
-    # Last updated
-    cursor.execute("""
-        SELECT timestamp 
-        FROM character_cache 
-        WHERE is_active = 'Y' 
-        ORDER BY timestamp DESC 
-        LIMIT 1
-    """)
-    result = cursor.fetchone()
-    last_updated = result[0] if result else None
+    # a key repeated within the request is inserted once, then updated
+    items = []
+    for key in keys:
+        items.append({"character": key[0], "llm_provider": key[1], "llm_model_name": key[2],
+                      "status": "updated" if key in existing else "inserted"})
+        existing.add(key)
+    inserted = sum(item["status"] == "inserted" for item in items)
     
+    return {"inserted": inserted, "updated": len(items) - inserted, "items": items}
+
+# Endpoint 4: Get cache statistics
+@app.get("/api/cache/stats", response_model=CacheStats)
+def get_cache_statistics(conn = Depends(get_db_connection)):
+    """
+    Get statistics about the character cache from the trigger-maintained
+    character_cache_stats table.
+    """
+    stats = read_cache_stats(conn)
     conn.close()
     
     return CacheStats(
-        total_characters=total_count,
-        active_characters=active_count,
-        providers=providers,
-        last_updated=last_updated
+        total_characters=stats['total'],
+        active_characters=stats['active'],
+        providers=stats['providers'],
+        last_updated=stats['last_updated']
     )
 
 # Endpoint 5: Clear cache (soft delete)
@@ -493,6 +589,7 @@ def clear_character_cache(conn = Depends(get_db_connection)):
     Clear all cached characters by marking them as inactive.
     """
     cursor = conn.cursor()
+    flush_writes()          # queued writes commit first, so they are cleared too
     
     cursor.execute("""
         UPDATE character_cache 
@@ -502,6 +599,7 @@ def clear_character_cache(conn = Depends(get_db_connection)):
     
     affected_rows = cursor.rowcount
     conn.commit()
+    _count_cache.clear()
     conn.close()
     
     return {"message": f"Cache cleared. {affected_rows} characters marked as inactive."}
@@ -520,6 +618,14 @@ def zinets_health_check():
     }
 
 
+# Endpoint 7: Cache writer metrics
+@app.get("/api/cache/writes")
+def cache_write_metrics():
+    """
+    Queue depth and commit batch sizes of the cache writer.
+    """
+    return cache_writer.stats()
+
 # Run the application with: uvicorn main:app --reload
 if __name__ == "__main__":
     import uvicorn
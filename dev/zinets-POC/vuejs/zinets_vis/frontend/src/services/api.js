@@ -60,8 +60,9 @@ export const cacheAPI = {
   // Check multiple characters at once
   async getCharactersBatch(characters) {
     try {
-      const response = await api.post('/characters/cache/batch', { characters })
-      return response.data.characters || []
+      // the endpoint takes and returns plain lists, one row per distinct character
+      const response = await api.post('/characters/cache/batch', characters)
+      return response.data || []
     } catch (error) {
       throw new Error(`Failed to get characters batch from cache: ${error.message}`)
     }
@@ -76,8 +76,10 @@ export class CacheService {
       try {
         const cachedData = await cacheAPI.getCharactersBatch(missingCharacters)
         
-        // Process and add to both result and memory cache
+        // Process and add to both result and memory cache; characters not
+        // in the backend cache come back as rows with found: false
         for (const data of cachedData) {
+          if (data.found === false) continue
           const processedData = this.processBackendData(data)
           result[data.character] = { ...processedData, cached: true }
           this.memoryCache.set(data.character, processedData)
@@ -85,8 +87,7 @@ export class CacheService {
         }
 
         // Count misses for characters not found in backend
-        const foundCharacters = cachedData.map(d => d.character)
-        const stillMissing = missingCharacters.filter(char => !foundCharacters.includes(char))
+        const stillMissing = missingCharacters.filter(char => !(char in result))
         this.cacheMisses += stillMissing.length
 
       } catch (error) {
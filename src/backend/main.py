@@ -1,9 +1,14 @@
-import time
-import functools
-from typing import Any, Callable, Dict, Optional, Tuple, Union
-from fastapi import FastAPI, UploadFile, Query
+import base64
+import json
+import os
+import sys
+from pathlib import Path
+from fastapi import FastAPI, HTTPException, UploadFile, Query, Request, Response
 import pandas as pd
-import sqlite3
+
+# the shared data-access package lives next to this directory, in src/
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from zinets_db import get_pool, setup_zi_db, ttl_cache
 
 app = FastAPI()
 
@@ -11,7 +16,7 @@ CFG = {
     "DEBUG_FLAG" : True, # False, # 
     "SQL_EXECUTION_FLAG" : True, #  False, #   control SQL
 
-    "DB_FILENAME" : r"C:\Users\p2p2l\projects\wgong\zistory\zinets\app\zadmin\zi.sqlite",
+    "DB_FILENAME" : os.environ.get("ZI_DB", r"C:\Users\p2p2l\projects\wgong\zistory\zinets\app\zadmin\zi.sqlite"),
 
     # assign table names
     "TABLE_ZI" : "t_zi",            # all Zi 字
@@ -27,9 +32,49 @@ LIMIT_BY_CLAUSE = " " if limit_by_size < 0 else f" limit {limit_by_size} "
 ZI_MATRIX_COLS = ("zi_left_up", "zi_left", 'zi_left_down', 'zi_up', 'zi_mid', 'zi_down', 'zi_right_up', 'zi_right', 'zi_right_down', 'zi_mid_out', 'zi_mid_in')
 
 #############################
+@app.on_event("startup")
+def startup():
+    """add the partial indexes on is_active (zinets_db.schema.ZI_MIGRATIONS), once
+    """
+    if os.path.exists(CFG["DB_FILENAME"]):
+        with get_pool(CFG["DB_FILENAME"]).connection() as conn:
+            setup_zi_db(conn)
+
+
+def db_version(db_file=CFG["DB_FILENAME"]):
+    """ETag of the database content: changes whenever the file or its WAL is written
+    """
+    parts = []
+    for path in (db_file, db_file + "-wal"):
+        try:
+            st = os.stat(path)
+            parts.append(f"{st.st_mtime_ns:x}-{st.st_size:x}")
+        except OSError:
+            parts.append("0")
+    return f'"{".".join(parts)}"'
+
+
+@app.middleware("http")
+async def etag(request: Request, call_next):
+    """GET responses carry the database ETag; a client sending it back in
+    If-None-Match gets 304 Not Modified without the query being run
+    """
+    if request.method != "GET":
+        return await call_next(request)
+    tag = db_version()
+    if request.headers.get("if-none-match") == tag:
+        return Response(status_code=304, headers={"ETag": tag})
+    response = await call_next(request)
+    if response.status_code == 200:
+        response.headers["ETag"] = tag
+    return response
+
+
 class DBConn(object):
+    """pooled connection: close() on exit returns it to the pool
+    """
     def __init__(self, db_file=CFG["DB_FILENAME"]):
-        self.conn = sqlite3.connect(db_file)
+        self.conn = get_pool(db_file).get()
 
     def __enter__(self):
         return self.conn
@@ -74,49 +119,10 @@ def debug_print(msg, debug=CFG["DEBUG_FLAG"]):
         # st.write(f"[DEBUG] {str(msg)}")
         print(f"[DEBUG] {str(msg)}")
 
-def cache_func_with_ttl(ttl: int = 3600):
-    """
-    A decorator that caches function results with a time-to-live (TTL) in seconds.
-    
-    Args:
-        ttl (int): Time-to-live in seconds. Default is 3600 (1 hour).
-    
-    Returns:
-        A decorator function that caches the results of the decorated function.
-    """
-    cache: Dict[Tuple, Dict[str, Any]] = {}
-    
-    def decorator(func: Callable):
-        @functools.wraps(func)
-        def wrapper(*args, **kwargs):
-            # Create a cache key from the function arguments
-            key = (func.__name__, tuple(args), tuple(sorted(kwargs.items())))
-            
-            # Check if we have a cached result and it's still valid
-            if key in cache:
-                result, timestamp = cache[key]['result'], cache[key]['timestamp']
-                if time.time() - timestamp < ttl:
-                    return result
-            
-            # No cache hit or expired cache, call the function
-            result = func(*args, **kwargs)
-            
-            # Store the result in cache
-            cache[key] = {
-                'result': result,
-                'timestamp': time.time()
-            }
-            
-            return result
-        return wrapper
-    return decorator
-
-@cache_func_with_ttl(ttl=3600)  # Cache for 60 minutes
-def count_table(table_name: str = TABLE_ZI):
-    """
-    Get the total count of characters in the t_zi table.
-    Returns the count as an integer.
-    """
+@ttl_cache(ttl=3600)  # Cache for 60 minutes
+def _count_active(table_name: str, version: str):
+    # `version` (db_version) is only part of the cache key: a write to the
+    # database makes a new entry instead of serving the old total
     with DBConn() as _conn:
         cursor = _conn.cursor()
         sql_stmt = f"""
@@ -130,6 +136,13 @@ def count_table(table_name: str = TABLE_ZI):
         total_count = cursor.fetchone()[0]
         return total_count
 
+def count_table(table_name: str = TABLE_ZI):
+    """
+    Get the total count of characters in the t_zi table.
+    Returns the count as an integer, cached until the database changes.
+    """
+    return _count_active(table_name, db_version())
+
 @app.get("/")
 def read_root():
     return {"Hello": "Welcome to ZiNets World"}
@@ -496,6 +509,97 @@ def zi_dict_search(key_word: str):
 
     return res
 
+###======================================================
+### cursor (keyset) pagination: the cost of a page does not grow with its position
+
+def encode_cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+def decode_cursor(cursor):
+    return json.loads(base64.urlsafe_b64decode(cursor.encode()))
+
+def keyset_page(table_name, columns, order_by, after="", limit=50):
+    """Return the active rows of table_name following the cursor `after`, in order_by order,
+    with the cursor of the next page ("" at the end) and the active row count.
+    rowid breaks ties, so rows sharing the order_by values are neither skipped nor repeated.
+    NULL never compares greater than anything, so keys are compared as coalesce(col, ''):
+    rows with a NULL key come with the empty ones (after numbers, before other text).
+    """
+    keys = [f"coalesce({col}, '')" for col in order_by] + ["rowid"]
+    after_clause, params = "", []
+    if after:
+        try:
+            params = decode_cursor(after)
+        except ValueError:
+            params = None
+        if not isinstance(params, list) or len(params) != len(keys):
+            raise HTTPException(status_code=400, detail="invalid cursor")
+        # the bound on the first key lets SQLite seek the expression index; the row value alone is scanned
+        after_clause = f" and {keys[0]} >= ? and ({', '.join(keys)}) > ({', '.join('?' * len(keys))}) "
+        params = params[:1] + params
+
+    with DBConn() as _conn:
+        sql_stmt = f"""
+            select 
+                {columns}
+                , {', '.join(f"{k} as _key_{i}" for i, k in enumerate(keys))}
+            from {table_name}
+            where 1=1
+                and is_active = 'Y'
+                {after_clause}
+            order by {', '.join(keys)}
+            limit ?
+            ;
+        """
+        debug_print(sql_stmt)
+        df = pd.read_sql(sql_stmt, _conn, params=params + [limit + 1])
+
+    key_cols = [f"_key_{i}" for i in range(len(keys))]
+    next_cursor = ""
+    if len(df) > limit:
+        df = df.iloc[:limit]
+        next_cursor = encode_cursor([v.item() if hasattr(v, "item") else v for v in df[key_cols].iloc[-1]])
+    return {
+        "total": count_table(table_name=table_name),
+        "limit": limit,
+        "next": next_cursor,
+        "data": df.drop(columns=key_cols).fillna("").to_dict(orient="records"),
+    }
+
+@app.get("/ele_zi_page/")
+def ele_zi_page(after: str = "", limit: int = Query(50, ge=1, le=500)):
+    """Return a page of Elemental Zi's, by strokes
+    """
+    columns = """zi
+                , pinyin
+                , phono
+                , n_strokes
+                , n_frequency
+                , meaning
+                , category
+                , sub_category
+                , examples
+                , variant
+                , notes
+                , is_radical
+                , is_neted
+                , u_id
+                , is_active"""
+    return keyset_page(TABLE_ELEZI, columns, ("n_strokes", "zi"), after, limit)
+
+@app.get("/zi_part_page/")
+def zi_part_page(after: str = "", limit: int = Query(50, ge=1, le=500)):
+    """Return a page of decomposed (compound) Zi's
+    """
+    columns = ", ".join(("zi",) + ZI_MATRIX_COLS + ("desc_cn", "desc_en", "hsk_note"))
+    return keyset_page(TABLE_ZI_PART, columns, ("zi",), after, limit)
+
+@app.get("/zi_dict_page/")
+def zi_dict_page(after: str = "", limit: int = Query(50, ge=1, le=500)):
+    """Return a page of the Zi dictionary
+    """
+    return keyset_page(TABLE_ZI, "*", ("zi",), after, limit)
+
 ###======================================================
 ### Donot use
 # @app.get("/<end_point>/")
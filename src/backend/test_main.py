@@ -0,0 +1,80 @@
+import contextlib
+import importlib.util
+import io
+import os
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+
+
+def load_backend(db_path):
+    # CFG reads ZI_DB at import
+    os.environ["ZI_DB"] = db_path
+    spec = importlib.util.spec_from_file_location("zi_backend", Path(__file__).resolve().parent / "main.py")
+    backend = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(backend)
+    return backend
+
+
+class TestKeysetPage(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp_dir = tempfile.TemporaryDirectory()
+        cls.db_path = db_path = os.path.join(cls.tmp_dir.name, "zi.sqlite")
+        conn = sqlite3.connect(db_path)
+        conn.execute("CREATE TABLE t_ele_zi (zi, n_strokes, is_active)")
+        with conn:
+            conn.executemany("INSERT INTO t_ele_zi VALUES (?, ?, 'Y')", [
+                ("水", 4), (None, 4), ("火", None), ("木", 4), (None, None), ("", 2), ("土", None), ("口", 3),
+            ])
+            conn.execute("INSERT INTO t_ele_zi VALUES ('日', 4, 'N')")
+        conn.close()
+        cls.backend = load_backend(db_path)
+
+    @classmethod
+    def tearDownClass(cls):
+        from zinets_db import close_pools    # on sys.path once the backend is loaded
+
+        close_pools()
+        cls.tmp_dir.cleanup()
+
+    def pages(self, limit):
+        rows, after = [], ""
+        with contextlib.redirect_stdout(io.StringIO()):     # the backend prints its SQL
+            while True:
+                page = self.backend.keyset_page("t_ele_zi", "zi, n_strokes", ("n_strokes", "zi"), after, limit)
+                rows += [(row["zi"], row["n_strokes"]) for row in page["data"]]
+                after = page["next"]
+                if not after:
+                    return rows
+
+    def test_rows_with_null_keys_are_paged(self):
+        for limit in (1, 2, 3, 50):
+            rows = self.pages(limit)
+            self.assertEqual(len(rows), 8, limit)
+            # NULL strokes and characters come as '', after the numbers
+            self.assertEqual(rows[:5], [("", 2), ("口", 3), ("", 4), ("木", 4), ("水", 4)])
+            self.assertEqual(sorted(rows[5:]), [("", ""), ("土", ""), ("火", "")])
+
+    def test_total_follows_writes(self):
+        def total():
+            with contextlib.redirect_stdout(io.StringIO()):
+                return self.backend.keyset_page("t_ele_zi", "zi", ("zi",), "", 50)["total"]
+
+        self.assertEqual(total(), 8)
+        conn = sqlite3.connect(self.db_path)
+        self.addCleanup(conn.close)
+        with conn:
+            conn.execute("INSERT INTO t_ele_zi VALUES ('金', 8, 'Y'), ('石', 5, 'Y')")
+        try:
+            self.assertEqual(total(), 10)
+        finally:
+            with conn:
+                conn.execute("DELETE FROM t_ele_zi WHERE zi IN ('金', '石')")
+        self.assertEqual(total(), 8)
+
+
+if __name__ == "__main__":
+    unittest.main()
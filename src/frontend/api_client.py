@@ -0,0 +1,107 @@
+"""
+    HTTP client of the ZiNets FastAPI backend, shared by all Streamlit
+    sessions and reruns:
+
+    - one keep-alive `requests.Session` (no TCP connect per call)
+    - responses cached by endpoint and params for `ttl` seconds, then
+      revalidated with the backend ETag (304: the cached value is kept)
+    - `get_many` fetches several endpoints concurrently
+
+Usages:
+    client = ApiClient("http://localhost:8000")
+    df = client.get("/ele_zi_list/", parse=pd.DataFrame)
+    ele_zi, zi_dict = client.get_many([("/ele_zi/日", None), ("/zi_dict/日", None)])
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class ApiClient:
+    """
+    Values returned by `get` are shared between callers: treat them as
+    read-only.
+    """
+
+    def __init__(self, base_url, ttl=300, max_entries=256, timeout=10, max_workers=4):
+        self.base_url = base_url.rstrip("/")
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=max_workers))
+        self.session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=max_workers))
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._entries = {}      # (endpoint, params) -> [value, etag, fetched at]
+        self._lock = threading.Lock()
+        self.metrics = {"hits": 0, "not_modified": 0, "fetched": 0}
+
+    @staticmethod
+    def _key(endpoint, params, parse):
+        return endpoint, tuple(sorted((params or {}).items())), parse
+
+    def get(self, endpoint, params=None, parse=None, cache=True):
+        """
+        JSON of GET `endpoint`, passed through `parse` (e.g. pd.DataFrame)
+        when given; the parsed value is what gets cached, unless `cache` is
+        False. Raises requests.RequestException.
+        """
+        key = self._key(endpoint, params, parse)
+        with self._lock:
+            entry = self._entries.get(key) if cache else None
+        if entry is not None and time.time() - entry[2] < self.ttl:
+            self.metrics["hits"] += 1
+            return entry[0]
+
+        response = self.request(endpoint, params, etag=entry[1] if entry is not None else None)
+        if response.status_code == 304 and entry is not None:
+            self.metrics["not_modified"] += 1
+            entry[2] = time.time()
+            return entry[0]
+
+        self.metrics["fetched"] += 1
+        value = response.json()
+        if parse is not None:
+            value = parse(value)
+        if not cache:
+            return value
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                self._entries.clear()
+            self._entries[key] = [value, response.headers.get("ETag"), time.time()]
+        return value
+
+    def request(self, endpoint, params=None, etag=None):
+        """
+        Uncached GET of `endpoint`, conditional when `etag` is given: the
+        requests.Response (200, or 304 if `etag` is still current). Raises
+        requests.RequestException.
+        """
+        headers = {"If-None-Match": etag} if etag else {}
+        response = self.session.get(f"{self.base_url}{endpoint}", params=params, headers=headers,
+                                    timeout=self.timeout)
+        if response.status_code != 304:
+            response.raise_for_status()
+        return response
+
+    def get_many(self, calls, parse=None):
+        """
+        `get` of each (endpoint, params) in `calls`, concurrently; results
+        in the same order.
+        """
+        futures = [self._executor.submit(self.get, endpoint, params, parse) for endpoint, params in calls]
+        return [future.result() for future in futures]
+
+    def invalidate(self, endpoint=None):
+        """Drop the cached responses of `endpoint` (all of them if None)."""
+        with self._lock:
+            for key in [key for key in self._entries if endpoint is None or key[0] == endpoint]:
+                del self._entries[key]
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+        self.session.close()
@@ -0,0 +1,208 @@
+"""
+    Data time of the Streamlit pages against the FastAPI backend
+    (src/backend/main.py) serving a generated zi.sqlite: page reruns with
+    the former fetch_data (new connection and DataFrame per call) vs
+    ApiClient, and browsing t_zi loaded whole, by offset or by cursor.
+
+Usages:
+    $ python bench_frontend.py rerun --rows 5000 --reruns 50
+    $ python bench_frontend.py paging --rows 200000
+"""
+
+import contextlib
+import importlib.util
+import io
+import os
+import random
+import socket
+import sqlite3
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import click
+import pandas as pd
+import requests
+import uvicorn
+
+from api_client import ApiClient
+from paging import PagedSource
+
+BACKEND = Path(__file__).resolve().parents[1] / "backend" / "main.py"
+
+# the calls of one rerun of a page showing a Zi and its neighbours
+PAGE_CALLS = [
+    ("/ele_zi_list/", None),
+    ("/zi_dict_list/skip=0&limit=50", None),
+    ("/zi_dict/字7", None),
+    ("/zi_matrix_search/子", None),
+]
+
+
+def fill_zi_db(db_path, n_rows):
+    conn = sqlite3.connect(db_path)
+    conn.executescript("""
+        CREATE TABLE t_ele_zi (zi, pinyin, phono, n_strokes, n_frequency, meaning, category, sub_category,
+            examples, variant, notes, is_radical, is_neted, u_id, is_active);
+        CREATE TABLE t_zi (zi, pinyin, alias, traditional, desc_cn, zi_en, desc_en, notes, category, is_active);
+        CREATE TABLE t_zi_part (zi, zi_left_up, zi_left, zi_left_down, zi_up, zi_mid, zi_down, zi_right_up,
+            zi_right, zi_right_down, zi_mid_out, zi_mid_in, desc_cn, desc_en, hsk_note, is_active);
+    """)
+    rnd = random.Random(0)
+    with conn:
+        conn.executemany("INSERT INTO t_ele_zi VALUES (?, 'zì', '', ?, ?, 'character', 'basic', '', '', '', '', "
+                         "'N', 'N', ?, 'Y')",
+                         ((f"字{i}", rnd.randint(1, 20), i, i) for i in range(n_rows)))
+        conn.executemany("INSERT INTO t_zi VALUES (?, 'zì', '', '', '字', 'character', 'a character', '', "
+                         "'basic', 'Y')", ((f"字{i}",) for i in range(n_rows)))
+        conn.executemany("INSERT INTO t_zi_part VALUES (?, '', '宀', '', '', '', '子', '', '', '', '', '', "
+                         "'', '', '', 'Y')", ((f"字{i}",) for i in range(n_rows)))
+    conn.close()
+
+
+def start_backend(db_path):
+    os.environ["ZI_DB"] = db_path
+    spec = importlib.util.spec_from_file_location("zi_backend", BACKEND)
+    backend = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(backend)
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(backend.app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return backend, server, f"http://127.0.0.1:{port}"
+
+
+def timed_ms(func, repeat=1):
+    """Median of `repeat` runs of func, in ms."""
+    runs = []
+    for _ in range(repeat):
+        ts_start = time.perf_counter()
+        func()
+        runs.append((time.perf_counter() - ts_start) * 1000)
+    return sorted(runs)[len(runs) // 2]
+
+
+def per_rerun(rerun, n_reruns):
+    ts_start = time.perf_counter()
+    for _ in range(n_reruns):
+        rerun()
+    return (time.perf_counter() - ts_start) / n_reruns
+
+
+@click.group()
+def cli():
+    """Streamlit frontend benchmarks."""
+
+
+@cli.command()
+@click.option('--rows', 'n_rows', default=5000, type=int, help='Rows of each generated zi.sqlite table')
+@click.option('--reruns', 'n_reruns', default=50, type=int, help='Page reruns timed per variant')
+def rerun(n_rows, n_reruns):
+    """Page rerun data time, former fetch_data vs ApiClient."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, "zi.sqlite")
+        fill_zi_db(db_path, n_rows)
+        with contextlib.redirect_stdout(io.StringIO()):     # the backend prints its SQL
+            _, server, base_url = start_backend(db_path)
+
+            def former():
+                for endpoint, params in PAGE_CALLS:
+                    response = requests.get(f"{base_url}{endpoint}", params=params)
+                    response.raise_for_status()
+                    pd.DataFrame(response.json())
+
+            cold = ApiClient(base_url, ttl=300)
+            revalidating = ApiClient(base_url, ttl=0)
+            cached = ApiClient(base_url, ttl=300)
+            cached.get_many(PAGE_CALLS, parse=pd.DataFrame)
+
+            def first_load():
+                cold.invalidate()
+                cold.get_many(PAGE_CALLS, parse=pd.DataFrame)
+
+            results = [
+                ("former fetch_data (connection per call)", per_rerun(former, n_reruns)),
+                ("ApiClient, first load (concurrent)", per_rerun(first_load, n_reruns)),
+                ("ApiClient, ETag revalidation (304)",
+                 per_rerun(lambda: revalidating.get_many(PAGE_CALLS, parse=pd.DataFrame), n_reruns)),
+                ("ApiClient, rerun within the TTL",
+                 per_rerun(lambda: cached.get_many(PAGE_CALLS, parse=pd.DataFrame), n_reruns)),
+            ]
+            for client in (cold, revalidating, cached):
+                client.close()
+            server.should_exit = True
+
+    click.echo(f"{len(PAGE_CALLS)} calls per rerun, {n_rows} rows per table, {n_reruns} reruns")
+    click.echo(f"{'variant':<42} {'ms/rerun':>9}")
+    for label, seconds in results:
+        click.echo(f"{label:<42} {seconds * 1000:>9.2f}")
+    click.echo(f"revalidation: {revalidating.metrics}")
+
+
+@cli.command()
+@click.option('--rows', 'n_rows', default=200000, type=int, help='Rows of each generated zi.sqlite table')
+@click.option('--page-size', default=50, type=int, help='Rows per page')
+@click.option('--pages', 'n_pages', default=20, type=int, help='Pages browsed with Next')
+@click.option('--think', default=0.2, type=float, help='Seconds the user looks at a page before Next')
+def paging(n_rows, page_size, n_pages, think):
+    """Zi Dictionary: whole table vs OFFSET pages vs cursor pages with prefetch."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, "zi.sqlite")
+        fill_zi_db(db_path, n_rows)
+        conn = sqlite3.connect(db_path)
+        last_key = conn.execute("SELECT zi, rowid FROM t_zi ORDER BY zi, rowid LIMIT 1 OFFSET ?",
+                                (n_rows - page_size - 1,)).fetchone()
+        conn.close()
+        with contextlib.redirect_stdout(io.StringIO()):
+            backend, server, base_url = start_backend(db_path)
+            client = ApiClient(base_url)
+            last_cursor = backend.encode_cursor(list(last_key))
+
+            def offset_page(skip):
+                return timed_ms(lambda: pd.DataFrame(client.get(f"/zi_dict_list/skip={skip}&limit={page_size}",
+                                                                cache=False)["data"]), repeat=9)
+
+            whole_ms = timed_ms(lambda: pd.DataFrame(client.get(f"/zi_dict_list/skip=0&limit={n_rows}",
+                                                                cache=False)["data"]))
+            offset_first_ms = offset_page(0)
+            offset_last_ms = offset_page(n_rows - page_size)
+
+            def cursor_page(cursor):
+                return timed_ms(lambda: pd.DataFrame(client.get("/zi_dict_page/", params={"after": cursor,
+                                                                                        "limit": page_size},
+                                                                cache=False)["data"]), repeat=9)
+
+            cursor_first_ms = cursor_page("")
+            cursor_last_ms = cursor_page(last_cursor)
+
+            source = PagedSource(client, "/zi_dict_page/", page_size=page_size)
+            source.page(0)
+            next_ms = []
+            for number in range(1, n_pages + 1):
+                time.sleep(think)
+                next_ms.append(timed_ms(lambda: source.page(number)))
+            back_ms = timed_ms(lambda: source.page(n_pages - 1))
+            source.close()
+            client.close()
+            server.should_exit = True
+
+    next_ms.sort()
+    click.echo(f"t_zi with {n_rows} rows, pages of {page_size}")
+    click.echo(f"{'variant':<44} {'ms':>8}")
+    for label, ms in (("whole table in one DataFrame", whole_ms),
+                      ("OFFSET page, first", offset_first_ms),
+                      ("OFFSET page, last", offset_last_ms),
+                      ("cursor page, first", cursor_first_ms),
+                      ("cursor page, last", cursor_last_ms),
+                      (f"cursor Next (prefetched), median of {n_pages}", next_ms[len(next_ms) // 2]),
+                      ("cursor Previous (page cache)", back_ms)):
+        click.echo(f"{label:<44} {ms:>8.1f}")
+    click.echo(f"page source: {source.metrics}")
+
+
+if __name__ == "__main__":
+    cli()
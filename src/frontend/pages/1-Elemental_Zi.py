@@ -1,6 +1,6 @@
 import streamlit as st
 import pandas as pd
-from utils import fetch_data
+from utils import show_paged_table
 
 st.set_page_config(
     page_title="Elemental Zi",
@@ -15,8 +15,4 @@ These characters form the foundation of the Chinese writing system.
 """)
 
 
-df = fetch_data(endpoint="/ele_zis/")
-
-if df is not None and not df.empty:
-    st.subheader(f"Showing {len(df)} Elemental Characters")
-    st.dataframe(df)
\ No newline at end of file
+show_paged_table(endpoint="/ele_zi_page/", key="ele_zi_page")
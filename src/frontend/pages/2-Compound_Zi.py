@@ -0,0 +1,17 @@
+import streamlit as st
+from utils import show_paged_table
+
+st.set_page_config(
+    page_title="Compound Zi",
+    page_icon="🧩",
+    layout="wide"
+)
+
+st.title("Compound Zi")
+st.markdown("""
+Compound Zi are characters composed of elemental characters,
+shown with the position of each part (left, right, up, down, middle ...).
+""")
+
+
+show_paged_table(endpoint="/zi_part_page/", key="zi_part_page")
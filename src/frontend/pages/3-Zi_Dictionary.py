@@ -0,0 +1,16 @@
+import streamlit as st
+from utils import show_paged_table
+
+st.set_page_config(
+    page_title="Zi Dictionary",
+    page_icon="📖",
+    layout="wide"
+)
+
+st.title("Zi Dictionary")
+st.markdown("""
+Browse the full dictionary of Zi, in character order.
+""")
+
+
+show_paged_table(endpoint="/zi_dict_page/", key="zi_dict_page")
@@ -0,0 +1,153 @@
+"""
+    Pages of a backend table, fetched with cursor pagination: only the page
+    on screen is requested, the next one is prefetched in the background,
+    and at most `max_pages` pages are kept. Pages are dropped when the
+    backend ETag (the database version) changes; `revalidate()` checks it
+    at most every `ttl` seconds.
+
+Usages:
+    source = PagedSource(client, "/zi_dict_page/", page_size=50)
+    df = source.page(0)         # also starts fetching page 1
+    df = source.page(1)         # already there
+    source.n_pages              # from the backend's total
+    source.revalidate()         # on each rerun: reset if the database changed
+"""
+
+import math
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+
+class PagedSource:
+    """
+    Backs the paginated pages of all sessions (it is thread-safe). Pages
+    are reached in order: page n needs the cursor returned with page n-1;
+    cursors are kept (a string per page), so evicted pages are fetched
+    again directly.
+    """
+
+    def __init__(self, client, endpoint, page_size=50, max_pages=20, ttl=60):
+        self.client = client
+        self.endpoint = endpoint
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self.ttl = ttl
+        self.total = None
+        self.version = None             # ETag of the pages held
+        self._validated = None          # when they were last fetched or revalidated; None: nothing held
+        self._cursors = [""]            # cursor of page n; "" is the first page
+        self._pages = OrderedDict()     # page number -> DataFrame, least recently used first
+        self._pending = {}              # page number -> Future of its fetch
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self.metrics = {"hits": 0, "prefetched": 0, "fetched": 0, "resets": 0}
+
+    @property
+    def n_pages(self):
+        """Number of pages (None before the first fetch)."""
+        if self.total is None:
+            return None
+        return max(math.ceil(self.total / self.page_size), 1)
+
+    def has_page(self, number):
+        """Whether page `number` can be requested (its cursor is known)."""
+        with self._lock:
+            return 0 <= number < len(self._cursors)
+
+    def page(self, number):
+        """
+        DataFrame of page `number` (0-based); shared, do not modify it.
+        Raises IndexError if the page is not reachable yet and
+        requests.RequestException if the backend fails.
+        """
+        with self._lock:
+            if not 0 <= number < len(self._cursors):
+                raise IndexError(f"page {number} is not reachable yet")
+            frame = self._pages.get(number)
+            if frame is not None:
+                self._pages.move_to_end(number)
+                self.metrics["hits"] += 1
+            future = self._pending.get(number)
+            cursor = self._cursors[number]
+
+        if frame is None and future is not None:
+            self.metrics["prefetched"] += 1
+            frame = future.result()
+        elif frame is None:
+            self.metrics["fetched"] += 1
+            frame = self._fetch(number, cursor)
+        self._prefetch(number + 1)
+        return frame
+
+    def revalidate(self):
+        """
+        Reset if the database changed since the pages held were fetched;
+        asks the backend at most every `ttl` seconds (a 304 when unchanged).
+        Without an ETag from the backend, pages are simply dropped after
+        `ttl`. Raises requests.RequestException.
+        """
+        with self._lock:
+            if self._validated is None or time.time() - self._validated < self.ttl:
+                return
+            self._validated = time.time()       # one check per ttl, whichever session runs it
+            version = self.version
+        response = self.client.request(self.endpoint, params={"after": "", "limit": 1}, etag=version)
+        if response.status_code != 304:
+            self.reset()
+
+    def reset(self):
+        """Forget all pages and cursors (e.g. after the table changed)."""
+        with self._lock:
+            self._reset()
+
+    def _reset(self):
+        self._cursors = [""]
+        self._pages.clear()
+        self._pending.clear()
+        self.total = None
+        self.version = None
+        self._validated = None
+        self.metrics["resets"] += 1
+
+    def _fetch(self, number, cursor):
+        try:
+            response = self.client.request(self.endpoint, params={"after": cursor, "limit": self.page_size})
+        finally:
+            with self._lock:
+                self._pending.pop(number, None)
+        body = response.json()
+        version = response.headers.get("ETag")
+        frame = pd.DataFrame(body.get("data", []))
+        with self._lock:
+            if number >= len(self._cursors) or self._cursors[number] != cursor:
+                return frame        # reset while fetching
+            if self._validated is not None and version != self.version:
+                # the database changed: the pages and cursors held are of the former rows
+                self._reset()
+                if number:
+                    return frame
+            self.version = version
+            if self._validated is None:
+                self._validated = time.time()
+            self.total = body.get("total", self.total)
+            if body.get("next") and len(self._cursors) == number + 1:
+                self._cursors.append(body["next"])
+            self._pages[number] = frame
+            self._pages.move_to_end(number)
+            while len(self._pages) > self.max_pages:
+                self._pages.popitem(last=False)
+        return frame
+
+    def _prefetch(self, number):
+        with self._lock:
+            if number >= len(self._cursors) or number in self._pages or number in self._pending:
+                return
+            self._pending[number] = self._executor.submit(self._fetch, number, self._cursors[number])
+
+    def close(self):
+        """Wait for a prefetch in progress, then stop the prefetch thread."""
+        self._executor.shutdown(wait=True)
@@ -1,12 +1,33 @@
+import os
+
 import streamlit as st
 import requests
 import pandas as pd
 
+from api_client import ApiClient
+from paging import PagedSource
+
 # Base URL for the FastAPI backend
-API_BASE_URL = "http://localhost:8000"
+API_BASE_URL = os.environ.get("ZINETS_API_URL", "http://localhost:8000")
+
+@st.cache_resource
+def get_client():
+    """
+    One ApiClient per server process: keep-alive connections and cached
+    responses (5 minutes, then ETag revalidation) shared by all sessions
+    and reruns
+    """
+    return ApiClient(API_BASE_URL, ttl=300)
+
+def _params(limit=None, filters=None):
+    params = {}
+    if limit:
+        params["limit"] = limit
+    if filters:
+        params.update(filters)
+    return params
 
-# @st.cache_data(ttl=300)  # Cache for 5 minutes
-def fetch_data(endpoint="/ele_zis/", limit=20, filters=None):
+def fetch_data(endpoint="/ele_zi_list/", limit=20, filters=None):
     """
     Fetch data from the FastAPI backend
     
@@ -16,27 +37,63 @@ def fetch_data(endpoint="/ele_zis/", limit=20, filters=None):
     - filters: Dictionary of filter parameters (optional)
     
     Returns:
-    - pandas DataFrame with the fetched data
+    - pandas DataFrame with the fetched data (shared by reruns: do not modify it in place)
     """
-    url = f"{API_BASE_URL}{endpoint}"
-    
-    params = {}
-    if limit:
-        params["limit"] = limit
-    
-    if filters:
-        params.update(filters)
-    
     try:
-        response = requests.get(url, params=params)
-        response.raise_for_status()  # Raise an exception for HTTP errors
-        
-        # Convert JSON response to DataFrame
-        data = response.json()
-        df = pd.DataFrame(data)
-        
-        return df
-    
+        return get_client().get(endpoint, params=_params(limit, filters), parse=pd.DataFrame)
     except requests.exceptions.RequestException as e:
         st.error(f"Error fetching data: {str(e)}")
-        return pd.DataFrame()  # Return empty DataFrame on error
\ No newline at end of file
+        return pd.DataFrame()  # Return empty DataFrame on error
+
+def fetch_many(endpoints, limit=20, filters=None):
+    """
+    fetch_data of several endpoints, in parallel
+
+    Returns:
+    - list of DataFrames, in the order of endpoints
+    """
+    try:
+        return get_client().get_many([(endpoint, _params(limit, filters)) for endpoint in endpoints],
+                                     parse=pd.DataFrame)
+    except requests.exceptions.RequestException as e:
+        st.error(f"Error fetching data: {str(e)}")
+        return [pd.DataFrame() for _ in endpoints]
+
+@st.cache_resource
+def get_paged_source(endpoint, page_size=50):
+    """
+    One PagedSource per endpoint and page size, shared by all sessions:
+    pages already fetched by anyone are served from its cache until the
+    database changes (checked at most once a minute)
+    """
+    return PagedSource(get_client(), endpoint, page_size=page_size, max_pages=20, ttl=60)
+
+def show_paged_table(endpoint, key, page_size=50):
+    """
+    Show one page of a cursor-paginated endpoint with First/Previous/Next
+    buttons; the page number is kept in st.session_state[key]
+    """
+    source = get_paged_source(endpoint, page_size)
+    st.session_state.setdefault(key, 0)
+
+    try:
+        source.revalidate()
+        number = st.session_state[key]
+        if not source.has_page(number):     # e.g. the source was reset
+            number = st.session_state[key] = 0
+        df = source.page(number)
+    except requests.exceptions.RequestException as e:
+        st.error(f"Error fetching data: {str(e)}")
+        return
+
+    def go_to(page_number):
+        st.session_state[key] = page_number
+
+    col_first, col_prev, col_next, col_info = st.columns([1, 1, 1, 5])
+    col_first.button("⏮ First", key=f"{key}_first", disabled=number == 0, on_click=go_to, args=(0,))
+    col_prev.button("◀ Previous", key=f"{key}_prev", disabled=number == 0, on_click=go_to, args=(number - 1,))
+    col_next.button("Next ▶", key=f"{key}_next", disabled=not source.has_page(number + 1),
+                    on_click=go_to, args=(number + 1,))
+    col_info.markdown(f"Page {number + 1} of {source.n_pages} ({source.total} Zi)")
+
+    st.dataframe(df, height=min(len(df), page_size) * 35 + 38)
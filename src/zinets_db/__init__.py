@@ -0,0 +1,39 @@
+"""
+    Data access for the ZiNets backends and tools.
+
+    One place for how the SQLite databases are opened and queried, so
+    performance work (indexes, WAL, pragmas, batching) is done and
+    benchmarked once for src/backend, the vuejs backends and the gemini CLI:
+
+    pool        pooled connections with shared pragmas and statement caches
+    schema      the character_cache and zi.sqlite schemas as migrations,
+                plus the tables of the gemini tools
+    migrations  the versioned migration runner (schema_migrations table)
+    queries     the shared character_cache SQL and chunked lookups
+    stats       trigger-maintained cache statistics
+    cache       TTL caching of results in the process
+    writer      batching of cache writes (group commit)
+
+    The package lives in <repo>/src; scripts elsewhere in the tree put that
+    directory on sys.path before importing it.
+
+Usages:
+    from zinets_db import get_pool, setup_cache_db, queries
+
+    pool = get_pool('zinets_cache.sqlite', row_factory=sqlite3.Row)
+    with pool.connection() as conn:
+        setup_cache_db(conn)                # at startup; idempotent
+        row = conn.execute(queries.SELECT_BEST, ('水',)).fetchone()
+
+    $ python -m zinets_db.migrations --db zinets_cache.sqlite --dry-run
+    $ python -m zinets_db.bench_zinets_db pool --db zinets_cache.sqlite
+"""
+
+from . import queries
+from .cache import TTLCache, ttl_cache
+from .pool import ConnectionPool, PooledConnection, close_pools, connect, get_pool
+from .migrations import migrate, plan, table_exists
+from .schema import (CACHE_MIGRATIONS, CHARACTER_CACHE_COLUMNS, ZI_MIGRATIONS, get_cache_pool, setup_cache_db,
+                     setup_zi_db)
+from .stats import check_cache_stats, read_cache_stats, rebuild_cache_stats, setup_cache_stats
+from .writer import CacheWriter
@@ -0,0 +1,164 @@
+"""
+    Benchmarks of the data-access layer, on a generated cache database or
+    an existing one.
+
+Usages:
+    $ python -m zinets_db.bench_zinets_db pool --rows 100000 --lookups 20000
+    $ python -m zinets_db.bench_zinets_db pool --db ../dev/zinets-POC/vuejs/zinets_vis/backend/zinets_cache.sqlite
+    $ python -m zinets_db.bench_zinets_db setup --rows 100000
+    $ python -m zinets_db.bench_zinets_db migrate --rows 500000 --batch-size 10000
+"""
+
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+import click
+
+from . import queries
+from .migrations import plan
+from .pool import ConnectionPool, connect
+from .schema import CACHE_MIGRATIONS, setup_cache_db
+
+
+def fill_cache(db_path, n_rows):
+    conn = sqlite3.connect(db_path)
+    setup_cache_db(conn)
+    with conn:
+        conn.executemany(queries.INSERT, ((f"字{i}", "zì", "character; word", "宀 + 子", "汉字 (hàn zì)",
+                                          "Google", "gemini-2.0-flash", "2025-06-01T00:00:00", "Y", "Y")
+                                         for i in range(n_rows)))
+    conn.close()
+
+
+def timed(func):
+    ts_start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - ts_start
+
+
+@click.group()
+def cli():
+    """zinets_db benchmarks."""
+
+
+@cli.command()
+@click.option('--db', 'db_path', type=click.Path(exists=True, dir_okay=False),
+              help='Existing cache database (default: a generated one)')
+@click.option('--rows', 'n_rows', default=100000, type=int, help='Rows of the generated database')
+@click.option('--lookups', 'n_lookups', default=20000, type=int, help='Cache lookups, one connection use each')
+def pool(db_path, n_rows, n_lookups):
+    """Cache lookups opening a connection each (as the backends did) vs pooled connections."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        if db_path is None:
+            db_path = os.path.join(tmp_dir, 'zinets_cache.sqlite')
+            fill_cache(db_path, n_rows)
+        conn = sqlite3.connect(db_path)
+        n_rows = conn.execute('SELECT COUNT(*) FROM character_cache').fetchone()[0]
+        conn.close()
+        characters = [f"字{i % max(n_rows, 1)}" for i in range(n_lookups)]
+
+        def per_request():
+            for character in characters:
+                conn = sqlite3.connect(db_path)
+                conn.execute(queries.SELECT_BEST, (character,)).fetchone()
+                conn.close()
+
+        connections = ConnectionPool(db_path)
+
+        def pooled():
+            for character in characters:
+                with connections.connection() as conn:
+                    conn.execute(queries.SELECT_BEST, (character,)).fetchone()
+
+        _, per_request_s = timed(per_request)
+        _, pooled_s = timed(pooled)
+        connections.close()
+
+    click.echo(f"{n_lookups} lookups in {n_rows} rows   {'total s':>8} {'us/lookup':>10}")
+    for label, seconds in (("connection per lookup", per_request_s), ("pooled connection    ", pooled_s)):
+        click.echo(f"{label}          {seconds:>8.2f} {seconds / n_lookups * 1e6:>10.1f}")
+
+
+@cli.command()
+@click.option('--rows', 'n_rows', default=100000, type=int, help='Rows cached before the schema is set up again')
+def setup(n_rows):
+    """setup_cache_db on a new database, and again at a later startup (nothing to do)."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, 'zinets_cache.sqlite')
+        conn = sqlite3.connect(db_path)
+        applied, new_s = timed(lambda: setup_cache_db(conn))
+        conn.close()
+        fill_cache(db_path, n_rows)
+        conn = sqlite3.connect(db_path)
+        again, again_s = timed(lambda: setup_cache_db(conn))
+        conn.close()
+    click.echo(f"new database: {new_s * 1000:.1f} ms ({', '.join(applied)})")
+    click.echo(f"startup with {n_rows} rows: {again_s * 1000:.1f} ms ({', '.join(again) or 'nothing to do'})")
+
+
+@cli.command()
+@click.option('--rows', 'n_rows', default=500000, type=int, help='Rows of the legacy cache (single source column)')
+@click.option('--batch-size', default=10000, type=int, help='Rows per transaction of batched steps')
+def migrate(n_rows, batch_size):
+    """
+    Migrate a legacy cache while another connection keeps writing: estimated
+    vs actual step times, and how long the writer waited for the lock.
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, 'zinets_cache.sqlite')
+        conn = sqlite3.connect(db_path)
+        conn.execute('PRAGMA journal_mode = WAL')
+        conn.execute('CREATE TABLE character_cache (character TEXT PRIMARY KEY, pinyin TEXT, meaning TEXT, '
+                     'composition TEXT, phrases TEXT, source TEXT, timestamp TEXT)')
+        with conn:
+            conn.executemany("INSERT INTO character_cache VALUES (?, 'zì', 'character; word', '宀 + 子', "
+                             "'汉字 (hàn zì)', 'gemini-batch', '2024-06-01T00:00:00')",
+                             ((f"字{i}",) for i in range(n_rows)))
+        conn.close()
+
+        conn = connect(db_path)
+        estimates = {migration.name: seconds for migration, _, _, seconds in plan(conn, CACHE_MIGRATIONS)}
+
+        # a writer updating one row at a time, as the backends do
+        waits = []
+        done = threading.Event()
+
+        def writer():
+            writer_conn = connect(db_path)
+            i = 0
+            while not done.is_set():
+                ts_start = time.perf_counter()
+                try:
+                    with writer_conn:
+                        writer_conn.execute("UPDATE character_cache SET timestamp = ? WHERE character = ?",
+                                            (f"2025-{i}", f"字{i % n_rows}"))
+                except sqlite3.OperationalError:
+                    pass        # the table was being swapped
+                waits.append(time.perf_counter() - ts_start)
+                i += 1
+                time.sleep(0.001)
+            writer_conn.close()
+
+        thread = threading.Thread(target=writer)
+        thread.start()
+        actual = {}
+        _, total_s = timed(lambda: setup_cache_db(conn, batch_size=batch_size,
+                                                  log=lambda migration, seconds: actual.update({migration.name: seconds})))
+        done.set()
+        thread.join()
+        conn.close()
+
+    click.echo(f"{n_rows} rows, batches of {batch_size}: migrated in {total_s:.1f} s")
+    click.echo(f"{'step':<42} {'estimate s':>11} {'actual s':>9}")
+    for name, seconds in actual.items():
+        click.echo(f"{name:<42} {estimates.get(name, 0.0):>11.2f} {seconds:>9.2f}")
+    waits.sort()
+    click.echo(f"concurrent writer: {len(waits)} updates, wait p50 {waits[len(waits) // 2] * 1000:.1f} ms, "
+               f"p99 {waits[int(len(waits) * 0.99)] * 1000:.1f} ms, max {waits[-1] * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,65 @@
+"""
+    In-process result caching with a time-to-live.
+"""
+
+import functools
+import threading
+import time
+
+
+class TTLCache:
+    """
+    A dict of values that expire `ttl` seconds after they were set; holds
+    at most `max_entries` (it is emptied when full).
+    """
+
+    def __init__(self, ttl, max_entries=256):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = {}      # key -> (value, set at)
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None or time.time() - entry[1] >= self.ttl:
+            return default
+        return entry[0]
+
+    def set(self, key, value):
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                self._entries.clear()
+            self._entries[key] = (value, time.time())
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+_MISSING = object()
+
+
+def ttl_cache(ttl=3600, max_entries=256):
+    """
+    Decorator caching a function's results by its arguments for `ttl`
+    seconds. The cache is the wrapper's `cache` attribute.
+    """
+    def decorator(func):
+        cache = TTLCache(ttl, max_entries)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = (args, tuple(sorted(kwargs.items())))
+            result = cache.get(key, _MISSING)
+            if result is _MISSING:
+                result = func(*args, **kwargs)
+                cache.set(key, result)
+            return result
+
+        wrapper.cache = cache
+        return wrapper
+    return decorator
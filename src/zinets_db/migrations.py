@@ -0,0 +1,378 @@
+"""
+    Versioned schema migrations.
+
+    A database records the migrations applied to it in `schema_migrations`
+    (version, name, applied_at, seconds). `migrate(conn, migrations)` runs
+    the ones not recorded yet, in version order. Each step first checks the
+    schema: a change already there (a database set up before versioning) is
+    recorded without running, and a step whose table does not exist is left
+    for a later run.
+
+    Steps hold the write lock briefly, so a large `character_cache` or
+    zi.sqlite can be migrated while the backends serve it (readers are not
+    blocked under WAL; writers wait up to the busy timeout):
+
+    CreateIndex     one index per transaction; SQLite builds an index in a
+                    single statement, so this is the longest lock a step takes
+    AddColumn       ALTER TABLE ADD COLUMN (no table rewrite), then a backfill
+                    in `batch_size` row transactions
+    RebuildTable    copies the table into a new layout in `batch_size` row
+                    transactions while triggers carry over concurrent writes,
+                    then swaps the tables in one short transaction
+
+    `plan(conn, migrations)` is the dry run: the pending steps with the rows
+    each touches and an estimate of its time, from the `rows_per_second` of
+    its kind (measured with bench_zinets_db.py migrate).
+
+Usages:
+    $ python -m zinets_db.migrations --db zinets_cache.sqlite --dry-run
+    $ python -m zinets_db.migrations --db zinets_cache.sqlite
+    $ python -m zinets_db.migrations --db zi.sqlite --zi --batch-size 5000
+"""
+
+import sqlite3
+import time
+from datetime import datetime
+
+import click
+
+
+DEFAULT_BATCH_SIZE = 10000      # rows per transaction of batched steps
+
+VERSION_TABLE = '''
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    applied_at TEXT NOT NULL,
+    seconds REAL
+)
+'''
+
+# Migration.status()
+PENDING = 'pending'
+PRESENT = 'present'                 # already in the schema: recorded without running
+NOT_APPLICABLE = 'not applicable'   # its table does not exist (yet)
+
+
+def table_exists(conn, table):
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)).fetchone() is not None
+
+
+def table_columns(conn, table):
+    return [info[1] for info in conn.execute(f"PRAGMA table_info({table})")]
+
+
+def count_rows(conn, table):
+    return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] if table_exists(conn, table) else 0
+
+
+class Migration:
+    """
+    A versioned step on `table`. Subclasses implement `status()` and
+    `apply()`; `apply()` commits its own work.
+    """
+    rows_per_second = 1e6
+
+    def __init__(self, version, name, table):
+        self.version = version
+        self.name = name
+        self.table = table
+
+    def status(self, conn):
+        raise NotImplementedError
+
+    def apply(self, conn, batch_size):
+        raise NotImplementedError
+
+    def rows(self, conn):
+        return count_rows(conn, self.table)
+
+    def estimate(self, conn):
+        return self.rows(conn) / self.rows_per_second
+
+
+class CreateTable(Migration):
+
+    def __init__(self, version, name, table, ddl):
+        super().__init__(version, name, table)
+        self.ddl = ddl
+
+    def status(self, conn):
+        return PRESENT if table_exists(conn, self.table) else PENDING
+
+    def apply(self, conn, batch_size):
+        with conn:
+            conn.execute(self.ddl)
+
+
+class CreateIndex(Migration):
+    rows_per_second = 1500000
+
+    def __init__(self, version, name, table, index, ddl):
+        super().__init__(version, name, table)
+        self.index = index
+        self.ddl = ddl
+
+    def status(self, conn):
+        if not table_exists(conn, self.table):
+            return NOT_APPLICABLE
+        exists = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = ?", (self.index,)).fetchone()
+        return PRESENT if exists else PENDING
+
+    def apply(self, conn, batch_size):
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(self.ddl)
+
+
+class DropIndex(Migration):
+
+    def __init__(self, version, name, table, index):
+        super().__init__(version, name, table)
+        self.index = index
+
+    def status(self, conn):
+        exists = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = ?", (self.index,)).fetchone()
+        return PENDING if exists else PRESENT
+
+    def rows(self, conn):
+        return 0
+
+    def apply(self, conn, batch_size):
+        with conn:
+            conn.execute(f"DROP INDEX IF EXISTS {self.index}")
+
+
+class AddColumn(Migration):
+    """
+    Add `column` (`definition`: type and constraints) and, with `backfill`
+    (an SQL expression over the row), fill it for existing rows.
+    """
+    rows_per_second = 800000
+
+    def __init__(self, version, name, table, column, definition, backfill=None):
+        super().__init__(version, name, table)
+        self.column = column
+        self.definition = definition
+        self.backfill = backfill
+
+    def status(self, conn):
+        if not table_exists(conn, self.table):
+            return NOT_APPLICABLE
+        # an unrecorded backfill may have been interrupted: it is run again
+        return PRESENT if self.column in table_columns(conn, self.table) and not self.backfill else PENDING
+
+    def rows(self, conn):
+        return count_rows(conn, self.table) if self.backfill else 0
+
+    def apply(self, conn, batch_size):
+        if self.column not in table_columns(conn, self.table):
+            with conn:
+                conn.execute(f"ALTER TABLE {self.table} ADD COLUMN {self.column} {self.definition}")
+        if not self.backfill:
+            return
+        last_rowid = -1
+        while True:
+            with conn:
+                rowids = [rowid for (rowid,) in conn.execute(
+                    f"SELECT rowid FROM {self.table} WHERE rowid > ? ORDER BY rowid LIMIT ?", (last_rowid, batch_size))]
+                if not rowids:
+                    break
+                conn.execute(f"UPDATE {self.table} SET {self.column} = {self.backfill} WHERE rowid BETWEEN ? AND ?",
+                             (rowids[0], rowids[-1]))
+            last_rowid = rowids[-1]
+
+
+class RebuildTable(Migration):
+    """
+    Rebuild `table` as `ddl` (a CREATE TABLE for `{table}`), filling `columns`
+    with the `select` expressions over the old row; applies when `needed(conn)`.
+
+    Rows are copied by rowid ranges into `<table>_new`, keeping their rowids;
+    triggers on the old table replay inserts, updates and deletes made in the
+    meantime, and the copy skips rows the triggers already wrote. After the
+    swap the old table's indexes and triggers are created again, one per
+    transaction, except those on columns the new layout no longer has.
+    """
+    rows_per_second = 300000
+
+    def __init__(self, version, name, table, ddl, columns, select, needed):
+        super().__init__(version, name, table)
+        self.ddl = ddl
+        self.columns = columns
+        self.select = select
+        self.needed = needed
+
+    def status(self, conn):
+        if not table_exists(conn, self.table):
+            return NOT_APPLICABLE
+        return PENDING if self.needed(conn) else PRESENT
+
+    def apply(self, conn, batch_size):
+        new_table = f"{self.table}_new"
+        columns = ', '.join(('rowid',) + tuple(self.columns))
+        copy = f"SELECT rowid, {', '.join(self.select)} FROM {self.table}"
+        triggers = {
+            f"{new_table}_sync_insert": f"AFTER INSERT ON {self.table} BEGIN "
+                                        f"INSERT OR REPLACE INTO {new_table} ({columns}) {copy} WHERE rowid = NEW.rowid; END",
+            f"{new_table}_sync_update": f"AFTER UPDATE ON {self.table} BEGIN "
+                                        f"DELETE FROM {new_table} WHERE rowid = OLD.rowid; "
+                                        f"INSERT OR REPLACE INTO {new_table} ({columns}) {copy} WHERE rowid = NEW.rowid; END",
+            f"{new_table}_sync_delete": f"AFTER DELETE ON {self.table} BEGIN "
+                                        f"DELETE FROM {new_table} WHERE rowid = OLD.rowid; END",
+        }
+        recreate = [sql for (sql,) in conn.execute(
+            "SELECT sql FROM sqlite_master WHERE tbl_name = ? AND type IN ('index', 'trigger') AND sql IS NOT NULL "
+            "AND name NOT LIKE ?", (self.table, f"{new_table}_sync_%"))]
+        with conn:
+            conn.execute(f"DROP TABLE IF EXISTS {new_table}")      # left by an interrupted run
+            conn.execute(self.ddl.format(table=new_table))
+            for name, body in triggers.items():
+                conn.execute(f"CREATE TRIGGER {name} {body}")
+
+        last_rowid = -1
+        while True:
+            with conn:
+                rowids = [rowid for (rowid,) in conn.execute(
+                    f"SELECT rowid FROM {self.table} WHERE rowid > ? ORDER BY rowid LIMIT ?", (last_rowid, batch_size))]
+                if not rowids:
+                    break
+                conn.execute(f"INSERT OR IGNORE INTO {new_table} ({columns}) {copy} WHERE rowid BETWEEN ? AND ?",
+                             (rowids[0], rowids[-1]))
+            last_rowid = rowids[-1]
+
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            for name in triggers:
+                conn.execute(f"DROP TRIGGER {name}")
+            conn.execute(f"DROP TABLE {self.table}")
+            conn.execute(f"ALTER TABLE {new_table} RENAME TO {self.table}")
+
+        for sql in recreate:
+            try:
+                with conn:
+                    conn.execute(sql)
+            except sqlite3.OperationalError:
+                pass        # refers to a column that was dropped
+
+
+class Step(Migration):
+    """
+    A function step: `apply_func(conn)` does the change and commits,
+    `status_func(conn)` returns PENDING, PRESENT or NOT_APPLICABLE.
+    """
+
+    def __init__(self, version, name, table, apply_func, status_func, rows_per_second=Migration.rows_per_second):
+        super().__init__(version, name, table)
+        self.apply_func = apply_func
+        self.status_func = status_func
+        self.rows_per_second = rows_per_second
+
+    def status(self, conn):
+        return self.status_func(conn)
+
+    def apply(self, conn, batch_size):
+        self.apply_func(conn)
+
+
+def applied_versions(conn):
+    """
+    Versions recorded in `schema_migrations`; none if the table is missing.
+    Read-only, so `plan` (--dry-run) leaves the database untouched.
+    """
+    if not table_exists(conn, 'schema_migrations'):
+        return set()
+    return {version for (version,) in conn.execute("SELECT version FROM schema_migrations")}
+
+
+def _record(conn, migration, seconds):
+    with conn:
+        conn.execute("INSERT OR REPLACE INTO schema_migrations VALUES (?, ?, ?, ?)",
+                     (migration.version, migration.name, datetime.now().isoformat(), seconds))
+
+
+def plan(conn, migrations):
+    """
+    The migrations not recorded yet: (migration, status, rows, estimated
+    seconds). A step on a table that an earlier pending step creates is
+    counted as pending, except a rebuild: a new table has the current layout.
+    """
+    applied = applied_versions(conn)
+    created = set()
+    steps = []
+    for migration in sorted(migrations, key=lambda m: m.version):
+        if migration.version in applied:
+            continue
+        status = migration.status(conn)
+        if status == NOT_APPLICABLE and migration.table in created:
+            status = PRESENT if isinstance(migration, RebuildTable) else PENDING
+        if status == PENDING and isinstance(migration, CreateTable):
+            created.add(migration.table)
+        rows = migration.rows(conn) if status == PENDING else 0
+        steps.append((migration, status, rows, migration.estimate(conn) if status == PENDING else 0.0))
+    return steps
+
+
+def migrate(conn, migrations, batch_size=DEFAULT_BATCH_SIZE, log=None):
+    """
+    Apply and record the migrations not recorded yet, checking each against
+    the schema as left by the ones before it. Returns the names of those that
+    changed the schema; `log(migration, seconds)` is called after each.
+    """
+    with conn:
+        conn.execute(VERSION_TABLE)
+    applied_before = applied_versions(conn)
+    applied = []
+    for migration in sorted(migrations, key=lambda m: m.version):
+        if migration.version in applied_before:
+            continue
+        status = migration.status(conn)
+        if status == NOT_APPLICABLE:
+            continue
+        seconds = None
+        if status == PENDING:
+            ts_start = time.perf_counter()
+            migration.apply(conn, batch_size)
+            seconds = time.perf_counter() - ts_start
+            applied.append(migration.name)
+        _record(conn, migration, seconds)
+        if log is not None and seconds is not None:
+            log(migration, seconds)
+    return applied
+
+
+@click.command()
+@click.option('--db', 'db_path', required=True, type=click.Path(exists=True, dir_okay=False), help='Database to migrate')
+@click.option('--zi', 'zi_db', is_flag=True, help='A zi.sqlite dictionary database instead of a character cache')
+@click.option('--batch-size', default=DEFAULT_BATCH_SIZE, type=int, help='Rows per transaction of batched steps')
+@click.option('--dry-run', is_flag=True, help='Only list the pending steps with estimated times')
+def main(db_path, zi_db, batch_size, dry_run):
+    """
+    Apply the pending schema migrations of a cache or zi.sqlite database.
+    """
+    from .pool import connect
+    from .schema import CACHE_MIGRATIONS, ZI_MIGRATIONS, setup_cache_db, setup_zi_db
+
+    conn = connect(db_path)
+    try:
+        migrations = ZI_MIGRATIONS if zi_db else CACHE_MIGRATIONS
+        steps = plan(conn, migrations)
+        for migration, status, rows, seconds in steps:
+            click.echo(f"{migration.version:>4} {migration.name:<40} {status:<15} "
+                       + (f"{rows:>10} rows  ~{seconds:.1f} s" if status == PENDING else ""))
+        if not steps:
+            click.echo("Schema is up to date.")
+        if dry_run:
+            click.echo(f"Estimated total: {sum(step[3] for step in steps):.1f} s")
+            return
+        log = lambda migration, seconds: click.echo(f"Applied {migration.version} {migration.name} in {seconds:.2f} s")
+        if zi_db:
+            setup_zi_db(conn, batch_size=batch_size, log=log)
+        else:
+            setup_cache_db(conn, batch_size=batch_size, log=log)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+    Pooled SQLite connections.
+
+    Opening a connection costs a file open, schema parse and pragma setup,
+    and throws away the connection's cache of compiled statements; the
+    backends used to pay that on every request. A pool keeps up to `size`
+    idle connections per database and hands them out again. Connections
+    come from `PooledConnection`, whose `close()` returns them to the pool
+    (rolling back an open transaction), so handlers that close their
+    connection keep working unchanged.
+
+    Every connection gets the same pragmas (`PRAGMAS`), may be used from
+    any thread (one thread at a time), and keeps `CACHED_STATEMENTS`
+    compiled statements, so the shared SQL of `zinets_db.queries` is
+    prepared once per connection rather than once per request.
+"""
+
+import contextlib
+import os
+import sqlite3
+import threading
+
+
+BUSY_TIMEOUT = 30               # seconds to wait for a lock before 'database is locked'
+CACHED_STATEMENTS = 256         # compiled statements kept per connection
+DEFAULT_POOL_SIZE = 8           # idle connections kept per database
+
+PRAGMAS = (
+    "PRAGMA cache_size = -16000",       # 16 MB page cache per connection
+    "PRAGMA temp_store = MEMORY",       # sorts and temporary indexes stay off disk
+    "PRAGMA mmap_size = 268435456",     # read pages through a 256 MB memory map
+)
+
+
+def connect(db_path, row_factory=None, pragmas=PRAGMAS, factory=sqlite3.Connection):
+    """
+    A configured connection to `db_path`, outside any pool.
+    """
+    conn = sqlite3.connect(db_path, timeout=BUSY_TIMEOUT, check_same_thread=False,
+                           cached_statements=CACHED_STATEMENTS, factory=factory)
+    conn.row_factory = row_factory
+    for pragma in pragmas:
+        conn.execute(pragma)
+    # fewer fsyncs are only safe with WAL (see schema.setup_cache_db)
+    if conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal":
+        conn.execute("PRAGMA synchronous = NORMAL")
+    return conn
+
+
+class PooledConnection(sqlite3.Connection):
+    """
+    A connection whose `close()` gives it back to its pool.
+    """
+    pool = None
+
+    def close(self):
+        if self.pool is None or not self.pool.put(self):
+            super().close()
+
+
+class ConnectionPool:
+    """
+    Idle connections to one database, reused by `get()` and returned by
+    `put()` (or the connection's `close()`); at most `size` are kept, any
+    more are closed when returned. `metrics` counts opened and reused ones.
+    """
+
+    def __init__(self, db_path, size=DEFAULT_POOL_SIZE, row_factory=None, pragmas=PRAGMAS):
+        self.db_path = db_path
+        self.size = size
+        self.row_factory = row_factory
+        self.pragmas = pragmas
+        self.metrics = {"opened": 0, "reused": 0}
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def get(self):
+        with self._lock:
+            if self._idle:
+                self.metrics["reused"] += 1
+                return self._idle.pop()
+            self.metrics["opened"] += 1
+        conn = connect(self.db_path, self.row_factory, self.pragmas, factory=PooledConnection)
+        conn.pool = self
+        return conn
+
+    def put(self, conn):
+        """
+        Keep `conn` for reuse; False if the pool is full and it should be closed.
+        """
+        if conn.in_transaction:
+            conn.rollback()
+        with self._lock:
+            if conn in self._idle:
+                return True
+            if len(self._idle) < self.size:
+                self._idle.append(conn)
+                return True
+        return False
+
+    @contextlib.contextmanager
+    def connection(self):
+        conn = self.get()
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.pool = None
+            conn.close()
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_path, row_factory=None, size=DEFAULT_POOL_SIZE):
+    """
+    The process-wide pool for `db_path` (resolved against the current
+    directory) and `row_factory`, created on first use.
+    """
+    key = (os.path.abspath(db_path), row_factory)
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = ConnectionPool(key[0], size, row_factory)
+        return _pools[key]
+
+
+def close_pools():
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
@@ -0,0 +1,85 @@
+"""
+    Shared SQL of the character cache.
+
+    Each statement has one text used by every caller, so a pooled connection
+    compiles it once and reuses it from its statement cache. Lookups by a
+    list of characters go in chunks of `BATCH_CHUNK_SIZE`, under SQLite's
+    limit on bound variables; full chunks share one statement text too.
+"""
+
+
+BATCH_CHUNK_SIZE = 500          # characters per IN (...) lookup
+
+SELECT_BY_KEY = '''
+SELECT * FROM character_cache WHERE character = ? AND llm_provider = ? AND llm_model_name = ?
+'''
+
+EXISTS_BY_KEY = '''
+SELECT 1 FROM character_cache WHERE character = ? AND llm_provider = ? AND llm_model_name = ?
+'''
+
+# the newest active best row of a character (idx_character_cache_best_rows)
+SELECT_BEST = '''
+SELECT character, pinyin, meaning, composition, phrases
+FROM character_cache
+WHERE character = ? AND is_active = 'Y' AND is_best = 'Y'
+ORDER BY timestamp DESC
+LIMIT 1
+'''
+
+INSERT = '''
+INSERT INTO character_cache
+(character, pinyin, meaning, composition, phrases, llm_provider, llm_model_name, timestamp, is_active, is_best)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+# An answer cached again keeps its data and is only refreshed and reactivated.
+# Upserts rather than INSERT OR REPLACE, so the statistics triggers see the
+# old row leave.
+UPSERT_REFRESH = '''
+INSERT INTO character_cache
+(character, pinyin, meaning, composition, phrases, llm_provider, llm_model_name, timestamp, is_active, is_best)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, 'Y', 'Y')
+ON CONFLICT (character, llm_provider, llm_model_name) DO UPDATE SET
+    timestamp = excluded.timestamp, is_active = 'Y'
+'''
+
+# A new answer of the same model replaces the cached data.
+UPSERT_REPLACE = '''
+INSERT INTO character_cache
+(character, pinyin, meaning, composition, phrases, llm_provider, llm_model_name, timestamp, is_active, is_best)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, 'Y', ?)
+ON CONFLICT (character, llm_provider, llm_model_name) DO UPDATE SET
+    pinyin = excluded.pinyin, meaning = excluded.meaning, composition = excluded.composition,
+    phrases = excluded.phrases, timestamp = excluded.timestamp, is_active = 'Y', is_best = excluded.is_best
+'''
+
+DEACTIVATE_BY_KEY = '''
+UPDATE character_cache SET is_active = 'N', timestamp = ?
+WHERE character = ? AND llm_provider = ? AND llm_model_name = ?
+'''
+
+
+def chunked(items, size=BATCH_CHUNK_SIZE):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def select_best_in(n_characters):
+    """
+    Active best rows of `n_characters` characters, oldest first, so that when
+    collected into a dict each character keeps its newest row.
+    """
+    return f'''
+    SELECT character, pinyin, meaning, composition, phrases
+    FROM character_cache
+    WHERE character IN ({','.join('?' * n_characters)}) AND is_active = 'Y' AND is_best = 'Y'
+    ORDER BY timestamp
+    '''
+
+
+def select_keys_in(n_characters):
+    return f'''
+    SELECT character, llm_provider, llm_model_name FROM character_cache
+    WHERE character IN ({','.join('?' * n_characters)})
+    '''
@@ -0,0 +1,254 @@
+"""
+    The `character_cache` and zi.sqlite schemas as versioned migrations.
+
+    `setup_cache_db(conn)` brings a cache database up to date and
+    `setup_zi_db(conn)` adds the indexes the dictionary API needs to a
+    zi.sqlite; both run the steps not yet recorded in `schema_migrations`
+    (see migrations.py), so they are cheap to call at every startup. They
+    are meant for startup only, not for the request path; `get_cache_pool`
+    runs the cache migrations once per process before handing out the pool.
+
+    The cache database also holds the tables of the gemini tools: what the
+    chunk sizer learned, the model registry and warm-up progress.
+"""
+
+import os
+import threading
+
+from .migrations import (DEFAULT_BATCH_SIZE, NOT_APPLICABLE, PENDING, PRESENT, CreateIndex, CreateTable, DropIndex,
+                         RebuildTable, Step, migrate, table_columns, table_exists)
+from .pool import get_pool
+from .stats import setup_cache_stats, trigger_names
+
+
+CHARACTER_CACHE_COLUMNS = ('character', 'pinyin', 'meaning', 'composition', 'phrases', 'llm_provider',
+                           'llm_model_name', 'timestamp', 'is_active', 'is_best')
+
+CHARACTER_CACHE_DDL = '''
+CREATE TABLE IF NOT EXISTS {table} (
+    character TEXT,
+    pinyin TEXT,
+    meaning TEXT,
+    composition TEXT,
+    phrases TEXT,
+    llm_provider TEXT,
+    llm_model_name TEXT,
+    timestamp TEXT,
+    is_active TEXT DEFAULT 'Y',
+    is_best TEXT DEFAULT 'Y',
+    PRIMARY KEY (character, llm_provider, llm_model_name)
+)
+'''
+CHARACTER_CACHE_TABLE = CHARACTER_CACHE_DDL.format(table='character_cache')
+
+# Indexes for the listing filters end with the listing order, so pages are
+# read in index order instead of sorted. Active and best rows get partial
+# indexes (also used by cache lookups), which stay small however much
+# soft-deleted history the table holds.
+CHARACTER_CACHE_INDEXES = {
+    'idx_character_cache_best_rows': '''
+    CREATE INDEX IF NOT EXISTS idx_character_cache_best_rows
+    ON character_cache (character, llm_provider, llm_model_name) WHERE is_active = 'Y' AND is_best = 'Y'
+    ''',
+    'idx_character_cache_active_rows': '''
+    CREATE INDEX IF NOT EXISTS idx_character_cache_active_rows
+    ON character_cache (character, llm_provider, llm_model_name) WHERE is_active = 'Y'
+    ''',
+    # rows compaction archives
+    'idx_character_cache_cold_rows': '''
+    CREATE INDEX IF NOT EXISTS idx_character_cache_cold_rows
+    ON character_cache (timestamp) WHERE is_active = 'N' OR is_best = 'N'
+    ''',
+    'idx_character_cache_provider': '''
+    CREATE INDEX IF NOT EXISTS idx_character_cache_provider
+    ON character_cache (llm_provider, character, llm_model_name)
+    ''',
+    'idx_character_cache_pinyin': 'CREATE INDEX IF NOT EXISTS idx_character_cache_pinyin ON character_cache (pinyin)',
+    'idx_character_cache_model': '''
+    CREATE INDEX IF NOT EXISTS idx_character_cache_model ON character_cache (llm_model_name)
+    ''',
+}
+
+
+# echart/gemini: zinets_chunking.py, zinets_models.py, zinets_warm_cache.py
+TOOL_TABLES = {
+    'chunk_tuning': '''
+    CREATE TABLE IF NOT EXISTS chunk_tuning (
+        llm_model_name TEXT,
+        language TEXT,
+        tokens_per_char REAL,
+        base_missing_rate REAL,
+        sum_w REAL, sum_n REAL, sum_t REAL, sum_nn REAL, sum_nt REAL,
+        samples INTEGER,
+        updated TEXT,
+        PRIMARY KEY (llm_model_name, language)
+    )
+    ''',
+    'chunk_size_stats': '''
+    CREATE TABLE IF NOT EXISTS chunk_size_stats (
+        llm_model_name TEXT,
+        language TEXT,
+        chunk_size INTEGER,
+        requests INTEGER,
+        missing_rate REAL,
+        truncations INTEGER,
+        PRIMARY KEY (llm_model_name, language, chunk_size)
+    )
+    ''',
+    'llm_model_probe': '''
+    CREATE TABLE IF NOT EXISTS llm_model_probe (
+        llm_provider TEXT PRIMARY KEY,
+        probed_at REAL,
+        n_models INTEGER
+    )
+    ''',
+    'llm_model_list': '''
+    CREATE TABLE IF NOT EXISTS llm_model_list (
+        llm_provider TEXT,
+        llm_model_name TEXT,
+        PRIMARY KEY (llm_provider, llm_model_name)
+    )
+    ''',
+    'llm_model_health': '''
+    CREATE TABLE IF NOT EXISTS llm_model_health (
+        llm_provider TEXT,
+        llm_model_name TEXT,
+        latency REAL,
+        error_rate REAL,
+        requests INTEGER,
+        errors INTEGER,
+        last_error TEXT,
+        updated REAL,
+        PRIMARY KEY (llm_provider, llm_model_name)
+    )
+    ''',
+    'warm_cache_progress': '''
+    CREATE TABLE IF NOT EXISTS warm_cache_progress (
+        run_name TEXT,
+        character TEXT,
+        position INTEGER,
+        status TEXT DEFAULT 'pending',
+        attempts INTEGER DEFAULT 0,
+        updated TEXT,
+        PRIMARY KEY (run_name, character)
+    )
+    ''',
+}
+
+
+def _has_source_column(conn):
+    # early caches had a single `source` column ('gemini-batch', ...) instead
+    # of llm_provider and llm_model_name
+    columns = table_columns(conn, 'character_cache')
+    return 'source' in columns and 'llm_provider' not in columns
+
+
+def _stats_status(conn):
+    if not table_exists(conn, 'character_cache'):
+        return NOT_APPLICABLE
+    triggers = {name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")}
+    present = table_exists(conn, 'character_cache_stats') and triggers.issuperset(trigger_names())
+    return PRESENT if present else PENDING
+
+
+CACHE_MIGRATIONS = [
+    CreateTable(1, 'create character_cache', 'character_cache', CHARACTER_CACHE_TABLE),
+    RebuildTable(2, 'migrate source column', 'character_cache', CHARACTER_CACHE_DDL, CHARACTER_CACHE_COLUMNS, (
+        'character', 'pinyin', 'meaning', 'composition', 'phrases',
+        "CASE WHEN source LIKE 'gemini%' THEN 'Google' ELSE 'Unknown' END",
+        "CASE WHEN source LIKE '%batch' THEN 'gemini-batch' "
+        "WHEN source LIKE '%individual' THEN 'gemini-individual' ELSE 'unknown' END",
+        'timestamp', "'Y'", "'Y'",
+    ), _has_source_column),
+    # superseded by the partial indexes
+    DropIndex(3, 'drop idx_character_cache_active_best', 'character_cache', 'idx_character_cache_active_best'),
+] + [
+    CreateIndex(version, f'create {name}', 'character_cache', name, ddl)
+    for version, (name, ddl) in enumerate(CHARACTER_CACHE_INDEXES.items(), start=4)
+] + [
+    Step(10, 'create statistics', 'character_cache', setup_cache_stats, _stats_status),
+] + [
+    CreateTable(version, f'create {name}', name, ddl)
+    for version, (name, ddl) in enumerate(TOOL_TABLES.items(), start=11)
+]
+
+
+# Indexes for the dictionary API of src/backend: listings of active rows in
+# their display order, and lookups by trimmed character
+ZI_MIGRATIONS = [
+    CreateIndex(1, 'create idx_t_ele_zi_active_strokes', 't_ele_zi', 'idx_t_ele_zi_active_strokes', '''
+    CREATE INDEX IF NOT EXISTS idx_t_ele_zi_active_strokes ON t_ele_zi (n_strokes, zi) WHERE is_active = 'Y'
+    '''),
+    CreateIndex(2, 'create idx_t_ele_zi_active_trim_zi', 't_ele_zi', 'idx_t_ele_zi_active_trim_zi', '''
+    CREATE INDEX IF NOT EXISTS idx_t_ele_zi_active_trim_zi ON t_ele_zi (trim(zi)) WHERE is_active = 'Y'
+    '''),
+    CreateIndex(3, 'create idx_t_zi_active_zi', 't_zi', 'idx_t_zi_active_zi', '''
+    CREATE INDEX IF NOT EXISTS idx_t_zi_active_zi ON t_zi (zi) WHERE is_active = 'Y'
+    '''),
+    CreateIndex(4, 'create idx_t_zi_active_trim_zi', 't_zi', 'idx_t_zi_active_trim_zi', '''
+    CREATE INDEX IF NOT EXISTS idx_t_zi_active_trim_zi ON t_zi (trim(zi)) WHERE is_active = 'Y'
+    '''),
+    CreateIndex(5, 'create idx_t_zi_part_active_zi', 't_zi_part', 'idx_t_zi_part_active_zi', '''
+    CREATE INDEX IF NOT EXISTS idx_t_zi_part_active_zi ON t_zi_part (zi) WHERE is_active = 'Y'
+    '''),
+    # cursor pages (keyset_page) order by coalesce(col, ''), so rows with a NULL key are reached
+    CreateIndex(6, 'create idx_t_ele_zi_active_page', 't_ele_zi', 'idx_t_ele_zi_active_page', '''
+    CREATE INDEX IF NOT EXISTS idx_t_ele_zi_active_page
+    ON t_ele_zi (coalesce(n_strokes, ''), coalesce(zi, '')) WHERE is_active = 'Y'
+    '''),
+    CreateIndex(7, 'create idx_t_zi_active_page', 't_zi', 'idx_t_zi_active_page', '''
+    CREATE INDEX IF NOT EXISTS idx_t_zi_active_page ON t_zi (coalesce(zi, '')) WHERE is_active = 'Y'
+    '''),
+    CreateIndex(8, 'create idx_t_zi_part_active_page', 't_zi_part', 'idx_t_zi_part_active_page', '''
+    CREATE INDEX IF NOT EXISTS idx_t_zi_part_active_page ON t_zi_part (coalesce(zi, '')) WHERE is_active = 'Y'
+    '''),
+]
+
+
+def setup_cache_db(conn, wal=True, batch_size=DEFAULT_BATCH_SIZE, log=None):
+    """
+    Create or upgrade the cache schema on `conn`. Returns the names of the
+    migration steps that changed something.
+
+    A new database is set to incremental auto_vacuum, so space freed by
+    compaction can be returned with `PRAGMA incremental_vacuum`; `wal` puts
+    it in WAL mode, where readers are not blocked by a writer (a persistent
+    setting of the file).
+    """
+    conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+    if wal:
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+    applied = migrate(conn, CACHE_MIGRATIONS, batch_size, log)
+    conn.execute("PRAGMA optimize")
+    return applied
+
+
+def setup_zi_db(conn, batch_size=DEFAULT_BATCH_SIZE, log=None):
+    """
+    Add the dictionary API's indexes to a zi.sqlite. Returns the names of
+    the migration steps that changed something.
+    """
+    applied = migrate(conn, ZI_MIGRATIONS, batch_size, log)
+    conn.execute("PRAGMA optimize")
+    return applied
+
+
+_migrated = set()
+_migrated_lock = threading.Lock()
+
+
+def get_cache_pool(db_path, row_factory=None):
+    """
+    `get_pool(db_path)` of a cache database brought up to date with
+    `setup_cache_db` (creating it if missing), the first time it is asked
+    for in the process. For writers; readers that must not create or
+    migrate anything use `get_pool` and check `table_exists`.
+    """
+    path = os.path.abspath(db_path)
+    with _migrated_lock:
+        if path not in _migrated:
+            with get_pool(path).connection() as conn:
+                setup_cache_db(conn)
+            _migrated.add(path)
+    return get_pool(path, row_factory)
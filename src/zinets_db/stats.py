@@ -0,0 +1,148 @@
+"""
+    Materialized statistics of the character cache.
+
+    The `character_cache_stats` table holds one row per (llm_provider,
+    llm_model_name, is_active, is_best) group with its row count and newest
+    timestamp, kept current by triggers on `character_cache`, so every
+    writer maintains it and a stats read touches a handful of rows.
+
+    `last_updated` is the newest timestamp written to a group; it does not
+    move back when rows leave the group. `INSERT OR REPLACE` removes the old
+    row without firing the delete trigger (unless `recursive_triggers` is
+    on), so writers upsert with `ON CONFLICT ... DO UPDATE` instead;
+    `check_cache_stats` compares with a full recount.
+"""
+
+
+STATS_TABLE = '''
+CREATE TABLE IF NOT EXISTS character_cache_stats (
+    llm_provider TEXT NOT NULL,
+    llm_model_name TEXT NOT NULL,
+    is_active TEXT NOT NULL,
+    is_best TEXT NOT NULL,
+    n_rows INTEGER NOT NULL DEFAULT 0,
+    last_updated TEXT,
+    PRIMARY KEY (llm_provider, llm_model_name, is_active, is_best)
+)
+'''
+
+# NULL group columns are counted under '' so the primary key can match them
+_ADD_ROW = '''
+    INSERT INTO character_cache_stats VALUES (
+        coalesce(NEW.llm_provider, ''), coalesce(NEW.llm_model_name, ''),
+        coalesce(NEW.is_active, ''), coalesce(NEW.is_best, ''), 1, NEW.timestamp)
+    ON CONFLICT (llm_provider, llm_model_name, is_active, is_best) DO UPDATE SET
+        n_rows = n_rows + 1,
+        last_updated = CASE WHEN last_updated IS NULL OR excluded.last_updated > last_updated
+                            THEN excluded.last_updated ELSE last_updated END;
+'''
+
+_REMOVE_ROW = '''
+    UPDATE character_cache_stats SET n_rows = n_rows - 1
+    WHERE llm_provider = coalesce(OLD.llm_provider, '') AND llm_model_name = coalesce(OLD.llm_model_name, '')
+      AND is_active = coalesce(OLD.is_active, '') AND is_best = coalesce(OLD.is_best, '');
+'''
+
+STATS_TRIGGERS = (
+    f'''
+    CREATE TRIGGER IF NOT EXISTS character_cache_stats_insert AFTER INSERT ON character_cache
+    BEGIN {_ADD_ROW} END
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS character_cache_stats_delete AFTER DELETE ON character_cache
+    BEGIN {_REMOVE_ROW} END
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS character_cache_stats_update
+    AFTER UPDATE OF llm_provider, llm_model_name, is_active, is_best, timestamp ON character_cache
+    BEGIN {_REMOVE_ROW} {_ADD_ROW} END
+    ''',
+)
+
+_RECOUNT = '''
+SELECT coalesce(llm_provider, ''), coalesce(llm_model_name, ''), coalesce(is_active, ''), coalesce(is_best, ''),
+       COUNT(*), MAX(timestamp)
+FROM character_cache
+GROUP BY 1, 2, 3, 4
+'''
+
+
+def trigger_names():
+    return [f'character_cache_stats_{event}' for event in ('insert', 'delete', 'update')]
+
+
+def setup_cache_stats(conn):
+    """
+    Create the statistics table and its triggers if missing; a new table is
+    filled from the rows already cached. Commits. True if anything was created.
+    """
+    exists = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'character_cache_stats'"
+                          ).fetchone()
+    if exists and all(conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = ?",
+                                   (name,)).fetchone() for name in trigger_names()):
+        return False
+    conn.execute(STATS_TABLE)
+    for ddl in STATS_TRIGGERS:
+        conn.execute(ddl)
+    # triggers may have been missing while rows were written: recount
+    rebuild_cache_stats(conn)
+    return True
+
+
+def rebuild_cache_stats(conn):
+    """
+    Recompute the statistics table from `character_cache`. Commits.
+    """
+    with conn:
+        conn.execute('DELETE FROM character_cache_stats')
+        conn.execute(f'INSERT INTO character_cache_stats {_RECOUNT}')
+
+
+def _summarize(groups):
+    """
+    Statistics from (provider, model, is_active, is_best, n_rows, last_updated) groups.
+    """
+    stats = {'total': 0, 'active': 0, 'best': 0, 'providers': {}, 'models': {}, 'last_updated': None}
+    for provider, model, is_active, is_best, n_rows, last_updated in groups:
+        stats['total'] += n_rows
+        if is_active != 'Y' or not n_rows:
+            continue
+        stats['active'] += n_rows
+        stats['best'] += n_rows if is_best == 'Y' else 0
+        stats['providers'][provider] = stats['providers'].get(provider, 0) + n_rows
+        stats['models'][model] = stats['models'].get(model, 0) + n_rows
+        if last_updated and (stats['last_updated'] is None or last_updated > stats['last_updated']):
+            stats['last_updated'] = last_updated
+    return stats
+
+
+def read_cache_stats(conn):
+    """
+    {'total', 'active', 'best', 'providers', 'models', 'last_updated'} from the
+    statistics table; counts by provider and model are of active rows.
+    Read-only: a database without the table (not migrated yet) is recounted.
+    """
+    exists = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'character_cache_stats'"
+                          ).fetchone()
+    if not exists:
+        return _summarize(conn.execute(_RECOUNT))
+    return _summarize(conn.execute('''
+    SELECT llm_provider, llm_model_name, is_active, is_best, n_rows, last_updated FROM character_cache_stats
+    '''))
+
+
+def check_cache_stats(conn):
+    """
+    Compare the statistics table with a full recount. Returns the groups that
+    differ as (group, stored (n_rows, last_updated), actual) tuples.
+    """
+    stored = {tuple(row[:4]): tuple(row[4:]) for row in conn.execute('SELECT * FROM character_cache_stats')}
+    actual = {tuple(row[:4]): tuple(row[4:]) for row in conn.execute(_RECOUNT)}
+    differences = []
+    for group in sorted(set(stored) | set(actual)):
+        stored_rows, stored_last = stored.get(group, (0, None))
+        actual_rows, actual_last = actual.get(group, (0, None))
+        # a stored last_updated newer than the rows left in the group is expected
+        if stored_rows != actual_rows or (actual_last and (stored_last or '') < actual_last):
+            differences.append((group, (stored_rows, stored_last), (actual_rows, actual_last)))
+    return differences
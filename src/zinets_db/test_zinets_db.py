@@ -0,0 +1,218 @@
+import os
+import sqlite3
+import tempfile
+import time
+import unittest
+
+from zinets_db import (CACHE_MIGRATIONS, CacheWriter, ConnectionPool, TTLCache, migrate, plan, queries,
+                       read_cache_stats, setup_cache_db, table_exists, ttl_cache)
+from zinets_db.migrations import PENDING, PRESENT, AddColumn, applied_versions
+from zinets_db.schema import CHARACTER_CACHE_TABLE
+
+
+class TestConnectionPool(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.pool = ConnectionPool(os.path.join(self.tmp_dir.name, 'cache.sqlite'), size=1)
+
+    def tearDown(self):
+        self.pool.close()
+        self.tmp_dir.cleanup()
+
+    def test_close_returns_the_connection_for_reuse(self):
+        conn = self.pool.get()
+        conn.execute('CREATE TABLE t (x)')
+        conn.execute('INSERT INTO t VALUES (1)')
+        conn.close()                    # uncommitted insert is rolled back
+        self.assertIs(self.pool.get(), conn)
+        self.assertEqual(conn.execute('SELECT COUNT(*) FROM t').fetchone()[0], 0)
+        self.assertEqual(self.pool.metrics, {'opened': 1, 'reused': 1})
+
+    def test_connections_beyond_the_pool_size_are_closed(self):
+        first, second = self.pool.get(), self.pool.get()
+        first.close()
+        second.close()
+        self.assertIs(self.pool.get(), first)
+        with self.assertRaises(sqlite3.ProgrammingError):
+            second.execute('SELECT 1')
+
+
+class TestSetupCacheDb(unittest.TestCase):
+
+    def setUp(self):
+        self.conn = sqlite3.connect(':memory:')
+
+    def test_setup_is_idempotent(self):
+        applied = setup_cache_db(self.conn, wal=False)
+        self.assertEqual((applied[0], applied[-1]), ('create character_cache', 'create warm_cache_progress'))
+        self.assertIn('create statistics', applied)
+        self.assertEqual(setup_cache_db(self.conn, wal=False), [])
+        self.assertEqual(len(applied_versions(self.conn)), len(CACHE_MIGRATIONS))
+        indexes = {name for (name,) in self.conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        self.assertIn('idx_character_cache_best_rows', indexes)
+
+    def test_source_column_is_migrated(self):
+        self.conn.execute('CREATE TABLE character_cache (character TEXT PRIMARY KEY, pinyin TEXT, meaning TEXT, '
+                          'composition TEXT, phrases TEXT, source TEXT, timestamp TEXT)')
+        self.conn.execute("INSERT INTO character_cache VALUES ('水', 'shuǐ', 'water', '', '', 'gemini-batch', '')")
+        self.assertIn('migrate source column', setup_cache_db(self.conn, wal=False))
+        row = self.conn.execute(queries.SELECT_BY_KEY, ('水', 'Google', 'gemini-batch')).fetchone()
+        self.assertEqual(row[:3], ('水', 'shuǐ', 'water'))
+        self.assertEqual(read_cache_stats(self.conn)['best'], 1)
+
+    def test_stats_of_an_unmigrated_cache_are_read_without_writing(self):
+        self.conn.execute(CHARACTER_CACHE_TABLE)
+        self.conn.execute("INSERT INTO character_cache (character, llm_provider, llm_model_name) "
+                          "VALUES ('水', 'Google', 'm')")
+        self.conn.commit()
+        self.assertEqual(read_cache_stats(self.conn)['best'], 1)
+        self.assertFalse(self.conn.in_transaction)
+        self.assertFalse(table_exists(self.conn, 'character_cache_stats'))
+
+    def test_chunked_lookup_keeps_the_newest_row(self):
+        setup_cache_db(self.conn, wal=False)
+        for model, timestamp in (('old', '2025-01-01'), ('new', '2025-02-01')):
+            self.conn.execute(queries.INSERT, ('水', 'shuǐ', model, '', '', 'Google', model, timestamp, 'Y', 'Y'))
+        characters = ['水'] + [f'字{i}' for i in range(queries.BATCH_CHUNK_SIZE)]
+        found = {}
+        for chunk in queries.chunked(characters):
+            for row in self.conn.execute(queries.select_best_in(len(chunk)), chunk):
+                found[row[0]] = row
+        self.assertEqual(list(found), ['水'])
+        self.assertEqual(found['水'][2], 'new')
+
+
+class WritesDuringCopy(sqlite3.Connection):
+    """Another connection changes the table before the first batch is copied."""
+    writes = ()
+
+    def execute(self, sql, *args):
+        if sql.startswith('INSERT OR IGNORE INTO character_cache_new') and self.writes:
+            other = sqlite3.connect(self.path)
+            with other:
+                for write in self.writes:
+                    other.execute(write)
+            other.close()
+            self.writes = ()
+        return super().execute(sql, *args)
+
+
+class TestMigrations(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, 'cache.sqlite')
+        self.conn = sqlite3.connect(self.path, factory=WritesDuringCopy)
+        self.conn.path = self.path
+
+    def tearDown(self):
+        self.conn.close()
+        self.tmp_dir.cleanup()
+
+    def test_dry_run_then_migrate(self):
+        steps = plan(self.conn, CACHE_MIGRATIONS)
+        self.assertEqual([step[1] for step in steps[:3]], [PENDING, PRESENT, PRESENT])
+        self.assertTrue(all(status == PENDING for _, status, _, _ in steps[3:]))
+        # the dry run wrote nothing, not even the version table
+        self.assertFalse(self.conn.in_transaction)
+        self.assertEqual(self.conn.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()[0], 0)
+        self.assertEqual(len(applied_versions(self.conn)), 0)
+        migrate(self.conn, CACHE_MIGRATIONS)
+        self.assertEqual(plan(self.conn, CACHE_MIGRATIONS), [])
+
+    def test_source_rebuild_keeps_writes_made_during_the_copy(self):
+        self.conn.execute('CREATE TABLE character_cache (character TEXT PRIMARY KEY, pinyin TEXT, meaning TEXT, '
+                          'composition TEXT, phrases TEXT, source TEXT, timestamp TEXT)')
+        self.conn.executemany("INSERT INTO character_cache VALUES (?, '', ?, '', '', 'gemini-batch', '')",
+                              [(f'字{i}', 'old') for i in range(10)])
+        self.conn.commit()
+        self.conn.writes = ("UPDATE character_cache SET meaning = 'new' WHERE character = '字9'",
+                            "DELETE FROM character_cache WHERE character = '字0'",
+                            "INSERT INTO character_cache VALUES ('水', '', 'water', '', '', 'gemini-individual', '')")
+        migrate(self.conn, CACHE_MIGRATIONS, batch_size=3)
+        rows = dict(self.conn.execute('SELECT character, meaning FROM character_cache'))
+        self.assertEqual(len(rows), 10)
+        self.assertNotIn('字0', rows)
+        self.assertEqual((rows['字9'], rows['水']), ('new', 'water'))
+        self.assertIsNotNone(self.conn.execute(queries.SELECT_BY_KEY, ('水', 'Google', 'gemini-individual')).fetchone())
+        self.assertEqual(read_cache_stats(self.conn)['total'], 10)
+
+    def test_add_column_backfills_in_batches(self):
+        setup_cache_db(self.conn, wal=False)
+        self.conn.executemany(queries.INSERT, [(f'字{i}', 'zì', '', '', '', 'Google', 'm', '', 'Y', 'Y')
+                                               for i in range(7)])
+        self.conn.commit()
+        step = AddColumn(100, 'add n_chars', 'character_cache', 'n_chars', 'INTEGER', 'length(character)')
+        self.assertEqual(migrate(self.conn, [step], batch_size=2), ['add n_chars'])
+        self.assertEqual(self.conn.execute('SELECT SUM(n_chars) FROM character_cache').fetchone()[0], 14)
+
+
+class TestCacheWriter(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, 'cache.sqlite')
+        conn = sqlite3.connect(self.path)
+        setup_cache_db(conn)
+        conn.close()
+        self.writer = CacheWriter(self.path, max_latency=0.01)
+
+    def tearDown(self):
+        self.writer.stop()
+        self.tmp_dir.cleanup()
+
+    def insert(self, character):
+        row = (character, '', '', '', '', 'Google', 'm', '', 'Y', 'Y')
+        return self.writer.submit(row[:1] + row[5:7], queries.INSERT, row)
+
+    def test_futures_report_each_write(self):
+        self.writer.start()
+        first, duplicate, other = self.insert('水'), self.insert('水'), self.insert('火')
+        self.assertTrue(first.result(timeout=5))
+        self.assertIsInstance(duplicate.exception(timeout=5), sqlite3.IntegrityError)
+        self.assertTrue(other.result(timeout=5))
+
+    def test_a_failing_batch_fails_its_writes_and_the_writer_goes_on(self):
+        def fail():
+            raise ValueError('on_commit')
+        self.writer.on_commit = fail
+        self.writer.start()
+        bad = self.writer.submit(('x',), 'INSERT INTO no_such_table VALUES (1)', ())
+        self.assertIsInstance(bad.exception(timeout=5), sqlite3.OperationalError)
+        self.assertTrue(self.insert('水').result(timeout=5))      # on_commit raised after this commit
+        self.writer.flush(timeout=5)
+
+    def test_flush_raises_when_the_thread_is_gone(self):
+        self.writer.start()
+        self.writer.queue.put(None)         # the thread ends
+        self.writer.thread.join(timeout=5)
+        with self.assertRaises(RuntimeError):
+            self.writer.flush(timeout=1)
+        self.writer.thread = None
+
+
+class TestTTLCache(unittest.TestCase):
+
+    def test_values_expire(self):
+        cache = TTLCache(ttl=0.05)
+        cache.set('total', 3)
+        self.assertEqual(cache.get('total'), 3)
+        time.sleep(0.06)
+        self.assertIsNone(cache.get('total'))
+
+    def test_decorator_caches_by_arguments(self):
+        calls = []
+
+        @ttl_cache(ttl=60)
+        def count(table):
+            calls.append(table)
+            return len(calls)
+
+        self.assertEqual((count('t_zi'), count('t_zi'), count('t_ele_zi')), (1, 1, 2))
+        count.cache.clear()
+        self.assertEqual(count('t_zi'), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
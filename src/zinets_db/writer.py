@@ -0,0 +1,171 @@
+"""
+    Batching of cache writes (group commit).
+"""
+
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+
+from .pool import connect, get_pool
+
+
+DEFAULT_MAX_LATENCY = 0.05      # seconds a write may wait
+DEFAULT_BATCH_SIZE = 500        # writes per transaction
+DEFAULT_FLUSH_TIMEOUT = 30      # seconds flush() waits for the writer thread
+
+
+class CacheWriter:
+    """
+    Writes are queued by the callers and committed by one writer thread,
+    which coalesces whatever arrives within `max_latency` of the first
+    write (at most `batch_size` writes) into one transaction. `submit()`
+    returns a Future of the write: its result is True once committed, or
+    it holds the exception of the write. A constraint violation (e.g. a
+    duplicate insert) fails only that write; any other sqlite3.Error rolls
+    back and fails the whole batch. Callers that acknowledge a write wait
+    for its future, so what they acknowledge is committed.
+    `flush()` waits until everything queued so far is committed; callers
+    that read a row before writing it call `flush_pending(key)` first, so
+    they see their own earlier writes. `stop()` flushes and ends the
+    thread. With `enabled` off, writes are committed synchronously on the
+    calling thread. `on_commit` is called after each committed batch; an
+    exception it raises is reported and does not stop the writer.
+    """
+
+    def __init__(self, db_path, max_latency=DEFAULT_MAX_LATENCY, batch_size=DEFAULT_BATCH_SIZE,
+                 enabled=True, on_commit=None):
+        self.db_path = db_path
+        self.max_latency = max_latency
+        self.batch_size = batch_size
+        self.enabled = enabled
+        self.on_commit = on_commit
+        self.queue = queue.Queue()
+        self.thread = None
+        self.pending = {}           # key -> queued writes
+        self.metrics = {"queued": 0, "committed": 0, "failed": 0, "commits": 0,
+                        "last_batch_size": 0, "max_batch_size": 0, "max_queue_depth": 0}
+        self._lock = threading.Lock()
+
+    def start(self):
+        if self.enabled and self.thread is None:
+            self.thread = threading.Thread(target=self._run, name="cache-writer", daemon=True)
+            self.thread.start()
+
+    def submit(self, key, sql, params):
+        if self.thread is not None and not self.thread.is_alive():
+            raise RuntimeError("cache writer thread is not running")
+        future = Future()
+        with self._lock:
+            self.metrics["queued"] += 1
+            if self.thread is not None:
+                self.pending[key] = self.pending.get(key, 0) + 1
+                self.metrics["max_queue_depth"] = max(self.metrics["max_queue_depth"], self._depth())
+        if self.thread is None:
+            self._commit(get_pool(self.db_path).get(), [(key, sql, params, future)], close=True)
+        else:
+            self.queue.put((key, sql, params, future))
+        return future
+
+    def _depth(self):
+        # writes accepted but not committed yet, including the batch being written
+        return self.metrics["queued"] - self.metrics["committed"] - self.metrics["failed"]
+
+    def flush(self, timeout=DEFAULT_FLUSH_TIMEOUT):
+        """
+        Wait until the writes queued so far are committed. Raises
+        RuntimeError if the writer thread is not running and TimeoutError
+        after `timeout` seconds.
+        """
+        if self.thread is None:
+            return
+        if not self.thread.is_alive():
+            raise RuntimeError("cache writer thread is not running")
+        done = threading.Event()
+        self.queue.put(done)
+        deadline = time.monotonic() + timeout
+        while not done.wait(min(0.1, max(0.0, deadline - time.monotonic()))):
+            if not self.thread.is_alive():
+                raise RuntimeError("cache writer thread stopped before the flush")
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"cache writer did not flush within {timeout} s")
+
+    def flush_pending(self, key):
+        if key in self.pending:
+            self.flush()
+
+    def stop(self):
+        if self.thread is not None:
+            self.queue.put(None)
+            self.thread.join()
+            self.thread = None
+
+    def stats(self):
+        with self._lock:
+            return dict(self.metrics, queue_depth=self._depth(), enabled=self.thread is not None,
+                        max_latency=self.max_latency, batch_size=self.batch_size,
+                        mean_batch_size=self.metrics["committed"] / self.metrics["commits"]
+                        if self.metrics["commits"] else 0.0)
+
+    def _run(self):
+        conn = connect(self.db_path)
+        running = True
+        while running:
+            batch = [self.queue.get()]
+            deadline = time.monotonic() + self.max_latency
+            # coalesce until the deadline, the batch size, a flush or stop
+            while isinstance(batch[-1], tuple) and len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get(timeout=max(0.0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+            running = batch[-1] is not None
+            self._commit(conn, [item for item in batch if isinstance(item, tuple)])
+            for item in batch:
+                if isinstance(item, threading.Event):
+                    item.set()
+        conn.close()
+
+    def _commit(self, conn, writes, close=False):
+        """Commit `writes` in one transaction and settle their futures; never raises."""
+        outcomes = []       # (future, exception or None)
+        try:
+            if writes:
+                with conn:
+                    for _, sql, params, future in writes:
+                        try:
+                            conn.execute(sql, params)
+                            outcomes.append((future, None))
+                        except sqlite3.IntegrityError as e:
+                            outcomes.append((future, e))
+        except Exception as e:      # the transaction was rolled back: no write of the batch is committed
+            print(f"Cache writer: batch of {len(writes)} writes failed: {e}")
+            outcomes = [(future, e) for _, _, _, future in writes]
+        finally:
+            if close:
+                conn.close()
+        committed = sum(error is None for _, error in outcomes)
+        failed = len(outcomes) - committed
+        if committed and self.on_commit is not None:
+            try:
+                self.on_commit()
+            except Exception as e:
+                print(f"Cache writer: on_commit failed: {e}")
+        if writes:
+            with self._lock:
+                for key, _, _, _ in writes:
+                    if key in self.pending:
+                        self.pending[key] -= 1
+                        if not self.pending[key]:
+                            del self.pending[key]
+                self.metrics["committed"] += committed
+                self.metrics["failed"] += failed
+                self.metrics["commits"] += 1
+                self.metrics["last_batch_size"] = len(writes)
+                self.metrics["max_batch_size"] = max(self.metrics["max_batch_size"], len(writes))
+        for future, error in outcomes:
+            if error is None:
+                future.set_result(True)
+            else:
+                future.set_exception(error)